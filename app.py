@@ -5,6 +5,7 @@ from flask_bcrypt import Bcrypt
 import os
 from dotenv import load_dotenv
 from datetime import timedelta
+from utils.json_provider import ORJSONProvider
 
 load_dotenv()
 
@@ -14,6 +15,8 @@ NGROK_URL = os.getenv('NGROK_URL')
 
 def create_app():
     app = Flask(__name__)
+    # orjson-backed jsonify; encodes ObjectId/NumPy values directly
+    app.json = ORJSONProvider(app)
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
     
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY')
@@ -45,6 +48,10 @@ def create_app():
          supports_credentials=True,
          send_wildcard=False,
          max_age=3600)
+
+    # gzip/br/zstd for large JSON responses (Accept-Encoding)
+    from middleware.compression import init_compression
+    init_compression(app)
     
     jwt = JWTManager(app)
     bcrypt = Bcrypt(app)
@@ -64,6 +71,7 @@ def create_app():
     from routes.report_routes import report_bp
     from routes.schedule_routes import schedule_bp
     from routes.allergy_routes import allergy_bp
+    from routes.metrics_routes import metrics_bp
 
     app.register_blueprint(schedule_bp, url_prefix='/api/v1/schedule')
     app.register_blueprint(products_bp, url_prefix='/api/v1/products')
@@ -79,6 +87,13 @@ def create_app():
     app.register_blueprint(crawling_bp, url_prefix='/api/v1/crawling')
     app.register_blueprint(report_bp, url_prefix='/api/v1/report')
     app.register_blueprint(allergy_bp, url_prefix='/api/v1/user')
+    app.register_blueprint(metrics_bp, url_prefix='/api/v1/metrics')
+
+    # Build the autocomplete and search indexes in the background so the first request doesn't wait for Mongo
+    from services.suggestion_service import get_suggestion_service
+    from services.search_index_service import get_search_index_service
+    get_suggestion_service().warm_up()
+    get_search_index_service().warm_up()
 
         
     @app.route('/api/v1/test', methods=['GET'])
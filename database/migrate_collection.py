@@ -1,6 +1,12 @@
-from mongodb import MongoDBConnection
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.mongodb import MongoDBConnection
+from services.products_service import ensure_product_indexes
 
 primary_db = MongoDBConnection.get_primary_db()
+metadata_db = MongoDBConnection.get_metadata_db()
 
 def create_collections():
     try:
@@ -25,6 +31,19 @@ def create_indexes():
         primary_db.ingredients.create_index('vietnameseName')
         primary_db.dishes.create_index('name')
         primary_db.users.create_index('email', unique=True)
+        # Cached AI image analyses, keyed by image hash; expire after IMAGE_ANALYSIS_CACHE_TTL seconds
+        primary_db.image_analyses.create_index([('content_hash', 1), ('description', 1)], unique=True)
+        primary_db.image_analyses.create_index('perceptual_hash')
+        primary_db.image_analyses.create_index(
+            'created_at', expireAfterSeconds=int(os.getenv('IMAGE_ANALYSIS_CACHE_TTL', 7 * 24 * 3600))
+        )
+        ensure_product_indexes()
+        # Keyset pagination: each list's sort keys, _id last (utils/pagination.py)
+        metadata_db.stores.create_index([('store_name', 1), ('chain', 1), ('_id', 1)])
+        primary_db.ingredients.create_index([('name', 1), ('vietnamese_name', 1), ('_id', 1)])
+        primary_db.users.create_index([('role', 1), ('created_at', -1), ('_id', -1)])
+        primary_db.admins.create_index([('role', 1), ('created_at', -1), ('_id', -1)])
+        primary_db.crawling_tasks.create_index([('user_id', 1), ('created_at', -1), ('_id', -1)])
         primary_db.create_index("expiry", expireAfterSeconds=0)
         
         print("Created indexes")
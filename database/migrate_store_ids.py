@@ -0,0 +1,98 @@
+"""
+One-time migration: store_id → canonical type (integer for numeric ids) in every collection
+that stores it, then create the compound (store_id, ...) indexes.
+
+Queries no longer hedge with {'store_id': {'$in': [id, str(id), int(id)]}}, so numeric ids
+saved as strings must be converted before deploying that code. Ids the crawler writes later are
+canonicalized per store when its crawl completes (products_service.canonicalize_store_documents).
+
+    python database/migrate_store_ids.py --dry-run
+    python database/migrate_store_ids.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+
+from database.mongodb import MongoDBConnection
+from services.products_service import CATEGORY_COLLECTIONS, ensure_product_indexes, rebuild_store_category_stats
+
+metadata_db = MongoDBConnection.get_metadata_db()
+primary_db = MongoDBConnection.get_primary_db()
+
+NUMERIC_STRING = {'$type': 'string', '$regex': r'^\s*-?\d+\s*$'}
+# $toLong: crawler store ids can exceed int32
+TO_CANONICAL = {'$toLong': {'$trim': {'input': '$store_id'}}}
+
+
+def migrate_field(collection, dry_run):
+    """store_id ở top-level document"""
+    query = {'store_id': NUMERIC_STRING}
+    if dry_run:
+        return collection.count_documents(query)
+    return collection.update_many(query, [{'$set': {'store_id': TO_CANONICAL}}]).modified_count
+
+
+def migrate_array(collection, field, dry_run):
+    """store_id trong các phần tử của mảng `field` (users.favourite_stores[], users.near_stores[], ...)"""
+    query = {f'{field}.store_id': NUMERIC_STRING}
+    if dry_run:
+        return collection.count_documents(query)
+    element = {'$cond': [
+        {'$eq': [{'$type': '$$element'}, 'object']},
+        {'$mergeObjects': ['$$element', {'store_id': {'$cond': [
+            {'$and': [
+                {'$eq': [{'$type': '$$element.store_id'}, 'string']},
+                {'$regexMatch': {'input': '$$element.store_id', 'regex': r'^\s*-?\d+\s*$'}},
+            ]},
+            {'$toLong': {'$trim': {'input': '$$element.store_id'}}},
+            '$$element.store_id',
+        ]}}]},
+        '$$element',
+    ]}
+    update = [{'$set': {field: {'$map': {'input': f'${field}', 'as': 'element', 'in': element}}}}]
+    return collection.update_many(query, update).modified_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert store_id to its canonical type and create store_id indexes')
+    parser.add_argument('--dry-run', action='store_true', help='Only count documents that would change')
+    args = parser.parse_args()
+
+    targets = [('metadata', metadata_db.stores)]
+    targets += [('metadata', metadata_db[name]) for name in CATEGORY_COLLECTIONS.values()]
+    targets += [('primary', primary_db.crawling_tasks)]
+
+    total = 0
+    for db_name, collection in targets:
+        changed = migrate_field(collection, args.dry_run)
+        total += changed
+        print(f"{'Would convert' if args.dry_run else 'Converted'} {changed} documents in {db_name}.{collection.name}")
+
+    array_targets = [
+        (primary_db.users, 'favourite_stores'),
+        (primary_db.users, 'near_stores'),
+        (primary_db.baskets, 'ingredients'),
+    ]
+    for collection, field in array_targets:
+        changed = migrate_array(collection, field, args.dry_run)
+        total += changed
+        print(f"{'Would convert' if args.dry_run else 'Converted'} {changed} documents' {collection.name}.{field}")
+
+    if args.dry_run:
+        print(f"Dry run: {total} documents to convert")
+        return
+
+    ensure_product_indexes()
+    print(f"Created store_id indexes on stores and {len(CATEGORY_COLLECTIONS)} category collections")
+
+    # Stats rows keyed by the old string ids are replaced by a full rebuild
+    metadata_db.store_category_stats.delete_many({})
+    result = rebuild_store_category_stats()
+    print(f"Rebuilt store_category_stats: {result['stores']} stores, {result['rows']} rows")
+    print(f"Done: {total} documents converted")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Response compression (Content-Encoding) negotiated from Accept-Encoding.
+
+zstd and brotli are used when their packages are installed, gzip always. Only compressible
+types (JSON, text, JS, XML) above COMPRESSION_MIN_SIZE bytes are compressed. Whenever the client
+negotiates an encoding for a compressible type, strong ETags become weak (the bytes on the wire
+depend on the encoding). The decision ignores body size, so 304s carry the same validator and
+Vary as the 200 they revalidate. werkzeug compares If-None-Match weakly for GET, so 304s from
+utils.http_cache keep working.
+Streamed responses are compressed chunk by chunk when COMPRESSION_STREAMING is enabled.
+"""
+import gzip
+import os
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_STREAMING = os.getenv('COMPRESSION_STREAMING', 'false').lower() == 'true'
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+
+def supported_encodings():
+    """Server preference order; used to break ties between equal client q-values."""
+    return (['zstd'] if zstandard else []) + (['br'] if brotli else []) + ['gzip']
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class _StreamCompressor:
+    """Incremental compressor with a common compress/flush interface."""
+
+    def __init__(self, encoding):
+        if encoding == 'zstd':
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._compress = compressor.compress
+            self._flush = lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            self._finish = compressor.flush
+        elif encoding == 'br':
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._compress = compressor.process
+            self._flush = compressor.flush
+            self._finish = compressor.finish
+        else:
+            # wbits=31: gzip container
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._compress = compressor.compress
+            self._flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = compressor.flush
+
+    def iterate(self, chunks):
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            # Flush per chunk so clients receive each streamed part without waiting for the end
+            data = self._compress(chunk) + self._flush()
+            if data:
+                yield data
+        yield self._finish()
+
+
+def negotiate_encoding():
+    """Best encoding the client accepts (honouring q-values, q=0 excluded), or None."""
+    return request.accept_encodings.best_match(supported_encodings())
+
+
+def _is_compressible(response):
+    mimetype = response.mimetype or ''
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES or mimetype.endswith('+json')
+
+
+def _weaken_etag(response):
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def compress_response(response):
+    """after_request hook."""
+    if (
+        request.method == 'HEAD'
+        or response.status_code < 200
+        or response.status_code in (204, 206)
+        or 'Content-Encoding' in response.headers
+        or not _is_compressible(response)
+    ):
+        return response
+
+    streamed = response.is_streamed
+    if response.direct_passthrough or (streamed and not COMPRESSION_STREAMING):
+        return response
+    response.vary.add('Accept-Encoding')
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+    _weaken_etag(response)
+    if response.status_code == 304:
+        return response
+    if not streamed and response.content_length is not None and response.content_length < COMPRESSION_MIN_SIZE:
+        return response
+
+    if streamed:
+        response.response = _StreamCompressor(encoding).iterate(response.response)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        compressed = compress(body, encoding)
+        if len(compressed) >= len(body):
+            return response
+        response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_compression(app):
+    if COMPRESSION_ENABLED:
+        app.after_request(compress_response)
@@ -110,10 +110,11 @@ def get_dishes_route():
         page = int(request.args.get('page', 0))
         size = int(request.args.get('size', 20))
         search = request.args.get('search', '').strip()
+        cursor = request.args.get('cursor') or None
         
         validate_pagination_params(page, size)
         
-        result, error = get_all_dishes(page, size, search if search else None)
+        result, error = get_all_dishes(page, size, search if search else None, cursor)
         if error:
             return jsonify({'message': error}), 500
         
@@ -217,10 +218,11 @@ def get_ingredients_route():
         size = int(request.args.get('size', 20))
         search = request.args.get('search', '').strip()
         category = request.args.get('category', None)
+        cursor = request.args.get('cursor') or None
         
         validate_pagination_params(page, size)
         
-        result, error = get_all_ingredients(page, size, search if search else None, category if category else None)
+        result, error = get_all_ingredients(page, size, search if search else None, category if category else None, cursor)
         if error:
             return jsonify({'message': error}), 500
         
@@ -320,10 +322,14 @@ def list_admin_accounts():
         size = int(request.args.get('size', 20))
         search = request.args.get('search', '').strip()
 
-        result, error = get_all_admins(page, size, search if search else None)
+        cursor = request.args.get('cursor') or None
+
+        result, error = get_all_admins(page, size, search if search else None, cursor)
         if error:
             return jsonify({'message': error}), 500
         return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({'message': f'Invalid pagination parameters: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'message': f'Error fetching admins: {str(e)}'}), 500
 
@@ -398,7 +404,9 @@ def list_users():
         size = int(request.args.get('size', 20))
         search = request.args.get('search', '').strip()
 
-        result, error = get_all_users(page, size, search if search else None)
+        cursor = request.args.get('cursor') or None
+
+        result, error = get_all_users(page, size, search if search else None, cursor)
         if error:
             return jsonify({'message': error}), 500
         return jsonify(result), 200
@@ -440,4 +448,32 @@ def update_user_status(user_id):
         }), 200
     except Exception as e:
         return jsonify({'message': f'Error updating user status: {str(e)}'}), 500
-    
\ No newline at end of file
+
+
+# Tính lại near_stores cho mọi user (sau khi thay đổi danh sách stores)
+@admin_bp.route('/jobs/recompute-near-stores', methods=['POST'])
+@jwt_required()
+@super_admin_required
+def recompute_near_stores_route():
+    """
+    POST /api/v1/admin/jobs/recompute-near-stores
+    Queue the batch near_stores recomputation (also runs nightly from Celery beat)
+    Body (optional): {"resume": true} continues an interrupted run from its checkpoint
+    Access: Super Admin only
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        resume = data.get('resume', True)
+        if not isinstance(resume, bool):
+            return jsonify({'message': 'resume must be a boolean value'}), 400
+
+        from services.async_tasks import async_recompute_all_near_stores
+        task = async_recompute_all_near_stores.delay(resume=resume)
+
+        return jsonify({
+            'message': 'Near stores recomputation queued',
+            'task_id': task.id,
+            'resume': resume
+        }), 202
+    except Exception as e:
+        return jsonify({'message': f'Error queueing near stores recomputation: {str(e)}'}), 500
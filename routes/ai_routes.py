@@ -1,14 +1,28 @@
 from flask import Blueprint, request, jsonify
 from services.ai_service import get_ai_service_client
 from services.s3_service import get_s3_service
+from services.image_preprocessing_service import get_image_preprocessing_service
+from services.image_analysis_cache_service import (
+    get_image_analysis_cache, compute_content_hash, compute_dhash, IMAGE_ANALYSIS_CACHE_ENABLED
+)
 from services.allergy_service import get_allergy_service
 from utils.token_utils import decode_token
 from flask_jwt_extended import get_jwt_identity, jwt_required
 
+import io
 import logging
+import os
+import uuid
 
 logger = logging.getLogger(__name__)
 
+AI_HEALTH_MAX_QUEUE_DEPTH = int(os.getenv('AI_HEALTH_MAX_QUEUE_DEPTH', 50))
+IMAGE_PREPROCESS_TIMEOUT = float(os.getenv('IMAGE_PREPROCESS_TIMEOUT', 30))
+PRESIGNED_UPLOAD_EXPIRES = int(os.getenv('S3_PRESIGNED_UPLOAD_EXPIRES', 300))
+PRESIGNED_UPLOAD_PREFIX = 'uploads/'
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+ALLOWED_IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp', 'gif', 'bmp', 'tiff', 'tif'}
+
 ai_bp = Blueprint('ai', __name__)
 
 def get_current_user_email():
@@ -181,7 +195,11 @@ def detect_error_type(error_message: str, is_image: bool = False) -> str:
 
 @ai_bp.route('/recipe-analysis', methods=['POST'])
 @jwt_required(optional=True)
-def analyze_recipe():
+async def analyze_recipe():
+    """
+    Async view awaiting the shared AI loop. Under WSGI it still holds its worker thread for the
+    whole call; what it shares with the sync routes is the process-wide AI concurrency limit.
+    """
     try:
         data = request.get_json()
         user_email = get_current_user_email()
@@ -206,7 +224,7 @@ def analyze_recipe():
                 logger.error(f"Failed to reconnect: {e}")
                 return jsonify({'success': False, 'error': 'AI Service unavailable'}), 503
         
-        response = client.analyze_recipe(user_input)
+        response = await client.analyze_recipe_async(user_input)
         result, status = normalize_response(response)
         
         if status == 'guardrail_blocked':
@@ -255,6 +273,7 @@ def analyze_recipe():
 
 @ai_bp.route('/recipe-analysis/health', methods=['GET'])
 def health_check_ai_service():
+    """Answer from cached AI queue stats (refreshed in the background) instead of running an analysis"""
     try:
         client = get_ai_service_client()
         is_connected = client.is_connected()
@@ -262,11 +281,17 @@ def health_check_ai_service():
         if not is_connected:
             return jsonify({'status': 'unhealthy', 'ai_service': 'disconnected', 'connection': False}), 503
         
-        try:
-            client.analyze_recipe("test health check")
-            return jsonify({'status': 'healthy', 'ai_service': 'connected', 'connection': True}), 200
-        except TimeoutError:
-            return jsonify({'status': 'degraded', 'ai_service': 'slow_response', 'connection': True}), 200
+        health = client.get_health()
+        if not health.get('success'):
+            return jsonify({'status': 'degraded', 'ai_service': 'unknown', 'connection': True, 'queue': health}), 200
+        
+        if health['consumer_count'] == 0:
+            return jsonify({'status': 'unhealthy', 'ai_service': 'no_consumers', 'connection': True, 'queue': health}), 503
+        
+        if health['message_count'] > AI_HEALTH_MAX_QUEUE_DEPTH:
+            return jsonify({'status': 'degraded', 'ai_service': 'backlogged', 'connection': True, 'queue': health}), 200
+        
+        return jsonify({'status': 'healthy', 'ai_service': 'connected', 'connection': True, 'queue': health}), 200
             
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -349,6 +374,93 @@ def analyze_image():
         return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500
 
 
+def analyze_image_cached(s3_key: str, description: str, content_hash: str, image_bytes: bytes = None) -> tuple:
+    """
+    Cached analysis for a known image, else an AI RPC (successful results are cached). Returns (response, error).
+    With image_bytes, an exact-hash miss falls back to a perceptual-hash lookup; the hash is computed
+    on the preprocessing pool only then.
+    """
+    analysis_cache = get_image_analysis_cache() if IMAGE_ANALYSIS_CACHE_ENABLED else None
+    response = analysis_cache.get(content_hash, description) if analysis_cache else None
+    perceptual_hash = None
+    
+    if response is None and analysis_cache and image_bytes is not None:
+        perceptual_hash = get_image_preprocessing_service().submit(compute_dhash, image_bytes).result(
+            timeout=IMAGE_PREPROCESS_TIMEOUT
+        )
+        if perceptual_hash:
+            response = analysis_cache.get_similar(perceptual_hash, description)
+    
+    if response is not None:
+        logger.info(f"Image analysis cache hit: {content_hash}")
+        return response, None
+    
+    client = get_ai_service_client()
+    
+    if not client.is_connected():
+        try:
+            client.reconnect()
+        except Exception as e:
+            logger.error(f"Failed to reconnect: {e}")
+            return None, 'AI Service unavailable'
+    
+    response = client.analyze_image(s3_key, description)
+    _, status = normalize_response(response)
+    
+    if analysis_cache and status == 'success':
+        analysis_cache.store(content_hash, description, s3_key, response, perceptual_hash)
+    
+    return response, None
+
+
+def build_image_upload_response(response: dict, s3_key: str, content_hash: str, uploaded: bool) -> tuple:
+    """
+    Standard response plus s3_key for uploaded images. Blocked images are uncached, and deleted
+    only if `uploaded` (this request created the object; content-addressed objects are shared).
+    """
+    result, status = normalize_response(response)
+    
+    response_with_key = lambda resp: {**resp, 's3_key': s3_key if status != 'guardrail_blocked' else None}
+    
+    if status == 'guardrail_blocked':
+        if uploaded:
+            get_s3_service().delete_image(s3_key)
+        if IMAGE_ANALYSIS_CACHE_ENABLED:
+            get_image_analysis_cache().invalidate(content_hash)
+        return jsonify(response_with_key(build_standard_response(
+            'guardrail_blocked',
+            result,
+            result.get('error', 'Hình ảnh vi phạm chính sách an toàn'),
+            'Hình ảnh không phù hợp. Vui lòng thử lại với hình ảnh khác.'
+        ))), 400
+    
+    elif status == 'error':
+        error_message = result.get('error', 'Unknown error')
+        error_type = result.get('error_type', 'unknown')
+        
+        if error_type == 'unknown':
+            error_type = detect_error_type(error_message, is_image=True)
+        
+        logger.error(f"AI Service error [{error_type}]: {error_message}")
+        user_message, status_code = get_error_message(error_type, result.get('dish', {}).get('name', ''))
+        
+        return jsonify(response_with_key(build_standard_response('error', result, error_message, user_message))), status_code
+    
+    elif status == 'success':
+        # Process excluded ingredients and add to user's allergies
+        result = process_excluded_ingredients(result)
+        return jsonify(response_with_key(build_standard_response('success', result))), 200
+    
+    else:
+        logger.error(f"Unexpected status '{status}'")
+        return jsonify(response_with_key(build_standard_response(
+            'error',
+            {'dish': {'name': ''}, 'cart': None},
+            'Invalid response status',
+            'Định dạng phản hồi không hợp lệ'
+        ))), 500
+
+
 @ai_bp.route('/upload-and-analyze', methods=['POST'])
 @jwt_required(optional=True)
 def upload_and_analyze():
@@ -360,85 +472,159 @@ def upload_and_analyze():
         if file.filename == '':
             return jsonify({'success': False, 'error': 'No file selected'}), 400
         
-        allowed_extensions = {'jpg', 'jpeg', 'png', 'webp', 'gif', 'bmp', 'tiff', 'tif'}
         file_ext = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
         
-        if file_ext not in allowed_extensions:
-            return jsonify({'success': False, 'error': f'Invalid file type. Allowed: {", ".join(allowed_extensions)}'}), 400
+        if file_ext not in ALLOWED_IMAGE_EXTENSIONS:
+            return jsonify({'success': False, 'error': f'Invalid file type. Allowed: {", ".join(ALLOWED_IMAGE_EXTENSIONS)}'}), 400
         
         file.seek(0, 2)
         file_size = file.tell()
         file.seek(0)
         
-        max_size = 10 * 1024 * 1024
-        if file_size > max_size:
-            return jsonify({'success': False, 'error': f'File too large. Maximum size: {max_size / (1024*1024)}MB'}), 400
+        if file_size > MAX_IMAGE_SIZE:
+            return jsonify({'success': False, 'error': f'File too large. Maximum size: {MAX_IMAGE_SIZE / (1024*1024)}MB'}), 400
         
         description = request.form.get('description', '')
         
+        # Content-addressed key: re-uploads of the same bytes reuse the existing object
+        image_bytes = file.read()
+        content_hash = compute_content_hash(image_bytes)
+        
         try:
             s3_service = get_s3_service()
-            s3_key = s3_service.upload_image(file=file, filename=file.filename, content_type=file.content_type)
+            preprocessor = get_image_preprocessing_service()
+            # Preprocessing keeps the original bytes (and extension) for small upright or undecodable
+            # images, so the object may live under either key
+            candidate_keys = list(dict.fromkeys([
+                s3_service.content_key(content_hash, preprocessor.output_filename(file.filename)),
+                s3_service.content_key(content_hash, file.filename),
+            ]))
+            s3_key = next((key for key in candidate_keys if s3_service.object_exists(key)), None)
+            uploaded = False
+            if s3_key is None:
+                # Orientation, downscale and re-encode run on the preprocessing pool
+                image = preprocessor.process_async(image_bytes, file.filename, file.content_type).result(
+                    timeout=IMAGE_PREPROCESS_TIMEOUT
+                )
+                s3_key = s3_service.content_key(content_hash, image['filename'])
+                s3_service.upload_image(file=io.BytesIO(image['data']), filename=image['filename'],
+                                        content_type=image['content_type'], key=s3_key)
+                uploaded = True
+            else:
+                logger.info(f"Image already in S3, skipping upload: {s3_key}")
         except Exception as e:
             logger.error(f"Failed to upload image: {e}")
             return jsonify({'success': False, 'error': f'Failed to upload image: {str(e)}'}), 500
         
-        client = get_ai_service_client()
-        
-        if not client.is_connected():
-            try:
-                client.reconnect()
-            except Exception as e:
-                logger.error(f"Failed to reconnect: {e}")
+        response, error = analyze_image_cached(s3_key, description, content_hash, image_bytes)
+        if error:
+            # Only remove an object this request created; existing ones back earlier analyses
+            if uploaded:
                 s3_service.delete_image(s3_key)
-                return jsonify({'success': False, 'error': 'AI Service unavailable'}), 503
+            return jsonify({'success': False, 'error': error}), 503
         
-        response = client.analyze_image(s3_key, description)
-        result, status = normalize_response(response)
+        return build_image_upload_response(response, s3_key, content_hash, uploaded)
+        
+    except TimeoutError:
+        logger.error("AI Service timeout")
+        return jsonify({'success': False, 'error': 'Request timeout'}), 504
+    
+    except Exception as e:
+        logger.error(f"Error in upload and analyze: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500
+
+
+@ai_bp.route('/upload-url', methods=['POST'])
+@jwt_required(optional=True)
+def create_upload_url():
+    """
+    Presigned direct-to-S3 upload. The client uploads the bytes itself, then calls
+    /analyze-uploaded with the returned s3_key, so Flask workers only handle small JSON.
+    """
+    try:
+        data = request.get_json() or {}
+        filename = data.get('filename')
+        content_type = data.get('content_type')
+        method = (data.get('method') or 'post').lower()
         
-        response_with_key = lambda resp: {**resp, 's3_key': s3_key if status != 'guardrail_blocked' else None}
+        if not filename or not isinstance(filename, str):
+            return jsonify({'success': False, 'error': 'filename is required'}), 400
         
-        if status == 'guardrail_blocked':
-            s3_service.delete_image(s3_key)
-            return jsonify(response_with_key(build_standard_response(
-                'guardrail_blocked',
-                result,
-                result.get('error', 'Hình ảnh vi phạm chính sách an toàn'),
-                'Hình ảnh không phù hợp. Vui lòng thử lại với hình ảnh khác.'
-            ))), 400
+        file_ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+        if file_ext not in ALLOWED_IMAGE_EXTENSIONS:
+            return jsonify({'success': False, 'error': f'Invalid file type. Allowed: {", ".join(ALLOWED_IMAGE_EXTENSIONS)}'}), 400
         
-        elif status == 'error':
-            error_message = result.get('error', 'Unknown error')
-            error_type = result.get('error_type', 'unknown')
-            
-            if error_type == 'unknown':
-                error_type = detect_error_type(error_message, is_image=True)
-            
-            logger.error(f"AI Service error [{error_type}]: {error_message}")
-            user_message, status_code = get_error_message(error_type, result.get('dish', {}).get('name', ''))
-            
-            return jsonify(response_with_key(build_standard_response('error', result, error_message, user_message))), status_code
+        if not content_type or not isinstance(content_type, str) or not content_type.startswith('image/'):
+            return jsonify({'success': False, 'error': 'content_type must be an image/* type'}), 400
         
-        elif status == 'success':
-            # Process excluded ingredients and add to user's allergies
-            result = process_excluded_ingredients(result)
-            return jsonify(response_with_key(build_standard_response('success', result))), 200
+        if method not in ('post', 'put'):
+            return jsonify({'success': False, 'error': 'method must be post or put'}), 400
         
-        else:
-            logger.error(f"Unexpected status '{status}'")
-            return jsonify(response_with_key(build_standard_response(
-                'error',
-                {'dish': {'name': ''}, 'cart': None},
-                'Invalid response status',
-                'Định dạng phản hồi không hợp lệ'
-            ))), 500
+        size = data.get('size')
+        if size is not None and (not isinstance(size, int) or size <= 0 or size > MAX_IMAGE_SIZE):
+            return jsonify({'success': False, 'error': f'File too large. Maximum size: {MAX_IMAGE_SIZE / (1024*1024)}MB'}), 400
+        
+        s3_key = f"{PRESIGNED_UPLOAD_PREFIX}{uuid.uuid4().hex}.{file_ext}"
+        upload = get_s3_service().create_presigned_upload(
+            s3_key, content_type, MAX_IMAGE_SIZE, expires_in=PRESIGNED_UPLOAD_EXPIRES, method=method
+        )
+        
+        return jsonify({
+            'success': True,
+            's3_key': s3_key,
+            'upload': upload,
+            'max_size': MAX_IMAGE_SIZE,
+            'expires_in': PRESIGNED_UPLOAD_EXPIRES
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Failed to create upload URL: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500
+
+
+@ai_bp.route('/analyze-uploaded', methods=['POST'])
+@jwt_required(optional=True)
+def analyze_uploaded():
+    """Analyze an image uploaded via /upload-url. Analyses are cached by the object's ETag."""
+    try:
+        data = request.get_json() or {}
+        s3_key = data.get('s3_key')
+        description = data.get('description', '')
+        
+        if not s3_key or not isinstance(s3_key, str):
+            return jsonify({'success': False, 'error': 's3_key is required'}), 400
+        
+        if not s3_key.startswith(PRESIGNED_UPLOAD_PREFIX) or '..' in s3_key:
+            return jsonify({'success': False, 'error': 'Invalid s3_key'}), 400
+        
+        if description and not isinstance(description, str):
+            return jsonify({'success': False, 'error': 'description must be a string'}), 400
+        
+        s3_service = get_s3_service()
+        info = s3_service.get_object_info(s3_key)
+        if not info:
+            return jsonify({'success': False, 'error': 'Uploaded image not found'}), 404
+        
+        # Presigned PUT cannot enforce size or type, so check what actually landed
+        if info['size'] > MAX_IMAGE_SIZE or not info['content_type'].startswith('image/'):
+            s3_service.delete_image(s3_key)
+            return jsonify({'success': False, 'error': 'Uploaded object is not a valid image'}), 400
+        
+        # ETag identifies the uploaded content (MD5 for single-part uploads)
+        content_hash = f"etag:{info['etag']}"
+        response, error = analyze_image_cached(s3_key, description, content_hash)
+        if error:
+            return jsonify({'success': False, 'error': error}), 503
+        
+        # The client uploaded this object for this analysis under a unique key
+        return build_image_upload_response(response, s3_key, content_hash, uploaded=True)
         
     except TimeoutError:
         logger.error("AI Service timeout")
         return jsonify({'success': False, 'error': 'Request timeout'}), 504
     
     except Exception as e:
-        logger.error(f"Error in upload and analyze: {e}", exc_info=True)
+        logger.error(f"Error analyzing uploaded image: {e}", exc_info=True)
         return jsonify({'success': False, 'error': f'Internal server error: {str(e)}'}), 500
 
 
@@ -1,3 +1,4 @@
+import re
 import uuid
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
@@ -5,10 +6,16 @@ from services.rabbitmq_service import rabbitmq_service
 from datetime import datetime
 from middleware.admin_middleware import admin_required
 from database.mongodb import MongoDBConnection
+from utils.store_ids import canonical_store_id
+from utils.pagination import CursorError, paginate, count_total
+from utils import catalog_events
 
 crawling_bp = Blueprint('crawling', __name__)
 db = MongoDBConnection.get_primary_db()
 
+# index: (user_id, created_at, _id)
+TASK_LIST_SORT = [('created_at', -1), ('_id', -1)]
+
 
 def get_user_or_401():
     user = get_jwt_identity()
@@ -47,7 +54,7 @@ def crawl_store():
         return jsonify({'message': 'Invalid token'}), 401
 
     data = request.get_json() or {}
-    store_id = data.get('storeId')
+    store_id = canonical_store_id(data.get('storeId'))
     chain = data.get('chain', 'BHX').upper()
 
     if not store_id:
@@ -76,6 +83,7 @@ def crawl_store():
     try:
         # Save task to database
         db.crawling_tasks.insert_one(task_record)
+        catalog_events.publish('crawling_tasks')
         
         # Send async request to crawling service
         payload = {
@@ -103,6 +111,81 @@ def crawl_store():
     except Exception as e:
         return make_response(f'Error: {str(e)}', None, 500)
 
+@crawling_bp.route('/crawl/stores', methods=['POST'])
+@jwt_required()
+@admin_required
+def crawl_all_stores():
+    """Start crawling every store of the given chains (batch publish with confirms)"""
+    user = get_user_or_401()
+    if not user:
+        return jsonify({'message': 'Invalid token'}), 401
+
+    data = request.get_json() or {}
+    chains = [chain.upper() for chain in data.get('chains', ['BHX', 'WM'])]
+    parameters = {
+        'provinceId': data.get('provinceId', 3),
+        'districtId': data.get('districtId', 0),
+        'wardId': data.get('wardId', 0),
+        'concurrency': data.get('concurrency', 2)
+    }
+
+    try:
+        metadata_db = MongoDBConnection.get_metadata_db()
+        chain_patterns = [re.compile(f'^{re.escape(chain)}$', re.IGNORECASE) for chain in chains]
+        stores = list(metadata_db.stores.find({'chain': {'$in': chain_patterns}}, {'store_id': 1, 'chain': 1}))
+        if not stores:
+            return make_response('No stores found for chains', None, 404, chains=chains)
+
+        batch_id = str(uuid.uuid4())
+        now = datetime.utcnow()
+        task_records = [{
+            'task_id': str(uuid.uuid4()),
+            'batch_id': batch_id,
+            'user_id': user,
+            'store_id': store['store_id'],
+            'chain': store.get('chain', '').upper(),
+            'status': 'queued',
+            'created_at': now,
+            'updated_at': now,
+            'parameters': parameters
+        } for store in stores]
+        db.crawling_tasks.insert_many(task_records, ordered=False)
+        catalog_events.publish('crawling_tasks')
+
+        results = rabbitmq_service.send_async_requests([
+            ('crawl_store', {
+                'task_id': record['task_id'],
+                'chain': record['chain'],
+                'storeId': record['store_id'],
+                **parameters
+            })
+            for record in task_records
+        ])
+
+        failed = [
+            {'task_id': record['task_id'], 'store_id': record['store_id'], 'error': result['error']}
+            for record, result in zip(task_records, results) if not result['success']
+        ]
+        if failed:
+            db.crawling_tasks.update_many(
+                {'task_id': {'$in': [item['task_id'] for item in failed]}, 'status': 'queued'},
+                {'$set': {'status': 'failed', 'error': 'Publish failed', 'updated_at': datetime.utcnow()}}
+            )
+
+        return make_response(
+            f'Crawling started for {len(task_records) - len(failed)}/{len(task_records)} stores',
+            {
+                'batch_id': batch_id,
+                'chains': chains,
+                'queued': len(task_records) - len(failed),
+                'failed': failed
+            },
+            202
+        )
+
+    except Exception as e:
+        return make_response(f'Error: {str(e)}', None, 500)
+
 @crawling_bp.route('/task/<task_id>/status', methods=['GET'])
 @jwt_required()
 def get_task_status(task_id):
@@ -120,10 +203,6 @@ def get_task_status(task_id):
         if task.get('user_id') != user:
             return make_response('Access denied', None, 403)
         
-        # Convert ObjectId to string
-        if '_id' in task:
-            task['_id'] = str(task['_id'])
-        
         return make_response('Task status retrieved', task)
         
     except Exception as e:
@@ -141,44 +220,37 @@ def get_user_tasks():
         limit = int(request.args.get('limit', 20))
         skip = int(request.args.get('skip', 0))
         status = request.args.get('status')
+        cursor = request.args.get('cursor') or None
         
         query = {'user_id': user}
         if status:
             query['status'] = status
         
-        tasks = list(
-            db.crawling_tasks.find(query)
-            .sort('created_at', -1)
-            .skip(skip)
-            .limit(limit)
-        )
+        tasks, next_cursor = paginate(db.crawling_tasks, query, TASK_LIST_SORT, skip, limit, cursor)
         
-        # Get metadata_db to fetch store names
+        # Get metadata_db to fetch store names (one query for the whole page)
         metadata_db = MongoDBConnection.get_metadata_db()
+        store_ids = list({task['store_id'] for task in tasks if task.get('store_id')})
+        store_names = {
+            store['store_id']: store.get('store_name', 'Unknown')
+            for store in metadata_db.stores.find({'store_id': {'$in': store_ids}}, {'store_id': 1, 'store_name': 1})
+        } if store_ids else {}
         
         for task in tasks:
-            if '_id' in task:
-                task['_id'] = str(task['_id'])
-            
-            # Fetch store_name from stores collection
-            store_id = task.get('store_id')
-            store = None
-            
-            if store_id:
-                store = metadata_db.stores.find_one({'store_id': store_id})
-                if not store and isinstance(store_id, str) and store_id.isdigit():
-                    store = metadata_db.stores.find_one({'store_id': int(store_id)})
-            
-            task['store_name'] = store.get('store_name', 'Unknown') if store else 'Unknown'
+            task['store_name'] = store_names.get(task.get('store_id'), 'Unknown')
         
-        total = db.crawling_tasks.count_documents(query)
+        total, total_exact = count_total(db.crawling_tasks, query)
         
         return make_response('Tasks retrieved', {
             'tasks': tasks,
             'total': total,
+            'total_exact': total_exact,
             'limit': limit,
-            'skip': skip
+            'skip': skip,
+            'next_cursor': next_cursor
         })
         
+    except CursorError as e:
+        return make_response(str(e), None, 400)
     except Exception as e:
         return make_response(f'Error: {str(e)}', None, 500)
\ No newline at end of file
@@ -0,0 +1,50 @@
+from flask import Blueprint, request, jsonify, Response
+from flask_jwt_extended import jwt_required
+
+from middleware.admin_middleware import admin_required
+from services.rabbitmq_service import get_rabbitmq_service
+from services.rpc_metrics import render_prometheus
+from services.image_preprocessing_service import get_image_preprocessing_service
+from utils.count_cache import count_cache
+
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/rpc', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_rpc_metrics():
+    """
+    RabbitMQ RPC metrics: in-flight requests by type, latency histograms,
+    timeout/expired/reconnect counters and I/O loop lag.
+    ?format=prometheus returns the Prometheus text format.
+    """
+    try:
+        metrics = get_rabbitmq_service().get_rpc_metrics()
+        if request.args.get('format') == 'prometheus':
+            return Response(render_prometheus(metrics), mimetype='text/plain; version=0.0.4')
+        return jsonify(metrics), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@metrics_bp.route('/images', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_image_metrics():
+    """Image preprocessing totals: images processed/skipped, bytes before/after and bytes saved."""
+    try:
+        return jsonify(get_image_preprocessing_service().get_stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@metrics_bp.route('/counts', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_count_cache_metrics():
+    """Pagination count cache: entries, hits and misses."""
+    try:
+        return jsonify(count_cache.stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -2,11 +2,13 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.products_service import get_store_products_data
 from datetime import datetime
+from utils.http_cache import cached_response
 
 products_bp = Blueprint('products', __name__)
 
 @products_bp.route('/store/<store_id>', methods=['GET'])
 @jwt_required()
+@cached_response(collections=['products'], max_age=60, private=True)
 def get_store_products(store_id):
     """API lấy tất cả sản phẩm của cửa hàng theo store_id"""
     try:
@@ -44,6 +46,7 @@ def get_store_products(store_id):
 
 @products_bp.route('/store/<store_id>/categories', methods=['GET'])
 @jwt_required()
+@cached_response(collections=['products'], max_age=60, private=True)
 def get_store_categories(store_id):
     """API lấy danh sách categories có sản phẩm trong store"""
     try:
@@ -64,6 +67,7 @@ def get_store_categories(store_id):
 
 @products_bp.route('/store/<store_id>/stats', methods=['GET'])
 @jwt_required()
+@cached_response(collections=['products'], max_age=60, private=True)
 def get_store_products_stats(store_id):
     """API lấy thống kê sản phẩm của store"""
     try:
@@ -3,6 +3,7 @@ from services.public_service import (
     get_dishes_data, get_dish_categories_data, get_dish_suggestions_data,
     get_ingredients_data, get_ingredient_categories_data, get_ingredient_suggestions_data
 )
+from utils.http_cache import cached_response
 from validators.public_validators import (
     validate_pagination_params, validate_suggestion_params, validate_suggestion_type
 )
@@ -10,6 +11,7 @@ from validators.public_validators import (
 public_bp = Blueprint('public', __name__)
 
 @public_bp.route('/dishes', methods=['GET'])
+@cached_response(collections=['dishes'], max_age=60)
 def get_dishes():
     try:
         page = int(request.args.get('pageNo', 0))
@@ -21,8 +23,9 @@ def get_dishes():
         dish_name = request.args.get('dish', '').strip()
         category = request.args.get('category', '').strip()
         vietnamese_name = request.args.get('vietnamese_name', '').strip()
+        cursor = request.args.get('cursor') or None
         
-        result = get_dishes_data(page, size, pattern, dish_name, category, vietnamese_name)
+        result = get_dishes_data(page, size, pattern, dish_name, category, vietnamese_name, cursor)
         return jsonify(result), 200
         
     except ValueError as ve:
@@ -31,6 +34,7 @@ def get_dishes():
         return jsonify({'message': f'Error retrieving dishes: {str(e)}'}), 500
 
 @public_bp.route('/dishes/categories', methods=['GET'])
+@cached_response(collections=['dishes'], max_age=300)
 def get_dish_categories():
     try:
         result = get_dish_categories_data()
@@ -58,6 +62,7 @@ def get_dish_suggestions():
         return jsonify({'message': f'Error getting suggestions: {str(e)}'}), 500
 
 @public_bp.route('/ingredients', methods=['GET'])
+@cached_response(collections=['ingredients'], max_age=60)
 def get_ingredients():
     try:
         page = int(request.args.get('pageNo', 0))
@@ -71,8 +76,9 @@ def get_ingredients():
         vietnamese_name = request.args.get('vietnamese_name', '').strip()
         category = request.args.get('category', '').strip()
         unit = request.args.get('unit', '').strip()
+        cursor = request.args.get('cursor') or None
         
-        result = get_ingredients_data(page, size, pattern, name, name_en, vietnamese_name, category, unit)
+        result = get_ingredients_data(page, size, pattern, name, name_en, vietnamese_name, category, unit, cursor)
         return jsonify(result), 200
         
     except ValueError as ve:
@@ -82,6 +88,7 @@ def get_ingredients():
             'message': f'Error retrieving ingredients: {str(e)}'}), 500
 
 @public_bp.route('/ingredients/categories', methods=['GET'])
+@cached_response(collections=['ingredients'], max_age=300)
 def get_ingredient_categories():
     try:
         result = get_ingredient_categories_data()
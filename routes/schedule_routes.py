@@ -107,9 +107,8 @@ def get_user_schedules():
             .sort('created_at', -1)
         )
         
-        # Convert datetime objects to ISO strings and ObjectId to string
+        # ISO strings rather than the JSON provider's HTTP dates, as clients of this endpoint expect
         for schedule in schedules:
-            schedule['_id'] = str(schedule['_id'])
             if 'created_at' in schedule:
                 schedule['created_at'] = schedule['created_at'].isoformat() if hasattr(schedule['created_at'], 'isoformat') else schedule['created_at']
             if 'updated_at' in schedule:
@@ -6,6 +6,7 @@ from services.store_service import (
     get_store_suggestions_data,
     get_near_stores_data
 )
+from utils.http_cache import cached_response
 from validators.store_validators import (
     validate_pagination_params,
     validate_suggestion_params,
@@ -15,6 +16,7 @@ from validators.store_validators import (
 store_bp = Blueprint('store', __name__)
 
 @store_bp.route('', methods=['GET'])
+@cached_response(collections=['stores'], max_age=300)
 def get_stores():
     """API lấy danh sách các stores từ metadata_db"""
     try:
@@ -28,8 +30,10 @@ def get_stores():
         store_name = request.args.get('store_name', '').strip() 
         chain = request.args.get('chain', '').strip()
         store_location = request.args.get('store_location', '').strip()
+        # Keyset pagination: cursor = pagination.next_cursor of the previous page
+        cursor = request.args.get('cursor') or None
         
-        result = get_all_stores_data(page, size, pattern, store_name, chain, store_location)
+        result = get_all_stores_data(page, size, pattern, store_name, chain, store_location, cursor)
         return jsonify(result), 200
         
     except ValueError as ve:
@@ -38,6 +42,7 @@ def get_stores():
         return jsonify({'message': f'Error retrieving stores: {str(e)}'}), 500
 
 @store_bp.route('/<store_id>', methods=['GET'])
+@cached_response(collections=['stores'], max_age=300)
 def get_store_detail(store_id):
     """API lấy chi tiết store theo store_id"""
     try:
@@ -0,0 +1,126 @@
+"""
+Benchmark catalog `pattern` search: unanchored case-insensitive regex over the name fields
+(what Mongo does for $regex + $or, a full scan) vs the BM25 inverted index in
+services.search_index_service.
+
+In-process by default (synthetic documents, no database needed); --mongo seeds a temporary
+collection in the primary database and times the real $regex query against find_page.
+
+    python scripts/bench_catalog_search.py --docs 100000
+    python scripts/bench_catalog_search.py --docs 100000 --mongo
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import re
+import statistics
+import time
+
+from services.search_index_service import SEARCH_FIELDS, InvertedIndex
+
+BENCH_COLLECTION = 'bench_catalog_search'
+
+WORDS = [
+    'Thịt', 'bò', 'heo', 'gà', 'vịt', 'cá', 'tôm', 'mực', 'cua', 'rau', 'cải', 'muống', 'xà lách',
+    'hành', 'tỏi', 'ớt', 'gừng', 'sả', 'chanh', 'cà chua', 'khoai tây', 'cà rốt', 'nấm', 'đậu hũ',
+    'trứng', 'sữa', 'bơ', 'phô mai', 'nước mắm', 'đường', 'muối', 'tiêu', 'gạo', 'bún', 'phở',
+    'miến', 'bánh', 'xúc xích', 'giăm bông', 'Úc', 'Mỹ', 'Đà Lạt', 'tươi', 'đông lạnh', 'hữu cơ',
+]
+CATEGORIES = ['Fresh Meat', 'Vegetables', 'Seafood & Fish Balls', 'Seasonings', 'Grains & Staples', 'Yogurt']
+QUERIES = ['thit bo', 'Thịt bò', 'ca chua', 'nam', 'trung ga', 'da lat', 'pho mai', 'xuc xich duc', 'zzz']
+
+
+def make_documents(count, rng):
+    for i in range(count):
+        name = ' '.join(rng.sample(WORDS, rng.randint(2, 4)))
+        yield {
+            'name': name,
+            'vietnamese_name': name.lower(),
+            'name_en': f"item {i}",
+            'category': rng.choice(CATEGORIES),
+            'unit': rng.choice(['kg', 'g', 'hộp', 'gói']),
+        }
+
+
+def regex_scan(documents, pattern):
+    """What an unanchored {'$regex': pattern, '$options': 'i'} $or query has to do: test every document."""
+    regex = re.compile(pattern, re.IGNORECASE)
+    return [doc for doc in documents
+            if any(regex.search(doc.get(field) or '') for field in ('name', 'name_en', 'vietnamese_name'))]
+
+
+def timed(call, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples), max(samples)
+
+
+def run_in_process(args, documents):
+    started = time.perf_counter()
+    index = InvertedIndex(((i, doc) for i, doc in enumerate(documents)), SEARCH_FIELDS['ingredients'])
+    print(f"Index build: {len(index)} documents in {(time.perf_counter() - started) * 1000:.0f}ms\n")
+
+    print(f"{'query':<14} {'regex hits':>10} {'regex ms':>9} {'index hits':>10} {'index p50':>10} {'index max':>10}")
+    for query in QUERIES:
+        regex_hits, regex_ms, _ = timed(lambda: regex_scan(documents, query), max(1, args.repeat // 5))
+        (_, index_hits), index_ms, index_max = timed(lambda: index.top(query, args.page_size), args.repeat)
+        print(f"{query:<14} {len(regex_hits):>10} {regex_ms:>9.1f} {index_hits:>10} {index_ms:>10.2f} {index_max:>10.2f}")
+
+
+def run_mongo(args, documents):
+    from database.mongodb import MongoDBConnection
+    from services.search_index_service import SearchIndexService
+
+    db = MongoDBConnection.get_primary_db()
+    collection = db[BENCH_COLLECTION]
+    collection.drop()
+    collection.insert_many(documents, ordered=False)
+    SEARCH_FIELDS[BENCH_COLLECTION] = SEARCH_FIELDS['ingredients']
+    service = SearchIndexService()
+    try:
+        started = time.perf_counter()
+        service.search_ids(BENCH_COLLECTION, 'warm up')
+        print(f"Index build from Mongo: {(time.perf_counter() - started) * 1000:.0f}ms\n")
+
+        print(f"{'query':<14} {'$regex total':>12} {'$regex ms':>10} {'index total':>11} {'index ms':>9}")
+        for query in QUERIES:
+            regex = {'$regex': re.escape(query), '$options': 'i'}
+            mongo_query = {'$or': [{'name': regex}, {'name_en': regex}, {'vietnamese_name': regex}]}
+
+            def regex_page():
+                page = list(collection.find(mongo_query).skip(0).limit(args.page_size))
+                return page, collection.count_documents(mongo_query)
+
+            (_, regex_total), regex_ms, _ = timed(regex_page, args.repeat)
+            (_, index_total), index_ms, _ = timed(
+                lambda: service.find_page(BENCH_COLLECTION, query, {}, 0, args.page_size), args.repeat)
+            print(f"{query:<14} {regex_total:>12} {regex_ms:>10.1f} {index_total:>11} {index_ms:>9.1f}")
+    finally:
+        collection.drop()
+        SEARCH_FIELDS.pop(BENCH_COLLECTION, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare regex scan vs inverted index catalog search')
+    parser.add_argument('--docs', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--page-size', type=int, default=20, help='Results per page (top-k)')
+    parser.add_argument('--mongo', action='store_true', help='Seed a temporary collection and time real Mongo queries')
+    args = parser.parse_args()
+
+    documents = list(make_documents(args.docs, random.Random(7)))
+    if args.mongo:
+        run_mongo(args, documents)
+    else:
+        run_in_process(args, documents)
+
+
+if __name__ == '__main__':
+    main()
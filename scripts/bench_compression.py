@@ -0,0 +1,161 @@
+"""
+Response compression benchmark on /calculate-shaped responses.
+
+Serves a synthetic store_recommendations payload (stores x ingredients, each matched item with
+5 alternatives) through a Flask app wired like app.py (ORJSONProvider + middleware.compression)
+and reports, per Content-Encoding: bytes on the wire, server time (serialize + compress) and
+estimated end-to-end latency = server time + RTT + bytes / link bandwidth for a few link speeds
+(ngrok/Tailscale links are typically in the 5-50 Mbit/s range). Encodings whose package is not
+installed are skipped.
+
+    python scripts/bench_compression.py --stores 8 --ingredients 15 --iterations 50
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import statistics
+import time
+
+from flask import Flask, jsonify
+
+from middleware import compression
+from utils.json_provider import ORJSONProvider
+
+INGREDIENTS = [
+    ('beef', 'Thịt bò', 'Thịt các loại', 'g'), ('rice noodles', 'Bánh phở', 'Bún, mì, phở', 'g'),
+    ('scallion', 'Hành lá', 'Rau các loại', 'g'), ('ginger', 'Gừng', 'Gia vị', 'g'),
+    ('fish sauce', 'Nước mắm', 'Nước chấm', 'ml'), ('onion', 'Hành tây', 'Rau các loại', 'g'),
+    ('lime', 'Chanh', 'Trái cây', 'quả'), ('chili', 'Ớt', 'Rau các loại', 'g'),
+    ('beef bones', 'Xương bò', 'Thịt các loại', 'g'), ('rock sugar', 'Đường phèn', 'Gia vị', 'g'),
+    ('bean sprouts', 'Giá đỗ', 'Rau các loại', 'g'), ('star anise', 'Hoa hồi', 'Gia vị', 'g'),
+    ('cinnamon', 'Quế', 'Gia vị', 'g'), ('culantro', 'Ngò gai', 'Rau các loại', 'g'),
+    ('pork', 'Thịt heo', 'Thịt các loại', 'g'), ('egg', 'Trứng gà', 'Trứng', 'quả'),
+]
+CHAINS = ['BHX', 'WM', 'COOP', 'LOTTE']
+
+
+def product(rng: random.Random, name: str, category: str, rank: int) -> dict:
+    sku = rng.randint(10 ** 5, 10 ** 7)
+    price = rng.randint(5, 400) * 1000
+    return {
+        'product_name': f"{name} {rng.choice(['tươi', 'loại 1', 'nhập khẩu', 'gói 500g', 'khay 300g'])}",
+        'product_name_en': name,
+        'product_image': f"https://cdn.tgdd.vn/Products/Images/8781/{sku}/bhx/{name.replace(' ', '-')}-{sku}.jpg",
+        'product_sku': str(sku),
+        'product_category': category,
+        'product_unit': rng.choice(['kg', 'gói', 'hộp', 'chai', 'khay']),
+        'product_net_unit_value': rng.choice([100, 200, 300, 500, 1000]),
+        'price_per_unit': price,
+        'original_price': price + rng.choice([0, 0, 5000, 10000]),
+        'discount_percent': rng.choice([0, 0, 5, 10, 15]),
+        'quantity_needed': round(rng.uniform(0.5, 3), 3),
+        'total_price': round(price * rng.uniform(0.5, 3), 2),
+        'match_score': round(rng.random(), 4),
+        'matched_field': name,
+        'product_url': f"https://www.bachhoaxanh.com/{category.replace(' ', '-').lower()}/{name.replace(' ', '-')}-{sku}",
+        'promotion': rng.choice(['', '', 'Mua 2 giảm 10%', 'Tặng kèm 1 gói']),
+        'rank': rank,
+    }
+
+
+def calculate_payload(rng: random.Random, stores: int, ingredients: int) -> dict:
+    recommendations = []
+    for store_index in range(stores):
+        items = []
+        for name, vietnamese_name, category, unit in (INGREDIENTS * 4)[:ingredients]:
+            best = product(rng, name, category, 1)
+            alternatives = [product(rng, name, category, rank) for rank in range(2, 7)]
+            items.append({
+                'ingredient_name': name,
+                'ingredient_vietnamese_name': vietnamese_name,
+                'ingredient_category': category,
+                'ingredient_unit': unit,
+                **best,
+                'available': True,
+                'alternatives_count': len(alternatives),
+                'alternatives': alternatives,
+            })
+        recommendations.append({
+            'store_id': str(rng.randint(1000, 99999)),
+            'store_name': f"{rng.choice(CHAINS)} {rng.randint(1, 300)} Nguyễn Văn Cừ, Quận {store_index + 1}",
+            'store_chain': rng.choice(CHAINS),
+            'store_address': f"{rng.randint(1, 300)} Nguyễn Văn Cừ, Phường {rng.randint(1, 20)}, Quận {store_index + 1}, TP.HCM",
+            'store_phone': f"0{rng.randint(10 ** 8, 10 ** 9 - 1)}",
+            'store_rating': round(rng.uniform(3, 5), 1),
+            'store_reviews_count': rng.randint(0, 2000),
+            'distance_km': round(rng.uniform(0.2, 10), 2),
+            'total_cost': round(sum(item['total_price'] for item in items), 2),
+            'availability_percentage': 100.0,
+            'found_ingredients': len(items),
+            'total_ingredients': len(items),
+            'missing_ingredients': [],
+            'items': items,
+            'overall_score': round(rng.random(), 4),
+            'average_match_score': round(rng.random(), 2),
+        })
+    return {
+        'message': 'Success',
+        'store_recommendations': recommendations,
+        'total_ingredients': ingredients,
+        'calculation_time_ms': 1234.5,
+        'user_location': {'latitude': 10.762622, 'longitude': 106.660172, 'address': 'Quận 5, TP.HCM'},
+    }
+
+
+def build_app(payload: dict) -> Flask:
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    compression.init_compression(app)
+
+    @app.route('/calculate')
+    def calculate():
+        return jsonify(payload), 200
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stores', type=int, default=8)
+    parser.add_argument('--ingredients', type=int, default=15)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--rtt-ms', type=float, default=60.0, help='round trip time added to every estimate')
+    parser.add_argument('--mbps', type=float, nargs='+', default=[5.0, 20.0, 100.0], help='link speeds (Mbit/s)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    payload = calculate_payload(random.Random(args.seed), args.stores, args.ingredients)
+    client = build_app(payload).test_client()
+
+    encodings = ['identity'] + list(reversed(compression.supported_encodings()))
+    header = f"{'encoding':<10}{'bytes':>10}{'ratio':>8}{'server ms':>11}" + ''.join(f"{f'@{mbps:g}Mbit ms':>15}" for mbps in args.mbps)
+    print(f"stores={args.stores} ingredients={args.ingredients} iterations={args.iterations} rtt={args.rtt_ms:g}ms")
+    print(header)
+    print('-' * len(header))
+
+    identity_size = None
+    for encoding in encodings:
+        timings = []
+        size = 0
+        for _ in range(args.iterations):
+            started = time.perf_counter()
+            response = client.get('/calculate', headers={'Accept-Encoding': encoding})
+            timings.append((time.perf_counter() - started) * 1000)
+            size = len(response.data)
+        served = response.headers.get('Content-Encoding', 'identity')
+        if served != encoding:
+            print(f"{encoding:<10} skipped (server answered with {served})")
+            continue
+        identity_size = identity_size or size
+        server_ms = statistics.median(timings)
+        estimates = ''.join(
+            f"{server_ms + args.rtt_ms + size * 8 / (mbps * 1000):>15.1f}" for mbps in args.mbps
+        )
+        print(f"{encoding:<10}{size:>10}{identity_size / size:>8.1f}{server_ms:>11.2f}{estimates}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Throughput benchmark for crawl fan-out publishing.
+
+Compares one-at-a-time `send_async_request` through the I/O thread (no confirms) with
+`send_async_requests` on the confirm publisher pool at several pool sizes.
+
+    # In-process stub broker; --confirm-delay simulates the broker confirm round trip
+    python scripts/bench_confirm_publish.py --broker stub --messages 5000 --confirm-delay 0.0005
+
+    # Local RabbitMQ (uses RABBITMQ_URL; publishes to a bench queue that is purged afterwards)
+    python scripts/bench_confirm_publish.py --broker rabbitmq --messages 20000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+import pika
+
+from bench_rpc_latency import BENCH_QUEUES, StubBroker
+
+
+class ConfirmStubBroker(StubBroker):
+    """Stub broker that only counts crawl requests and sleeps per confirmed publish."""
+
+    def __init__(self, confirm_delay=0.0):
+        super().__init__()
+        self.confirm_delay = confirm_delay
+        self.received = 0
+
+    def connect(self, params=None):
+        connection = super().connect(params)
+        channel_factory = connection.channel
+
+        def channel():
+            stub_channel = channel_factory()
+            publish = stub_channel.basic_publish
+
+            def basic_publish(exchange, routing_key, body, properties=None, mandatory=False):
+                publish(exchange, routing_key, body, properties, mandatory)
+                if stub_channel.confirm_mode and self.confirm_delay:
+                    time.sleep(self.confirm_delay)
+
+            stub_channel.basic_publish = basic_publish
+            return stub_channel
+
+        connection.channel = channel
+        return connection
+
+    def publish(self, routing_key, body, properties):
+        if routing_key == os.getenv('RABBITMQ_CRAWLING_REQUEST_QUEUE'):
+            self.received += 1
+        else:
+            super().publish(routing_key, body, properties)
+
+
+def crawl_requests(count):
+    return [
+        ('crawl_store', {'task_id': f"bench-{i}", 'chain': 'BHX' if i % 2 else 'WM', 'storeId': i, 'concurrency': 2})
+        for i in range(count)
+    ]
+
+
+def wait_drained(service, timeout=120):
+    deadline = time.monotonic() + timeout
+    while not service._publish_queue.empty() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare single vs confirmed batch publishing throughput')
+    parser.add_argument('--broker', choices=['stub', 'rabbitmq'], default='stub')
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--pool-sizes', default='1,4,8')
+    parser.add_argument('--window', type=int, default=200)
+    parser.add_argument('--confirm-delay', type=float, default=0.0005, help='Stub broker confirm round trip (s)')
+    args = parser.parse_args()
+
+    for key, value in BENCH_QUEUES.items():
+        os.environ[key] = value
+
+    if args.broker == 'stub':
+        broker = ConfirmStubBroker(confirm_delay=args.confirm_delay)
+        os.environ.setdefault('RABBITMQ_URL', 'amqp://stub/')
+        pika.BlockingConnection = broker.connect
+
+    from services.rabbitmq_service import RabbitMQService
+    from services.rabbitmq_publisher_pool import ConfirmPublisherPool
+
+    service = RabbitMQService()
+    requests = crawl_requests(args.messages)
+    print(f"Broker: {args.broker}, messages: {args.messages}, window: {args.window}\n")
+
+    started = time.perf_counter()
+    for action, data in requests:
+        service.send_async_request(action, data)
+    wait_drained(service)
+    elapsed = time.perf_counter() - started
+    print(f"{'send_async_request (no confirms)':<40} {args.messages / elapsed:10.0f} msg/s")
+
+    for size in (int(value) for value in args.pool_sizes.split(',')):
+        service._confirm_pool = ConfirmPublisherPool(service.rabbitmq_url, size=size, window=args.window)
+        started = time.perf_counter()
+        results = service.send_async_requests(requests)
+        elapsed = time.perf_counter() - started
+        failed = sum(1 for result in results if not result['success'])
+        print(f"{f'send_async_requests (confirms, {size} ch)':<40} {args.messages / elapsed:10.0f} msg/s  failed={failed}")
+        service._confirm_pool.close()
+
+    if args.broker == 'rabbitmq':
+        service.channel.queue_purge(BENCH_QUEUES['RABBITMQ_CRAWLING_REQUEST_QUEUE'])
+    service._cleanup_connection()
+
+
+if __name__ == '__main__':
+    main()
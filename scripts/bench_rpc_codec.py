@@ -0,0 +1,166 @@
+"""
+Encode/decode benchmark for RabbitMQ RPC body formats.
+
+Compares the legacy `json.dumps(..., ensure_ascii=False)` bodies with the formats in
+utils.rpc_codec (orjson, msgpack, each with and without zstd) on payloads shaped like
+real AI recipe replies and crawl results. Formats whose library is not installed are skipped.
+
+    python scripts/bench_rpc_codec.py --iterations 2000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import random
+import time
+
+from utils import rpc_codec
+
+INGREDIENTS = [
+    ('Thịt bò', 'Thịt các loại'), ('Bánh phở', 'Bún, mì, phở'), ('Hành lá', 'Rau các loại'),
+    ('Gừng', 'Gia vị'), ('Quế', 'Gia vị'), ('Hoa hồi', 'Gia vị'), ('Nước mắm', 'Nước chấm'),
+    ('Hành tây', 'Rau các loại'), ('Ngò gai', 'Rau các loại'), ('Giá đỗ', 'Rau các loại'),
+    ('Chanh', 'Trái cây'), ('Ớt', 'Rau các loại'), ('Xương bò', 'Thịt các loại'), ('Đường phèn', 'Gia vị'),
+]
+
+
+def ai_reply_payload(rng: random.Random) -> dict:
+    """Shaped like a successful analyze_recipe reply: cart, suggestions, similar dishes, insights."""
+    def product(name, category):
+        return {
+            'id': rng.randint(1, 10 ** 6),
+            'name': f"{name} {rng.choice(['tươi', 'loại 1', 'nhập khẩu', 'gói 500g'])}",
+            'category': category,
+            'price': rng.randint(5, 400) * 1000,
+            'sys_price': rng.randint(5, 400) * 1000,
+            'unit': rng.choice(['kg', 'gói', 'hộp', 'chai']),
+            'image': f"https://cdn.example.com/products/{rng.randint(1, 10 ** 6)}.jpg",
+            'store_id': rng.randint(1000, 9999),
+            'score': round(rng.random(), 4),
+        }
+
+    return {
+        'success': True,
+        'result': {
+            'status': 'success',
+            'dish': {'name': 'Phở bò', 'description': 'Món phở truyền thống Hà Nội với nước dùng xương bò ninh kỹ.'},
+            'cart': {
+                'total_items': len(INGREDIENTS),
+                'items': [
+                    {'ingredient': name, 'quantity': f"{rng.randint(1, 5)}00g", 'products': [product(name, cat) for _ in range(3)]}
+                    for name, cat in INGREDIENTS
+                ],
+            },
+            'suggestions': [f"Có thể thay {name.lower()} bằng nguyên liệu tương tự." for name, _ in INGREDIENTS[:8]],
+            'similar_dishes': [
+                {'name': dish, 'similarity': round(rng.random(), 3), 'ingredients': [n for n, _ in rng.sample(INGREDIENTS, 6)]}
+                for dish in ['Phở gà', 'Bún bò Huế', 'Hủ tiếu', 'Bánh canh', 'Mì Quảng']
+            ],
+            'insights': {
+                'estimated_cost': rng.randint(100, 400) * 1000,
+                'cooking_time_minutes': 180,
+                'nutrition': {'calories': 450, 'protein_g': 32, 'fat_g': 12, 'carbs_g': 55},
+                'notes': 'Ninh xương ít nhất 3 giờ để nước dùng trong và ngọt.',
+            },
+            'guardrail': {'triggered': False},
+        },
+    }
+
+
+def crawl_result_payload(rng: random.Random, products: int = 300) -> dict:
+    """Shaped like a crawl response listing products of one store."""
+    return {
+        'correlationId': 'bench-0000',
+        'task_id': 'task-bench',
+        'status': 'completed',
+        'store_id': 1234,
+        'products': [
+            {
+                'sku': f"SKU{rng.randint(10 ** 7, 10 ** 8)}",
+                'name_vi': f"{rng.choice(INGREDIENTS)[0]} {rng.choice(['Vissan', 'CP', 'Meat Deli', 'Ba Huân'])} {rng.randint(100, 999)}g",
+                'category': rng.choice(INGREDIENTS)[1],
+                'price': rng.randint(5, 400) * 1000,
+                'sys_price': rng.randint(5, 400) * 1000,
+                'discount_percent': rng.randint(0, 40),
+                'url': f"https://www.bachhoaxanh.com/san-pham/{rng.randint(1, 10 ** 6)}",
+                'image': f"https://cdn.bhx.vn/images/{rng.randint(1, 10 ** 6)}.jpg",
+                'in_stock': rng.random() > 0.1,
+            }
+            for _ in range(products)
+        ],
+    }
+
+
+def legacy_codec():
+    encode = lambda payload: json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    decode = lambda body: json.loads(body.decode('utf-8'))
+    return encode, decode
+
+
+def rpc_codec_variant(content_type, compression):
+    def encode(payload):
+        body, ctype, cenc = rpc_codec.encode(payload, content_type, compression, compress_threshold=0)
+        return body, ctype, cenc
+
+    return encode
+
+
+def measure(encode, decode, payload, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        body = encode(payload)
+    encode_us = (time.perf_counter() - started) / iterations * 1e6
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        decoded = decode(body)
+    decode_us = (time.perf_counter() - started) / iterations * 1e6
+    return encode_us, decode_us, body, decoded
+
+
+def variants():
+    yield 'json (legacy)', legacy_codec()
+    for content_type, label in ((rpc_codec.CONTENT_TYPE_JSON, 'orjson' if rpc_codec.orjson else 'json compact'),
+                                (rpc_codec.CONTENT_TYPE_MSGPACK, 'msgpack')):
+        if content_type == rpc_codec.CONTENT_TYPE_MSGPACK and not rpc_codec.msgpack:
+            print(f"  (skipping {label}: not installed)")
+            continue
+        for compression in (None, rpc_codec.ENCODING_ZSTD):
+            if compression and not rpc_codec.zstandard:
+                print(f"  (skipping {label}+zstd: zstandard not installed)")
+                continue
+            encode = rpc_codec_variant(content_type, compression)
+            # Bench the full path: headers travel with the body, decode dispatches on them
+            yield (f"{label}+zstd" if compression else label), (
+                lambda payload, encode=encode: encode(payload),
+                lambda encoded: rpc_codec.decode(*encoded),
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare RPC body encodings on realistic payloads')
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    payloads = {'AI recipe reply': ai_reply_payload(rng), 'crawl result (300 products)': crawl_result_payload(rng)}
+
+    for title, payload in payloads.items():
+        print(f"\n{title}")
+        baseline = None
+        for label, (encode, decode) in variants():
+            encode_us, decode_us, body, decoded = measure(encode, decode, payload, args.iterations)
+            size = len(body[0] if isinstance(body, tuple) else body)
+            assert decoded == payload, f"{label} did not round-trip"
+            baseline = baseline or size
+            print(
+                f"  {label:<16} bytes={size:>7} ({size / baseline:5.1%}) "
+                f"encode={encode_us:8.1f}µs decode={decode_us:8.1f}µs"
+            )
+
+
+if __name__ == '__main__':
+    main()
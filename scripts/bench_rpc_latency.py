@@ -0,0 +1,268 @@
+"""
+RPC latency benchmark for RabbitMQService I/O loop modes.
+
+Compares the legacy polling loop (RABBITMQ_IO_MODE=poll) with the event-driven loop
+(RABBITMQ_IO_MODE=event) on crawl `send_request` and AI `send_ai_request` round trips.
+
+    # In-process stub broker (no RabbitMQ needed)
+    python scripts/bench_rpc_latency.py --broker stub
+
+    # Local RabbitMQ (uses RABBITMQ_URL, dedicated bench queues and an echo worker thread)
+    python scripts/bench_rpc_latency.py --broker rabbitmq --requests 500 --concurrency 8
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pika
+
+BENCH_QUEUES = {
+    'RABBITMQ_CRAWLING_REQUEST_QUEUE': 'bench_crawling_requests',
+    'RABBITMQ_CRAWLING_RESPONSE_QUEUE': 'bench_crawling_responses',
+    'AI_QUEUE_NAME': 'bench_ai_requests',
+}
+
+
+# ========== In-process stub broker ==========
+
+class _StubMethod:
+    def __init__(self, queue=None, delivery_tag=None):
+        self.queue = queue
+        self.delivery_tag = delivery_tag
+        self.consumer_count = 1
+        self.message_count = 0
+
+
+class _StubDeclareResult:
+    def __init__(self, queue):
+        self.method = _StubMethod(queue=queue)
+
+
+class StubChannel:
+    def __init__(self, connection):
+        self.connection = connection
+        self.is_closed = False
+        self.is_open = True
+        self.confirm_mode = False
+
+    def basic_qos(self, prefetch_count=0):
+        pass
+
+    def confirm_delivery(self):
+        self.confirm_mode = True
+
+    def queue_declare(self, queue='', passive=False, durable=False, exclusive=False, arguments=None):
+        return _StubDeclareResult(queue or f"amq.gen-{id(self)}")
+
+    def basic_consume(self, queue, on_message_callback, auto_ack=False):
+        self.connection.broker.consumers[queue] = (self, on_message_callback)
+
+    def basic_publish(self, exchange, routing_key, body, properties=None, mandatory=False):
+        self.connection.broker.publish(routing_key, body, properties)
+
+    def basic_ack(self, delivery_tag=None):
+        pass
+
+    def basic_nack(self, delivery_tag=None, requeue=False):
+        pass
+
+    def stop_consuming(self):
+        pass
+
+    def close(self):
+        self.is_closed = True
+        self.is_open = False
+
+
+class StubConnection:
+    """Mimics pika.BlockingConnection: callbacks only run inside process_data_events."""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.is_closed = False
+        self.is_open = True
+        self._ready = deque()
+        self._cond = threading.Condition()
+
+    def channel(self):
+        return StubChannel(self)
+
+    def add_callback_threadsafe(self, callback):
+        with self._cond:
+            self._ready.append(callback)
+            self._cond.notify()
+
+    def process_data_events(self, time_limit=0):
+        deadline = time.monotonic() + time_limit
+        with self._cond:
+            while not self._ready:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            events = list(self._ready)
+            self._ready.clear()
+        for event in events:
+            event()
+
+    def close(self):
+        self.is_closed = True
+        self.is_open = False
+
+
+class StubBroker:
+    """Routes messages between stub channels and answers requests like an echo worker."""
+
+    def __init__(self, worker_delay=0.0):
+        self.worker_delay = worker_delay
+        self.consumers = {}
+        self._delivery_tag = 0
+
+    def connect(self, params=None):
+        return StubConnection(self)
+
+    def publish(self, routing_key, body, properties):
+        if routing_key == os.getenv('RABBITMQ_CRAWLING_REQUEST_QUEUE'):
+            request = json.loads(body)
+            reply = json.dumps({'correlationId': request['correlationId'], 'success': True, 'action': request['action']})
+            self._reply(os.getenv('RABBITMQ_CRAWLING_RESPONSE_QUEUE'), reply.encode('utf-8'), pika.BasicProperties())
+        elif routing_key == os.getenv('AI_QUEUE_NAME'):
+            reply = json.dumps({'success': True, 'result': {'status': 'success', 'dish': {'name': 'bench'}}})
+            self._reply(properties.reply_to, reply.encode('utf-8'),
+                        pika.BasicProperties(correlation_id=properties.correlation_id))
+
+    def _reply(self, queue_name, body, properties):
+        channel, callback = self.consumers[queue_name]
+        self._delivery_tag += 1
+        method = _StubMethod(delivery_tag=self._delivery_tag)
+        deliver = lambda: channel.connection.add_callback_threadsafe(
+            lambda: callback(channel, method, properties, body)
+        )
+        if self.worker_delay:
+            threading.Timer(self.worker_delay, deliver).start()
+        else:
+            deliver()
+
+
+# ========== Local RabbitMQ echo worker ==========
+
+def start_echo_worker(rabbitmq_url, worker_delay=0.0):
+    """Consume bench request queues on a dedicated connection and reply immediately."""
+    ready = threading.Event()
+
+    def run():
+        connection = pika.BlockingConnection(pika.URLParameters(rabbitmq_url))
+        channel = connection.channel()
+        for queue_name in BENCH_QUEUES.values():
+            channel.queue_declare(queue=queue_name, durable=True)
+
+        def on_crawl(ch, method, props, body):
+            request = json.loads(body)
+            time.sleep(worker_delay)
+            reply = json.dumps({'correlationId': request['correlationId'], 'success': True, 'action': request['action']})
+            ch.basic_publish(exchange='', routing_key=BENCH_QUEUES['RABBITMQ_CRAWLING_RESPONSE_QUEUE'], body=reply)
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+
+        def on_ai(ch, method, props, body):
+            time.sleep(worker_delay)
+            reply = json.dumps({'success': True, 'result': {'status': 'success', 'dish': {'name': 'bench'}}})
+            ch.basic_publish(exchange='', routing_key=props.reply_to, body=reply,
+                             properties=pika.BasicProperties(correlation_id=props.correlation_id))
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+
+        channel.basic_consume(queue=BENCH_QUEUES['RABBITMQ_CRAWLING_REQUEST_QUEUE'], on_message_callback=on_crawl)
+        channel.basic_consume(queue=BENCH_QUEUES['AI_QUEUE_NAME'], on_message_callback=on_ai)
+        ready.set()
+        channel.start_consuming()
+
+    threading.Thread(target=run, daemon=True, name='Bench-Echo-Worker').start()
+    ready.wait(10)
+
+
+# ========== Benchmark ==========
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_requests(call, total, concurrency):
+    latencies = []
+    lock = threading.Lock()
+
+    def one(_):
+        started = time.perf_counter()
+        call()
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        for i in range(total):
+            one(i)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(one, range(total)))
+    wall = time.perf_counter() - started
+    return latencies, wall
+
+
+def report(label, latencies, wall):
+    print(
+        f"{label:<28} n={len(latencies):<5} "
+        f"mean={statistics.mean(latencies):7.2f}ms "
+        f"p50={percentile(latencies, 50):7.2f}ms "
+        f"p95={percentile(latencies, 95):7.2f}ms "
+        f"p99={percentile(latencies, 99):7.2f}ms "
+        f"rps={len(latencies) / wall:8.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare RabbitMQ RPC latency for poll vs event I/O loops')
+    parser.add_argument('--broker', choices=['stub', 'rabbitmq'], default='stub')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--worker-delay', type=float, default=0.0, help='Simulated worker processing time (s)')
+    args = parser.parse_args()
+
+    for key, value in BENCH_QUEUES.items():
+        os.environ[key] = value
+    # Measure real round trips, not the recipe result cache
+    os.environ['AI_RESULT_CACHE_TTL'] = '0'
+
+    if args.broker == 'stub':
+        broker = StubBroker(worker_delay=args.worker_delay)
+        os.environ.setdefault('RABBITMQ_URL', 'amqp://stub/')
+        pika.BlockingConnection = broker.connect
+    else:
+        start_echo_worker(os.getenv('RABBITMQ_URL'), args.worker_delay)
+
+    from services.rabbitmq_service import RabbitMQService
+
+    print(f"Broker: {args.broker}, requests: {args.requests}, concurrency: {args.concurrency}\n")
+    for mode in ('poll', 'event'):
+        os.environ['RABBITMQ_IO_MODE'] = mode
+        service = RabbitMQService()
+
+        latencies, wall = run_requests(lambda: service.send_request('ping', timeout=10), args.requests, args.concurrency)
+        report(f"[{mode}] crawl send_request", latencies, wall)
+
+        latencies, wall = run_requests(lambda: service.send_ai_request('bench', timeout=10), args.requests, args.concurrency)
+        report(f"[{mode}] send_ai_request", latencies, wall)
+
+        service._cleanup_connection()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark store product listing: legacy load-everything-then-slice vs paginated get_store_products_data.
+
+Seeds a synthetic store (products spread over the category collections) into the metadata
+database, times both paths on first/middle/last pages and removes the seeded data.
+
+    python scripts/bench_store_products.py --products 20000 --page-size 50
+    # Existing store, no seeding
+    python scripts/bench_store_products.py --store-id 1234 --no-seed
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import re
+import statistics
+import time
+
+from services.products_service import (
+    CATEGORY_COLLECTIONS, metadata_db, get_store_products_data, ensure_product_indexes
+)
+
+BENCH_MARKER = 'bench_store_products'
+
+
+def legacy_get_store_products(store_id, page=0, size=50, search=None):
+    """The previous implementation: find() every collection, sort in Python, slice one page."""
+    store_ids = [store_id, str(store_id)]
+    all_products = []
+    for category_name, collection_name in CATEGORY_COLLECTIONS.items():
+        query = {'store_id': {'$in': store_ids}}
+        if search:
+            search_regex = {'$regex': re.escape(search), '$options': 'i'}
+            query['$or'] = [{'name': search_regex}, {'description': search_regex}]
+        products = list(metadata_db[collection_name].find(query))
+        for product in products:
+            product['category'] = category_name
+            product['_id'] = str(product['_id'])
+        all_products.extend(products)
+    all_products.sort(key=lambda x: (x.get('category', ''), x.get('name', '')))
+    metadata_db.stores.find_one({'store_id': {'$in': store_ids}})
+    return all_products[page * size:page * size + size], len(all_products)
+
+
+def seed(store_id, products, rng):
+    metadata_db.stores.insert_one({'store_id': store_id, 'store_name': 'Bench Store', 'chain': 'BHX', 'bench': BENCH_MARKER})
+    collections = list(CATEGORY_COLLECTIONS.values())
+    batches = {name: [] for name in collections}
+    for i in range(products):
+        batches[rng.choice(collections)].append({
+            'store_id': store_id,
+            'name': f"Sản phẩm {rng.randint(0, 10 ** 6):07d} {i}",
+            'description': rng.choice(['Tươi ngon', 'Nhập khẩu', 'Giá tốt', 'Hàng mới về']),
+            'price': rng.randint(5, 500) * 1000,
+            'bench': BENCH_MARKER,
+        })
+    for name, docs in batches.items():
+        if docs:
+            metadata_db[name].insert_many(docs, ordered=False)
+
+
+def cleanup(store_id):
+    metadata_db.stores.delete_many({'store_id': store_id, 'bench': BENCH_MARKER})
+    for name in CATEGORY_COLLECTIONS.values():
+        metadata_db[name].delete_many({'store_id': store_id, 'bench': BENCH_MARKER})
+
+
+def timed(call, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare legacy vs paginated store product listing')
+    parser.add_argument('--store-id', type=int, default=999_999_001)
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--search', default=None)
+    parser.add_argument('--no-seed', action='store_true')
+    args = parser.parse_args()
+
+    ensure_product_indexes()
+    if not args.no_seed:
+        cleanup(args.store_id)
+        seed(args.store_id, args.products, random.Random(7))
+
+    try:
+        _, total = legacy_get_store_products(args.store_id, 0, args.page_size, args.search)
+        last_page = max(0, (total - 1) // args.page_size)
+        print(f"Store {args.store_id}: {total} products, page size {args.page_size}\n")
+
+        for label, page in (('first', 0), ('middle', last_page // 2), ('last', last_page)):
+            (legacy_page, _), legacy_ms = timed(
+                lambda: legacy_get_store_products(args.store_id, page, args.page_size, args.search), args.repeat)
+            (data, error), paged_ms = timed(
+                lambda: get_store_products_data(args.store_id, page, args.page_size, search=args.search), args.repeat)
+            if error:
+                raise SystemExit(f"get_store_products_data failed: {error}")
+            same = [p['_id'] for p in legacy_page] == [p['_id'] for p in data['products']]
+            print(
+                f"{label:<7} page {page:<5} legacy={legacy_ms:8.1f}ms (docs read {total:>6})  "
+                f"paginated={paged_ms:7.1f}ms (docs read {len(data['products']):>4})  "
+                f"speedup={legacy_ms / paged_ms:5.1f}x  same_page={same}"
+            )
+    finally:
+        if not args.no_seed:
+            cleanup(args.store_id)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""
+Stand-in AI service and crawler for local load tests.
+
+Both consume the same queues as the real services (AI_QUEUE_NAME and
+RABBITMQ_CRAWLING_REQUEST_QUEUE) and answer with the recorded payloads in
+scripts/fixtures, after a configurable latency and with configurable error/drop rates.
+
+    python scripts/fake_workers.py ai --latency-ms 800 --jitter-ms 300 --error-rate 0.05
+    python scripts/fake_workers.py crawler --latency-ms 50 --crawl-seconds 5 --error-rate 0.1
+    python scripts/fake_workers.py all
+
+Replies use the format the requester advertises (utils.rpc_codec accept headers) and
+fall back to plain JSON.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import abc
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime
+
+import pika
+from dotenv import load_dotenv
+
+from utils import rpc_codec
+
+load_dotenv()
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+class FakeWorker(abc.ABC):
+    """One connection, prefetch-many consumer; replies are scheduled with call_later so latency doesn't block."""
+
+    queue_env = None
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.stats = {'received': 0, 'replied': 0, 'errors': 0, 'dropped': 0}
+        self.connection = None
+        self.channel = None
+
+    def delay(self):
+        jitter = self.rng.uniform(-self.args.jitter_ms, self.args.jitter_ms)
+        return max(0.0, self.args.latency_ms + jitter) / 1000
+
+    def roll(self, rate):
+        return self.rng.random() < rate
+
+    def publish(self, routing_key, payload, request_properties, **properties):
+        headers = getattr(request_properties, 'headers', None) or {}
+        content_type = rpc_codec.negotiate(
+            headers.get(rpc_codec.ACCEPT_CONTENT_TYPE_HEADER),
+            rpc_codec.supported_content_types(),
+            rpc_codec.CONTENT_TYPE_JSON,
+        )
+        compression = rpc_codec.negotiate(
+            headers.get(rpc_codec.ACCEPT_CONTENT_ENCODING_HEADER),
+            rpc_codec.supported_encodings(),
+            rpc_codec.ENCODING_IDENTITY,
+        )
+        body, content_type, content_encoding = rpc_codec.encode(payload, content_type, compression)
+        self.channel.basic_publish(
+            exchange='',
+            routing_key=routing_key,
+            body=body,
+            properties=pika.BasicProperties(content_type=content_type, content_encoding=content_encoding, **properties),
+        )
+
+    def on_message(self, ch, method, properties, body):
+        self.stats['received'] += 1
+        try:
+            request = rpc_codec.decode_message(properties, body)
+        except rpc_codec.RPCDecodeError as e:
+            print(f"❌ Undecodable request: {e}")
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            return
+        if self.roll(self.args.drop_rate):
+            # Simulate a worker that dies mid-request: no reply, the caller times out
+            self.stats['dropped'] += 1
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+            return
+        self.handle(ch, method, properties, request)
+
+    @abc.abstractmethod
+    def handle(self, ch, method, properties, request):
+        """Reply to (or ack) one decoded request."""
+
+    def run(self):
+        params = pika.URLParameters(os.getenv('RABBITMQ_URL'))
+        params.heartbeat = 600
+        self.connection = pika.BlockingConnection(params)
+        self.channel = self.connection.channel()
+        self.channel.basic_qos(prefetch_count=self.args.concurrency)
+        queue_name = os.getenv(self.queue_env)
+        self.declare(queue_name)
+        self.channel.basic_consume(queue=queue_name, on_message_callback=self.on_message)
+        print(f"🤖 {type(self).__name__} consuming {queue_name} (latency {self.args.latency_ms}±{self.args.jitter_ms}ms, "
+              f"errors {self.args.error_rate:.0%}, drops {self.args.drop_rate:.0%})")
+        self.channel.start_consuming()
+
+    def declare(self, queue_name):
+        self.channel.queue_declare(queue=queue_name, durable=True)
+
+
+class FakeAIWorker(FakeWorker):
+    queue_env = 'AI_QUEUE_NAME'
+
+    def __init__(self, args):
+        super().__init__(args)
+        self.fixtures = load_fixture('ai_responses.json')
+
+    def declare(self, queue_name):
+        # Same arguments as RabbitMQService, otherwise the declare fails with PRECONDITION_FAILED
+        try:
+            self.channel.queue_declare(queue=queue_name, passive=True)
+        except pika.exceptions.ChannelClosedByBroker:
+            self.channel = self.connection.channel()
+            self.channel.basic_qos(prefetch_count=self.args.concurrency)
+            self.channel.queue_declare(queue=queue_name, durable=True, arguments={'x-message-ttl': 300_000})
+
+    def pick_reply(self, user_input):
+        if self.roll(self.args.error_rate):
+            return self.fixtures[self.rng.choice(['recipe_not_found', 'guardrail_blocked'])]
+        try:
+            is_image = 's3_url' in json.loads(user_input)
+        except (ValueError, TypeError):
+            is_image = False
+        return self.fixtures['image_success' if is_image else 'recipe_success']
+
+    def handle(self, ch, method, properties, request):
+        reply = self.pick_reply(request.get('user_input', ''))
+        if not reply.get('success'):
+            self.stats['errors'] += 1
+
+        def send():
+            self.publish(properties.reply_to, reply, properties, correlation_id=properties.correlation_id)
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+            self.stats['replied'] += 1
+
+        self.connection.call_later(self.delay(), send)
+
+
+class FakeCrawler(FakeWorker):
+    queue_env = 'RABBITMQ_CRAWLING_REQUEST_QUEUE'
+
+    def __init__(self, args):
+        super().__init__(args)
+        self.fixtures = load_fixture('crawl_responses.json')
+        self.response_queue = os.getenv('RABBITMQ_CRAWLING_RESPONSE_QUEUE')
+
+    def reply(self, request, properties, payload):
+        message = {
+            'correlationId': request.get('correlationId'),
+            'timestamp': datetime.utcnow().isoformat(),
+            'action': request.get('action'),
+            **payload,
+        }
+        self.publish(self.response_queue, message, properties, delivery_mode=2)
+
+    def handle(self, ch, method, properties, request):
+        action = request.get('action')
+        if action == 'crawl_store' and request.get('task_id'):
+            self.crawl_store(ch, method, properties, request)
+            return
+
+        payload = self.fixtures['ping'] if action == 'ping' else {'success': False, 'error': f"Unknown action: {action}"}
+
+        def send():
+            self.reply(request, properties, payload)
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+            self.stats['replied'] += 1
+
+        self.connection.call_later(self.delay(), send)
+
+    def crawl_store(self, ch, method, properties, request):
+        """processing after the reply latency, then completed/failed after --crawl-seconds."""
+        task = {'task_id': request['task_id'], 'store_id': request.get('storeId'), 'chain': request.get('chain')}
+        failed = self.roll(self.args.error_rate)
+        if failed:
+            self.stats['errors'] += 1
+
+        def processing():
+            self.reply(request, properties, {**task, **self.fixtures['crawl_store_processing']})
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+            self.connection.call_later(self.args.crawl_seconds, finished)
+
+        def finished():
+            final = self.fixtures['crawl_store_failed' if failed else 'crawl_store_completed']
+            self.reply(request, properties, {**task, **final})
+            self.stats['replied'] += 1
+
+        self.connection.call_later(self.delay(), processing)
+
+
+def report_stats(workers, interval):
+    while True:
+        time.sleep(interval)
+        for worker in workers:
+            print(f"📊 {type(worker).__name__}: {worker.stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run fake AI / crawler workers against RabbitMQ')
+    parser.add_argument('worker', choices=['ai', 'crawler', 'all'])
+    parser.add_argument('--latency-ms', type=float, default=500, help='Mean reply latency')
+    parser.add_argument('--jitter-ms', type=float, default=100, help='Uniform jitter around the mean')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of error replies')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='Fraction of requests never answered')
+    parser.add_argument('--concurrency', type=int, default=100, help='Prefetch: requests handled at once')
+    parser.add_argument('--crawl-seconds', type=float, default=5, help='Time from processing to completed')
+    parser.add_argument('--stats-interval', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    classes = {'ai': [FakeAIWorker], 'crawler': [FakeCrawler], 'all': [FakeAIWorker, FakeCrawler]}[args.worker]
+    workers = [cls(args) for cls in classes]
+    threading.Thread(target=report_stats, args=(workers, args.stats_interval), daemon=True).start()
+
+    threads = [threading.Thread(target=worker.run, daemon=True, name=type(worker).__name__) for worker in workers]
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("👋 Stopping fake workers")
+
+
+if __name__ == '__main__':
+    main()
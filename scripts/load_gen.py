@@ -0,0 +1,167 @@
+"""
+Open-loop load generator for the AI and crawling endpoints.
+
+Issues requests at a fixed target rate (independent of response times, so queueing shows up
+as latency) and reports throughput, p50/p95/p99 latency and error rates. Pair with
+scripts/fake_workers.py to run without the real AI service and crawler.
+
+    python scripts/load_gen.py --scenario ai-recipe --rps 50 --duration 60
+    python scripts/load_gen.py --scenario crawl-ping --rps 200 --duration 30 --token $ADMIN_JWT --metrics
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import itertools
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+PROMPTS = [
+    'Tôi muốn nấu phở bò cho 4 người',
+    'Cách làm bún chả Hà Nội',
+    'Nấu canh chua cá lóc cần gì?',
+    'Thịt kho tàu cho bữa tối',
+    'Gỏi cuốn tôm thịt',
+    'Cơm tấm sườn nướng',
+    'Bánh xèo miền Tây',
+    'Lẩu thái hải sản cho 6 người',
+]
+
+SCENARIOS = {
+    'ai-recipe': ('POST', '/api/v1/ai/recipe-analysis'),
+    'ai-image': ('POST', '/api/v1/ai/image-analysis'),
+    'crawl-ping': ('GET', '/api/v1/crawling/ping'),
+    'crawl-store': ('POST', '/api/v1/crawling/crawl/store'),
+}
+
+
+def build_payload(scenario, n, unique):
+    if scenario == 'ai-recipe':
+        prompt = PROMPTS[n % len(PROMPTS)]
+        # Distinct prompts bypass the AI result cache so every request reaches the worker
+        return {'user_input': f"{prompt} #{n}" if unique else prompt}
+    if scenario == 'ai-image':
+        return {'s3_url': f"https://example-bucket.s3.amazonaws.com/uploads/load-test-{n % 50}.jpg", 'description': 'Món gì đây?'}
+    if scenario == 'crawl-store':
+        return {'storeId': 1000 + n % 200, 'chain': 'BHX' if n % 2 else 'WM'}
+    return None
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.method, path = SCENARIOS[args.scenario]
+        self.url = args.base_url.rstrip('/') + path
+        self.headers = {'Authorization': f"Bearer {args.token}"} if args.token else {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.statuses = Counter()
+        self.skipped = 0
+        self.in_flight = threading.BoundedSemaphore(args.max_in_flight)
+
+    def session(self):
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def one(self, n):
+        payload = build_payload(self.args.scenario, n, self.args.unique)
+        started = time.perf_counter()
+        try:
+            response = self.session().request(self.method, self.url, json=payload, headers=self.headers,
+                                              timeout=self.args.timeout)
+            status = response.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        finally:
+            self.in_flight.release()
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.latencies.append(elapsed)
+            self.statuses[status] += 1
+
+    def run(self):
+        interval = 1 / self.args.rps
+        total = int(self.args.rps * self.args.duration)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.max_in_flight) as executor:
+            for n in itertools.islice(itertools.count(), total):
+                # Sleep until this request's slot in the schedule, never drift behind
+                delay = started + n * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                if not self.in_flight.acquire(blocking=False):
+                    # Client-side limit reached: count it instead of silently slowing the schedule
+                    self.skipped += 1
+                    continue
+                executor.submit(self.one, n)
+        return time.perf_counter() - started
+
+    def report(self, wall):
+        completed = len(self.latencies)
+        errors = sum(count for status, count in self.statuses.items() if not (isinstance(status, int) and status < 400))
+        print(f"\nScenario: {self.args.scenario} → {self.url}")
+        print(f"Target: {self.args.rps} rps for {self.args.duration}s, max in flight {self.args.max_in_flight}")
+        print(f"Completed: {completed}, skipped (client limit): {self.skipped}, wall: {wall:.1f}s")
+        if not completed:
+            return
+        print(f"Throughput: {completed / wall:.1f} rps")
+        print(
+            f"Latency: mean={statistics.mean(self.latencies):.1f}ms p50={percentile(self.latencies, 50):.1f}ms "
+            f"p95={percentile(self.latencies, 95):.1f}ms p99={percentile(self.latencies, 99):.1f}ms "
+            f"max={max(self.latencies):.1f}ms"
+        )
+        print(f"Error rate: {errors / completed:.2%}")
+        print('Status codes: ' + ', '.join(f"{status}={count}" for status, count in sorted(self.statuses.items(), key=str)))
+
+
+def print_rpc_metrics(args):
+    """Show the server-side RPC view (admin token required)."""
+    try:
+        response = requests.get(args.base_url.rstrip('/') + '/api/v1/metrics/rpc',
+                                headers={'Authorization': f"Bearer {args.token}"}, timeout=10)
+        metrics = response.json()
+        print(f"\nServer RPC metrics: in_flight={metrics['in_flight']} counters={metrics['counters']}")
+        for rpc_type, histogram in metrics['latency_ms'].items():
+            print(f"  {rpc_type:<15} n={histogram['count']} p50≤{histogram['p50_ms']}ms p95≤{histogram['p95_ms']}ms "
+                  f"p99≤{histogram['p99_ms']}ms")
+        print(f"  io_loop_lag_max={metrics['io']['io_loop_lag_max_ms']}ms")
+    except Exception as e:
+        print(f"\nCould not read /api/v1/metrics/rpc: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive Flask AI/crawling endpoints at a target RPS')
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--scenario', choices=list(SCENARIOS), default='ai-recipe')
+    parser.add_argument('--rps', type=float, default=20)
+    parser.add_argument('--duration', type=float, default=30, help='Seconds')
+    parser.add_argument('--max-in-flight', type=int, default=500)
+    parser.add_argument('--timeout', type=float, default=120, help='Per-request HTTP timeout (s)')
+    parser.add_argument('--token', default=os.getenv('LOAD_TEST_TOKEN'), help='JWT for protected endpoints')
+    parser.add_argument('--unique', action='store_true', help='Make every AI prompt distinct (bypass the result cache)')
+    parser.add_argument('--metrics', action='store_true', help='Print /api/v1/metrics/rpc afterwards')
+    args = parser.parse_args()
+
+    load_test = LoadTest(args)
+    wall = load_test.run()
+    load_test.report(wall)
+    if args.metrics:
+        print_rpc_metrics(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,9 @@ from models.admin import Admin
 import torch    
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 import unidecode
+from utils import catalog_events
+from services.search_index_service import SEARCH_INDEX_ENABLED, get_search_index_service
+from utils.pagination import CursorError, paginate, count_total
 
 # ===== PERFORMANCE =====
 torch.set_num_threads(4)
@@ -38,6 +41,12 @@ def translate_vi2en(vi_text: str) -> str:
 db = MongoDBConnection.get_primary_db()
 metadata_db = MongoDBConnection.get_metadata_db()
 
+# Mới nhất trước (trước đây $natural -1); _id tăng theo thời gian tạo nên dùng được làm cursor
+NEWEST_FIRST_SORT = [('_id', -1)]
+# admins/users: index (role, created_at, _id)
+CREATED_AT_SORT = [('created_at', -1), ('_id', -1)]
+RANKED_CURSOR_ERROR = 'Cursor pagination is not available for searches (results are ranked by relevance)'
+
 def get_admin_role(email):
     admin_data = db.admins.find_one({'email': email})
     if not admin_data:
@@ -84,6 +93,7 @@ def create_admin_account(admin_data, is_super_admin=False):
 
     admin_dict = admin.to_dict()
     admin_result = db.admins.insert_one(admin_dict)
+    catalog_events.publish('admins')
     admin_info = {
         'id': str(admin_result.inserted_id),
         'email': admin_data['email'],
@@ -103,8 +113,8 @@ def create_dish(dish_data):
         translated = translate_vi2en(vi_name)
         dish_data['dish'] = translated or unidecode.unidecode(vi_name).lower()
 
-    result = db.dishes.insert_one(dish_data)
-    dish_data['_id'] = str(result.inserted_id)
+    db.dishes.insert_one(dish_data)
+    catalog_events.publish('dishes')
     
     return dish_data, None
 
@@ -114,7 +124,6 @@ def get_dish_by_id(dish_id):
         if not dish:
             return None, "Không tìm thấy món ăn"
         
-        dish['_id'] = str(dish['_id'])
         return dish, None
     except Exception as e:
         return None, str(e)
@@ -133,10 +142,10 @@ def update_dish(dish_id, update_data):
 
         if result.matched_count == 0:
             return None, "Không tìm thấy món ăn"
+        catalog_events.publish('dishes')
 
         # Lấy bản ghi dish mới
         updated_dish = db.dishes.find_one({'_id': ObjectId(dish_id)})
-        updated_dish['_id'] = str(updated_dish['_id'])
 
         # Cập nhật trong baskets
         db.baskets.update_many(
@@ -171,36 +180,37 @@ def delete_dish(dish_id):
         
         if result.deleted_count == 0:
             return None, "Không tìm thấy món ăn"
+        catalog_events.publish('dishes')
         
         return {'message': 'Món ăn được xóa thành công', 'dish_id': dish_id}, None
     except Exception as e:
         return None, str(e)
 
-def get_all_dishes(page, size, search_query=None):
+def get_all_dishes(page, size, search_query=None, cursor=None):
     skip = page * size
     
     query = {}
-    if search_query:
-        pattern_regex = {'$regex': search_query, '$options': 'i'}
-        query = {
-            '$or': [
-                {'dish': pattern_regex},
-                {'vietnamese_name': pattern_regex},
-                {'category': pattern_regex}
-            ]
-        }
-    
-    dishes = list(
-        db.dishes
-        .find(query)
-        .sort([('$natural', -1)])
-        .skip(skip)
-        .limit(size)
-    )
-    total = db.dishes.count_documents(query)
-    
-    for dish in dishes:
-        dish['_id'] = str(dish['_id'])
+    if search_query and SEARCH_INDEX_ENABLED:
+        if cursor:
+            raise CursorError(RANKED_CURSOR_ERROR)
+        dishes, total = get_search_index_service().find_page('dishes', search_query, query, skip, size)
+        total_exact = False
+        next_cursor = None
+        has_next = skip + size < total
+    else:
+        if search_query:
+            pattern_regex = {'$regex': search_query, '$options': 'i'}
+            query = {
+                '$or': [
+                    {'dish': pattern_regex},
+                    {'vietnamese_name': pattern_regex},
+                    {'category': pattern_regex}
+                ]
+            }
+        
+        dishes, next_cursor = paginate(db.dishes, query, NEWEST_FIRST_SORT, skip, size, cursor)
+        total, total_exact = count_total(db.dishes, query)
+        has_next = next_cursor is not None
     
     total_pages = (total + size - 1) // size if size > 0 else 0
     
@@ -211,8 +221,10 @@ def get_all_dishes(page, size, search_query=None):
             'pageSize': size,
             'totalPages': total_pages,
             'totalElements': total,
-            'hasNext': page < total_pages - 1,
-            'hasPrevious': page > 0
+            'totalExact': total_exact,
+            'hasNext': has_next,
+            'hasPrevious': page > 0 or bool(cursor),
+            'nextCursor': next_cursor
         }
     }, None
 
@@ -222,8 +234,8 @@ def create_ingredient(ingredient_data):
         vietnamese_name = ingredient_data.get('name', '').strip()
         ingredient_data['name_en'] = translate_vi2en(vietnamese_name) if vietnamese_name else ''
 
-        result = db.ingredients.insert_one(ingredient_data)
-        ingredient_data['_id'] = str(result.inserted_id)
+        db.ingredients.insert_one(ingredient_data)
+        catalog_events.publish('ingredients')
         return ingredient_data, None
     except Exception as e:
         return None, str(e)
@@ -234,7 +246,6 @@ def get_ingredient_by_id(ingredient_id):
         if not ingredient:
             return None, "Ingredient not found"
         
-        ingredient['_id'] = str(ingredient['_id'])
         return ingredient, None
     except Exception as e:
         return None, str(e)
@@ -252,10 +263,10 @@ def update_ingredient(ingredient_id, update_data):
 
         if result.matched_count == 0:
             return None, "Ingredient not found"
+        catalog_events.publish('ingredients')
 
         # Lấy bản ghi ingredient
         updated_ingredient = db.ingredients.find_one({'_id': ObjectId(ingredient_id)})
-        updated_ingredient['_id'] = str(updated_ingredient['_id'])
 
         # Nếu ingredients tồn tại trong baskets, cập nhật luôn
         db.baskets.update_many(
@@ -298,6 +309,8 @@ def delete_ingredient(ingredient_id):
             return None, "Nguyên liệu này đang được sử dụng trong món ăn, không thể xóa"
 
         result = db.ingredients.delete_one({'_id': ingr['_id']})
+        if result.deleted_count:
+            catalog_events.publish('ingredients')
         return (
             {'message': 'Nguyên liệu đã được xóa thành công', 'ingredient_id': ingredient_id},
             None
@@ -306,12 +319,13 @@ def delete_ingredient(ingredient_id):
         return None, str(e)
 
 
-def get_all_ingredients(page, size, search_query=None, category=None):
+def get_all_ingredients(page, size, search_query=None, category=None, cursor=None):
     skip = page * size
 
     # 1. Xây dựng điều kiện tìm kiếm chung
     query_parts = []
-    if search_query:
+    use_search_index = bool(search_query) and SEARCH_INDEX_ENABLED
+    if search_query and not use_search_index:
         pattern = {'$regex': search_query, '$options': 'i'}
         query_parts.append({
             '$or': [
@@ -335,19 +349,18 @@ def get_all_ingredients(page, size, search_query=None, category=None):
     else:
         query = {'$and': query_parts}
 
-    # 4. Truy vấn và phân trang
-    ingredients = list(
-        db.ingredients
-          .find(query)
-          .sort('$natural', -1)
-          .skip(skip)
-          .limit(size)
-    )
-    total = db.ingredients.count_documents(query)
-
-    # 5. Chuyển ObjectId sang string
-    for ing in ingredients:
-        ing['_id'] = str(ing['_id'])
+    # 4. Truy vấn và phân trang (có search_query: inverted index, xếp theo độ liên quan)
+    if use_search_index:
+        if cursor:
+            raise CursorError(RANKED_CURSOR_ERROR)
+        ingredients, total = get_search_index_service().find_page('ingredients', search_query, query, skip, size)
+        total_exact = False
+        next_cursor = None
+        has_next = skip + size < total
+    else:
+        ingredients, next_cursor = paginate(db.ingredients, query, NEWEST_FIRST_SORT, skip, size, cursor)
+        total, total_exact = count_total(db.ingredients, query)
+        has_next = next_cursor is not None
 
     total_pages = (total + size - 1) // size if size > 0 else 0
 
@@ -358,8 +371,10 @@ def get_all_ingredients(page, size, search_query=None, category=None):
             'pageSize':      size,
             'totalPages':    total_pages,
             'totalElements': total,
-            'hasNext':       page < total_pages - 1,
-            'hasPrevious':   page > 0
+            'totalExact':    total_exact,
+            'hasNext':       has_next,
+            'hasPrevious':   page > 0 or bool(cursor),
+            'nextCursor':    next_cursor
         }
     }, None
 
@@ -375,20 +390,14 @@ def get_all_categories():
 
 # =========== CRUD for account admin =============
 # Lấy danh sách admin thường (không bao gồm super_admin)
-def get_all_admins(page=0, size=20, search=None):
-    skip = page * size
+def get_all_admins(page=0, size=20, search=None, cursor=None):
     query = {'role': 'ADMIN'}
     if search:
         regex = {'$regex': search, '$options': 'i'}
         query['$or'] = [{'email': regex}, {'fullname': regex}]
     
-    admins = list(
-        db.admins.find(query)
-        .sort('created_at', -1)
-        .skip(skip)
-        .limit(size)
-    )
-    total = db.admins.count_documents(query)
+    admins, next_cursor = paginate(db.admins, query, CREATED_AT_SORT, page * size, size, cursor)
+    total, total_exact = count_total(db.admins, query)
     total_pages = (total + size - 1) // size if size > 0 else 0
 
     # Chuyển sang dạng public_dict (ẩn mật khẩu)
@@ -403,8 +412,10 @@ def get_all_admins(page=0, size=20, search=None):
             'pageSize': size,
             'totalPages': total_pages,
             'totalElements': total,
-            'hasNext': page < total_pages - 1,
-            'hasPrevious': page > 0
+            'totalExact': total_exact,
+            'hasNext': next_cursor is not None,
+            'hasPrevious': page > 0 or bool(cursor),
+            'nextCursor': next_cursor
         }
     }, None
 
@@ -428,6 +439,7 @@ def update_admin_account(admin_id, update_data):
         result = db.admins.update_one({'_id': ObjectId(admin_id)}, {'$set': set_data})
         if result.matched_count == 0:
             return None, "Không tìm thấy tài khoản admin"
+        catalog_events.publish('admins')
         
         admin = db.admins.find_one({'_id': ObjectId(admin_id)})
         return {
@@ -452,6 +464,7 @@ def toggle_admin_status(admin_id, enable: bool):
     )
     if result.matched_count == 0:
         return None, "Admin not found"
+    catalog_events.publish('admins')
 
     updated = db.admins.find_one({'_id': ObjectId(admin_id)})
     public = Admin.from_dict(updated).to_public_dict()
@@ -459,23 +472,11 @@ def toggle_admin_status(admin_id, enable: bool):
 
 
 # ======= USER MANAGEMENT =======
-def convert_objectid_to_str(data):
-    """Recursively convert all ObjectId instances to strings"""
-    if isinstance(data, ObjectId):
-        return str(data)
-    elif isinstance(data, dict):
-        return {key: convert_objectid_to_str(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [convert_objectid_to_str(item) for item in data]
-    else:
-        return data
-
-def get_all_users(page=0, size=20, search=None):
+def get_all_users(page=0, size=20, search=None, cursor=None):
     """
     Get all users with pagination and search
     Returns users with their detailed information
     """
-    skip = page * size
     query = {'role': 'USER'}
     
     if search:
@@ -485,13 +486,8 @@ def get_all_users(page=0, size=20, search=None):
             {'fullname': regex}
         ]
     
-    users = list(
-        db.users.find(query)
-        .sort('created_at', -1)
-        .skip(skip)
-        .limit(size)
-    )
-    total = db.users.count_documents(query)
+    users, next_cursor = paginate(db.users, query, CREATED_AT_SORT, page * size, size, cursor)
+    total, total_exact = count_total(db.users, query)
     total_pages = (total + size - 1) // size if size > 0 else 0
 
     # Convert to public dict (hide password)
@@ -504,11 +500,12 @@ def get_all_users(page=0, size=20, search=None):
             'email': user_obj.email,
             'fullname': user_obj.fullname,
             'role': user_obj.role,
-            'location': convert_objectid_to_str(user_obj.location),
-            'near_stores': convert_objectid_to_str(user_obj.near_stores),
-            'saved_baskets': convert_objectid_to_str(user_obj.saved_baskets),
-            'favourite_stores': convert_objectid_to_str(user_obj.favourite_stores),
-            'allergies': convert_objectid_to_str(user_obj.allergies),
+            # ObjectIds inside these are encoded by the app JSON provider
+            'location': user_obj.location,
+            'near_stores': user_obj.near_stores,
+            'saved_baskets': user_obj.saved_baskets,
+            'favourite_stores': user_obj.favourite_stores,
+            'allergies': user_obj.allergies,
             'is_enabled': user_obj.is_enabled,
             'created_at': user_obj.created_at,
             'near_stores_updated_at': user_doc.get('near_stores_updated_at'),
@@ -523,8 +520,10 @@ def get_all_users(page=0, size=20, search=None):
             'pageSize': size,
             'totalPages': total_pages,
             'totalElements': total,
-            'hasNext': page < total_pages - 1,
-            'hasPrevious': page > 0
+            'totalExact': total_exact,
+            'hasNext': next_cursor is not None,
+            'hasPrevious': page > 0 or bool(cursor),
+            'nextCursor': next_cursor
         }
     }, None
 
@@ -540,6 +539,7 @@ def toggle_user_status(user_id, enable: bool):
     )
     if result.matched_count == 0:
         return None, "User not found"
+    catalog_events.publish('users')
 
     updated = db.users.find_one({'_id': ObjectId(user_id)})
     from models.user import User
@@ -1,6 +1,7 @@
 
 import logging
 import os
+from datetime import datetime
 from typing import Dict, Any, Optional
 from threading import Lock
 from dotenv import load_dotenv
@@ -12,51 +13,75 @@ logger = logging.getLogger(__name__)
 
 class AIServiceClient:
     
-    def __init__(
-        self,
-        timeout: int = 100
-    ):
+    def __init__(self, timeout: int = 100):
         self.timeout = timeout
-        self.lock = Lock()
         
         # Import here to avoid circular dependency
         from services.rabbitmq_service import get_rabbitmq_service
         self._rabbitmq_service = get_rabbitmq_service()
         
         logger.info(f"AIServiceClient initialized using unified RabbitMQ connection")
-    
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Concurrency and queue-wait metrics for the AI RPC slots. The slots are process-wide
+        (AI_SERVICE_MAX_CONCURRENCY) and shared by sync and async callers.
+        """
+        return self._rabbitmq_service.get_ai_slot_stats()
+
     def analyze_recipe(self, user_input: str) -> Dict[str, Any]:
         """Analyze recipe using AI service"""
-        with self.lock:
-            try:
-                return self._rabbitmq_service.send_ai_request(
-                    user_input=user_input,
-                    timeout=self.timeout
-                )
-                
-            except TimeoutError:
-                logger.error(f"⏱️ Timeout waiting for AI Service response (>{self.timeout}s)")
-                raise
-            except Exception as e:
-                logger.error(f"❌ Error in analyze_recipe: {e}", exc_info=True)
-                raise
+        try:
+            return self._rabbitmq_service.send_ai_request(
+                user_input=user_input,
+                timeout=self.timeout
+            )
+            
+        except TimeoutError:
+            logger.error(f"⏱️ Timeout waiting for AI Service response (>{self.timeout}s)")
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error in analyze_recipe: {e}", exc_info=True)
+            raise
     
     def analyze_image(self, s3_url: str, description: str = "") -> Dict[str, Any]:
         """Analyze image using AI service"""
-        with self.lock:
-            try:
-                return self._rabbitmq_service.send_ai_image_request(
-                    s3_url=s3_url,
-                    description=description,
-                    timeout=self.timeout
-                )
-                
-            except TimeoutError:
-                logger.error(f"Timeout waiting for AI Service image response (>{self.timeout}s)")
-                raise
-            except Exception as e:
-                logger.error(f"❌ Error in analyze_image: {e}", exc_info=True)
-                raise
+        try:
+            return self._rabbitmq_service.send_ai_image_request(
+                s3_url=s3_url,
+                description=description,
+                timeout=self.timeout
+            )
+            
+        except TimeoutError:
+            logger.error(f"Timeout waiting for AI Service image response (>{self.timeout}s)")
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error in analyze_image: {e}", exc_info=True)
+            raise
+    
+    async def analyze_recipe_async(self, user_input: str) -> Dict[str, Any]:
+        """Analyze recipe using AI service from an async view without holding a thread while waiting"""
+        try:
+            return await self._rabbitmq_service.async_send_ai_request(
+                user_input=user_input,
+                timeout=self.timeout
+            )
+        except TimeoutError:
+            logger.error(f"⏱️ Timeout waiting for AI Service response (>{self.timeout}s)")
+            raise
+
+    async def analyze_image_async(self, s3_url: str, description: str = "") -> Dict[str, Any]:
+        """Analyze image using AI service from an async view without holding a thread while waiting"""
+        try:
+            return await self._rabbitmq_service.async_send_ai_image_request(
+                s3_url=s3_url,
+                description=description,
+                timeout=self.timeout
+            )
+        except TimeoutError:
+            logger.error(f"Timeout waiting for AI Service image response (>{self.timeout}s)")
+            raise
     
     def reconnect(self):
         """Reconnect to RabbitMQ (delegated to RabbitMQService)"""
@@ -76,6 +101,14 @@ class AIServiceClient:
             self._rabbitmq_service.channel.is_open
         )
     
+    def get_health(self) -> Dict[str, Any]:
+        """Cached AI queue health (consumers, depth); does not send an RPC to the AI service"""
+        stats = self._rabbitmq_service.get_ai_queue_stats()
+        if stats is None:
+            return {'success': False, 'error': 'AI queue stats not collected yet'}
+        age = (datetime.utcnow() - stats['checked_at']).total_seconds()
+        return {**stats, 'checked_at': stats['checked_at'].isoformat(), 'age_seconds': round(age, 1)}
+    
     def close(self):
         """Close connection (no-op as connection is managed by RabbitMQService)"""
         # Connection is shared and managed by RabbitMQService singleton
@@ -18,7 +18,9 @@ celery_app.conf.update(
     enable_utc=True,
     task_routes={
         'services.async_tasks.async_update_near_stores': {'queue': 'location_updates'},
+        'services.async_tasks.async_recompute_all_near_stores': {'queue': 'location_updates'},
         'services.async_tasks.async_cleanup_expired_tokens': {'queue': 'maintenance'},
+        'services.async_tasks.async_rebuild_store_category_stats': {'queue': 'maintenance'},
     },
     task_acks_late=True,
     worker_prefetch_multiplier=1,
@@ -30,6 +32,14 @@ celery_app.conf.update(
             # 'schedule': crontab(day_of_weke=1, hour=7, minute=30) # Chạy vào thứ 2 lúc 7:30 AM
             'schedule': 60.0,  # chạy mỗi 60 giây (để test)
         },
+        'rebuild-store-category-stats': {
+            'task': 'services.async_tasks.async_rebuild_store_category_stats',
+            'schedule': crontab(hour=3, minute=0),  # Tính lại toàn bộ lúc 3:00 AM mỗi ngày
+        },
+        'recompute-all-near-stores': {
+            'task': 'services.async_tasks.async_recompute_all_near_stores',
+            'schedule': crontab(hour=3, minute=30),  # Sau khi crawl/cập nhật stores trong ngày, 3:30 AM
+        },
     },
 )
 
@@ -66,6 +76,36 @@ def async_update_near_stores(self, user_id, location_data, force_refresh=False):
             'retries': self.request.retries
         }
 
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+def async_recompute_all_near_stores(self, chunk_size=500, resume=True):
+    """Async batch task to recompute near stores for all users after store-catalog changes"""
+    try:
+        # Retries always resume from the last checkpointed chunk
+        result = location_service.recompute_all_near_stores(
+            chunk_size=chunk_size,
+            resume=resume or self.request.retries > 0
+        )
+
+        print(f"CELERY DEBUG: Recomputed near stores for {result['processed']} users ({result['users_per_sec']} users/sec)")
+
+        return {
+            **result,
+            'status': 'completed',
+            'updated_at': datetime.utcnow().isoformat()
+        }
+
+    except Exception as exc:
+        print(f"CELERY DEBUG: Error in async_recompute_all_near_stores: {exc}")
+
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=60 * (self.request.retries + 1), exc=exc)
+
+        return {
+            'status': 'failed',
+            'error': str(exc),
+            'retries': self.request.retries
+        }
+
 @celery_app.task(bind=True, max_retries=2)
 def async_cleanup_expired_tokens(self):
     """Async task to cleanup expired refresh tokens"""
@@ -95,3 +135,31 @@ def async_cleanup_expired_tokens(self):
             'error': str(exc)
         }
 
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+def async_rebuild_store_category_stats(self, store_id=None):
+    """Async task to rebuild store_category_stats for one store (after a crawl) or for all stores"""
+    try:
+        from services.products_service import rebuild_store_category_stats
+
+        result = rebuild_store_category_stats(store_id)
+
+        print(f"CELERY DEBUG: Rebuilt store_category_stats for {result['stores']} stores ({result['rows']} rows)")
+
+        return {
+            **result,
+            'store_id': store_id,
+            'status': 'completed'
+        }
+
+    except Exception as exc:
+        print(f"CELERY DEBUG: Error in async_rebuild_store_category_stats: {exc}")
+
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=60 * (self.request.retries + 1), exc=exc)
+
+        return {
+            'store_id': store_id,
+            'status': 'failed',
+            'error': str(exc)
+        }
@@ -5,6 +5,7 @@ from models.user import User
 from models.basket import Basket
 from validators.auth_validators import validate_password
 from utils.token_utils import create_user_tokens
+from utils import catalog_events
 from models.user import UserValidationError
 
 db = MongoDBConnection.get_primary_db()
@@ -61,6 +62,7 @@ def process_user(user_data, auth_provider='local'):
             
             # Only save User model fields to database
             user_result = db.users.insert_one(user_dict)
+            catalog_events.publish('users')
             
             db.baskets.update_one(
                 {'_id': basket_result.inserted_id},
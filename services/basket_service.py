@@ -10,8 +10,6 @@ def get_user_basket(user_email):
         return None, "User not found"
     
     basket_data = db.baskets.find_one({'_id': ObjectId(user_data['basket_id'])})
-    if basket_data:
-        basket_data['_id'] = str(basket_data['_id'])
     
     return basket_data, None
 
@@ -60,10 +58,7 @@ def save_favorite_basket(user_email, basket_data):
         'updated_at': datetime.utcnow()
     }
     
-    result = db.baskets.insert_one(basket_document)
-    basket_id = str(result.inserted_id)
-    
-    basket_document['_id'] = basket_id
+    db.baskets.insert_one(basket_document)
     
     return basket_document, None
 
@@ -79,9 +74,6 @@ def get_saved_baskets(user_email):
         }
     ).sort('created_at', -1))
     
-    for basket in saved_baskets:
-        basket['_id'] = str(basket['_id'])
-    
     return {
         'saved_baskets': saved_baskets,
         'total_count': len(saved_baskets)
@@ -3,6 +3,7 @@ import numpy as np
 import topsispy as tp
 import re
 from difflib import SequenceMatcher
+from utils.store_ids import canonical_store_id
 
 class CalculateService:
     def __init__(self):
@@ -55,17 +56,12 @@ class CalculateService:
         try:
             collection = self.metadata_db[collection_name]
 
-            # Prepare store IDs in different formats
-            store_ids = [store_id, str(store_id)]
-            try:
-                store_ids.append(int(store_id))
-            except (ValueError, TypeError):
-                pass
+            store_id = canonical_store_id(store_id)
 
             # First, try regex search for broader matches
             search_regex = {'$regex': re.escape(query), '$options': 'i'}
             regex_query = {
-                'store_id': {'$in': store_ids},
+                'store_id': store_id,
                 '$or': [
                     {'name': search_regex},
                     {'name_en': search_regex},
@@ -79,7 +75,7 @@ class CalculateService:
             # If regex doesn't find enough results, get more products for fuzzy matching
             if len(products) < top_k:
                 additional_products = list(collection.find(
-                    {'store_id': {'$in': store_ids}}
+                    {'store_id': store_id}
                 ).limit(100))
 
                 # Merge and deduplicate
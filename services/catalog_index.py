@@ -0,0 +1,82 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from utils import catalog_events
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshingIndexes:
+    """
+    Process-local indexes over catalog collections (one builder per collection).
+    Built on first use, rebuilt in the background every refresh_interval seconds and right
+    after admin writes (utils.catalog_events); readers keep the previous index while a
+    rebuild runs.
+    """
+
+    def __init__(self, builders: Dict[str, Callable[[], Any]], refresh_interval: float = 300, name: str = 'Catalog'):
+        self.builders = builders
+        self.refresh_interval = refresh_interval
+        self.name = name
+        self._indexes: Dict[str, Any] = {}
+        self._built_at: Dict[str, float] = {}
+        self._refreshing = set()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._first_build_lock = threading.Lock()
+        for collection in builders:
+            catalog_events.subscribe(collection, self.invalidate)
+
+    def _build(self, collection: str) -> Any:
+        started = time.perf_counter()
+        index = self.builders[collection]()
+        with self._lock:
+            self._indexes[collection] = index
+            self._built_at[collection] = time.monotonic()
+        logger.info(f"{self.name} index '{collection}' built in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return index
+
+    def _refresh_in_background(self, collection: str) -> None:
+        with self._lock:
+            if collection in self._refreshing:
+                # A write landed during the running build: build once more afterwards
+                self._pending.add(collection)
+                return
+            self._refreshing.add(collection)
+
+        def run():
+            while True:
+                try:
+                    self._build(collection)
+                except Exception as e:
+                    logger.error(f"{self.name} index '{collection}' refresh failed: {e}")
+                with self._lock:
+                    if collection not in self._pending:
+                        self._refreshing.discard(collection)
+                        return
+                    self._pending.discard(collection)
+
+        threading.Thread(target=run, daemon=True, name=f"{self.name}Refresh-{collection}").start()
+
+    def get(self, collection: str) -> Any:
+        index = self._indexes.get(collection)
+        if index is None:
+            # First request builds synchronously; concurrent first requests wait for that build
+            with self._first_build_lock:
+                index = self._indexes.get(collection)
+                if index is None:
+                    index = self._build(collection)
+            return index
+        if time.monotonic() - self._built_at[collection] > self.refresh_interval:
+            self._refresh_in_background(collection)
+        return index
+
+    def invalidate(self, collection: str) -> None:
+        if collection in self._indexes:
+            self._refresh_in_background(collection)
+
+    def warm_up(self) -> None:
+        for collection in self.builders:
+            self._refresh_in_background(collection)
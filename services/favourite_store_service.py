@@ -1,6 +1,7 @@
 from database.mongodb import MongoDBConnection
 from datetime import datetime
 from bson import ObjectId
+from utils.store_ids import canonical_store_id
 
 db = MongoDBConnection.get_primary_db()
 
@@ -11,13 +12,13 @@ def add_favourite_store(user_email, store_data):
         if not user_data:
             return None, "User not found"
         
-        store_id = store_data.get('store_id')
+        store_id = canonical_store_id(store_data.get('store_id'))
         if not store_id:
             return None, "Store ID is required"
         
         # Check if store already in favourites
         favourite_stores = user_data.get('favourite_stores', [])
-        if any(store.get('store_id') == store_id for store in favourite_stores):
+        if any(canonical_store_id(store.get('store_id')) == store_id for store in favourite_stores):
             return None, "Store already in favourites"
         
         # Prepare store data for saving
@@ -53,15 +54,10 @@ def remove_favourite_store(user_email, store_id):
         
         if not store_id:
             return None, "Store ID is required"
-        store_id_variants = [store_id]
-        try:
-            store_id_variants.append(int(store_id))
-        except:
-            pass
         # Remove from favourites
         result = db.users.update_one(
             {'_id': user_data['_id']},
-            {'$pull': {'favourite_stores': {'store_id': {'$in': store_id_variants}}}}
+            {'$pull': {'favourite_stores': {'store_id': canonical_store_id(store_id)}}}
         )
         
         if result.modified_count == 0:
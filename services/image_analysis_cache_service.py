@@ -0,0 +1,105 @@
+import hashlib
+import io
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from database.mongodb import MongoDBConnection
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+
+def compute_content_hash(data: bytes) -> str:
+    """sha256 of the raw bytes (exact match / S3 key); cheap enough for the request thread."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def compute_dhash(data: bytes) -> Optional[str]:
+    """
+    64-bit dHash that survives re-encoding and resizing of the same photo (None without Pillow).
+    Decodes the whole image, so run it off the request thread and only when needed.
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            pixels = list(image.convert('L').resize((9, 8), Image.LANCZOS).getdata())
+    except Exception as e:
+        logger.warning(f"Could not compute perceptual hash: {e}")
+        return None
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    if not 4 <= bin(bits).count('1') <= 60:
+        # Flat/near-uniform images all hash alike; don't let them match each other
+        return None
+    return f"{bits:016x}"
+
+
+class ImageAnalysisCache:
+    """AI image analyses stored by image hash, so re-uploads of the same photo skip the AI worker."""
+
+    def __init__(self):
+        self.db = MongoDBConnection.get_primary_db()
+        self.collection = self.db['image_analyses']
+
+    def get(self, content_hash: str, description: str = '') -> Optional[Dict[str, Any]]:
+        """Cached AI response for an exact byte match."""
+        return self._find({'content_hash': content_hash, 'description': description.strip()})
+
+    def get_similar(self, perceptual_hash: str, description: str = '') -> Optional[Dict[str, Any]]:
+        """Cached AI response for a perceptually identical image."""
+        return self._find({'perceptual_hash': perceptual_hash, 'description': description.strip()})
+
+    def _find(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            cached = self.collection.find_one(query)
+            if cached:
+                self.collection.update_one({'_id': cached['_id']}, {'$inc': {'hits': 1}, '$set': {'last_hit_at': datetime.utcnow()}})
+                return cached['response']
+        except Exception as e:
+            logger.error(f"Image analysis cache lookup failed: {e}")
+        return None
+
+    def store(self, content_hash: str, description: str, s3_key: str, response: Dict[str, Any],
+              perceptual_hash: Optional[str] = None) -> None:
+        """Only successful analyses should be stored; errors and guardrail blocks must be retried."""
+        try:
+            self.collection.update_one(
+                {'content_hash': content_hash, 'description': description.strip()},
+                {
+                    '$set': {'s3_key': s3_key, 'perceptual_hash': perceptual_hash, 'response': response},
+                    '$setOnInsert': {'created_at': datetime.utcnow(), 'hits': 0},
+                },
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to cache image analysis: {e}")
+
+    def invalidate(self, content_hash: str) -> None:
+        try:
+            self.collection.delete_many({'content_hash': content_hash})
+        except Exception as e:
+            logger.error(f"Failed to invalidate image analysis cache: {e}")
+
+
+IMAGE_ANALYSIS_CACHE_ENABLED = os.getenv('IMAGE_ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true'
+
+_image_analysis_cache_instance: Optional[ImageAnalysisCache] = None
+
+
+def get_image_analysis_cache() -> ImageAnalysisCache:
+    global _image_analysis_cache_instance
+
+    if _image_analysis_cache_instance is None:
+        _image_analysis_cache_instance = ImageAnalysisCache()
+        logger.info("Image analysis cache initialized")
+
+    return _image_analysis_cache_instance
@@ -0,0 +1,164 @@
+import io
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = {
+    'webp': ('WEBP', 'image/webp', 'webp'),
+    'jpeg': ('JPEG', 'image/jpeg', 'jpg'),
+}
+# Formats we re-encode; animated/odd formats (gif) are passed through untouched
+CONVERTIBLE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp', 'bmp', 'tiff', 'tif'}
+
+
+class ImagePreprocessingService:
+    """
+    Normalizes uploads before S3/AI: applies EXIF orientation, bounds the longest side,
+    strips metadata and re-encodes as WebP/JPEG. Pillow releases the GIL while decoding,
+    resizing and encoding, so the work runs on a small thread pool.
+    """
+
+    def __init__(self, max_dimension: int = 1600, output_format: str = 'webp', quality: int = 82, workers: int = 2):
+        self.max_dimension = max_dimension
+        self.output_format = output_format if output_format in OUTPUT_FORMATS else 'webp'
+        self.quality = quality
+        self.enabled = Image is not None
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ImagePreprocess')
+        self._stats_lock = threading.Lock()
+        self._stats = {'images': 0, 'skipped': 0, 'original_bytes': 0, 'processed_bytes': 0, 'total_ms': 0.0}
+        if not self.enabled:
+            logger.warning("Pillow not installed: images are uploaded without preprocessing")
+
+    def will_convert(self, filename: str) -> bool:
+        extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+        return self.enabled and extension in CONVERTIBLE_EXTENSIONS
+
+    def output_filename(self, filename: str) -> str:
+        """Filename the processed image will have (known before processing, used for S3 keys)."""
+        if not self.will_convert(filename):
+            return filename
+        stem = filename.rsplit('.', 1)[0] if '.' in filename else filename
+        return f"{stem}.{OUTPUT_FORMATS[self.output_format][2]}"
+
+    def process(self, data: bytes, filename: str, content_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Returns {'data', 'filename', 'content_type', 'original_bytes', 'processed_bytes', 'width', 'height'}.
+        Falls back to the original bytes when the image can't be processed.
+        """
+        started = time.perf_counter()
+        original = {
+            'data': data,
+            'filename': filename,
+            'content_type': content_type,
+            'original_bytes': len(data),
+            'processed_bytes': len(data),
+            'width': None,
+            'height': None,
+        }
+        if not self.will_convert(filename):
+            self._record(original, started, skipped=True)
+            return original
+
+        pil_format, output_content_type, _ = OUTPUT_FORMATS[self.output_format]
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                original_size = image.size
+                oriented = image.getexif().get(0x0112, 1) != 1
+                # JPEG can decode straight at a reduced scale, much cheaper than decode + resize
+                image.draft('RGB', (self.max_dimension, self.max_dimension))
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((self.max_dimension, self.max_dimension), Image.LANCZOS)
+
+                has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+                target_mode = 'RGBA' if pil_format == 'WEBP' and has_alpha else 'RGB'
+                if image.mode != target_mode:
+                    image = image.convert(target_mode)
+
+                save_options = {'quality': self.quality}
+                if pil_format == 'WEBP':
+                    save_options['method'] = 4
+                else:
+                    save_options.update(optimize=True, progressive=True)
+                buffer = io.BytesIO()
+                image.save(buffer, format=pil_format, **save_options)
+                width, height = image.size
+        except Exception as e:
+            logger.warning(f"Image preprocessing failed for {filename}, uploading original: {e}")
+            self._record(original, started, skipped=True)
+            return original
+
+        if buffer.tell() >= len(data) and (width, height) == original_size and not oriented:
+            # Already small and upright: re-encoding would only cost quality
+            self._record(original, started, skipped=True)
+            return original
+
+        processed = {
+            'data': buffer.getvalue(),
+            'filename': self.output_filename(filename),
+            'content_type': output_content_type,
+            'original_bytes': len(data),
+            'processed_bytes': buffer.tell(),
+            'width': width,
+            'height': height,
+        }
+        self._record(processed, started)
+        logger.info(
+            f"Preprocessed {filename}: {processed['original_bytes']} → {processed['processed_bytes']} bytes "
+            f"({width}x{height}, {(time.perf_counter() - started) * 1000:.0f}ms)"
+        )
+        return processed
+
+    def process_async(self, data: bytes, filename: str, content_type: Optional[str] = None):
+        """Submit to the preprocessing pool; returns a concurrent.futures.Future."""
+        return self.submit(self.process, data, filename, content_type)
+
+    def submit(self, fn, *args):
+        """Run other decode-heavy image work (e.g. perceptual hashing) on the preprocessing pool."""
+        return self._executor.submit(fn, *args)
+
+    def _record(self, result: Dict[str, Any], started: float, skipped: bool = False) -> None:
+        with self._stats_lock:
+            self._stats['skipped' if skipped else 'images'] += 1
+            self._stats['original_bytes'] += result['original_bytes']
+            self._stats['processed_bytes'] += result['processed_bytes']
+            self._stats['total_ms'] += (time.perf_counter() - started) * 1000
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        handled = stats['images'] + stats['skipped']
+        stats['saved_bytes'] = stats['original_bytes'] - stats['processed_bytes']
+        stats['saved_ratio'] = round(stats['saved_bytes'] / stats['original_bytes'], 4) if stats['original_bytes'] else 0
+        stats['avg_ms'] = round(stats.pop('total_ms') / handled, 2) if handled else 0
+        stats.update({'enabled': self.enabled, 'max_dimension': self.max_dimension,
+                      'output_format': self.output_format, 'quality': self.quality})
+        return stats
+
+
+_image_preprocessing_service_instance: Optional[ImagePreprocessingService] = None
+
+
+def get_image_preprocessing_service() -> ImagePreprocessingService:
+    global _image_preprocessing_service_instance
+
+    if _image_preprocessing_service_instance is None:
+        _image_preprocessing_service_instance = ImagePreprocessingService(
+            max_dimension=int(os.getenv('IMAGE_MAX_DIMENSION', 1600)),
+            output_format=os.getenv('IMAGE_OUTPUT_FORMAT', 'webp').lower(),
+            quality=int(os.getenv('IMAGE_QUALITY', 82)),
+            workers=int(os.getenv('IMAGE_PREPROCESS_WORKERS', 2)),
+        )
+        logger.info("Image preprocessing service initialized")
+
+    return _image_preprocessing_service_instance
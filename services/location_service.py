@@ -1,10 +1,16 @@
 import requests
 import math
+import time
+import numpy as np
 from datetime import datetime
 from database.mongodb import MongoDBConnection
 from bson import ObjectId
+from pymongo import UpdateOne
 import os
 
+EARTH_RADIUS_KM = 6371
+NEAR_STORES_JOB_ID = 'recompute_near_stores'
+
 class LocationService:
     def __init__(self):
         self.openroute_api_key = os.getenv('OPENROUTE_API_KEY')
@@ -26,8 +32,41 @@ class LocationService:
         a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
         c = 2 * math.asin(math.sqrt(a))
         
-        r = 6371
+        r = EARTH_RADIUS_KM
         return c * r
+
+    def calculate_distance_matrix(self, user_coords, store_coords):
+        """
+        Vectorized Haversine distance between every user and every store.
+        user_coords: (U, 2) array of [latitude, longitude] in degrees
+        store_coords: (S, 2) array of [latitude, longitude] in radians
+        Returns (U, S) array of distances in kilometers
+        """
+        user_rad = np.radians(user_coords)
+        lat1 = user_rad[:, 0:1]
+        lon1 = user_rad[:, 1:2]
+        lat2 = store_coords[:, 0][np.newaxis, :]
+        lon2 = store_coords[:, 1][np.newaxis, :]
+
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    def load_store_coordinates(self):
+        """
+        Load every store with coordinates once for batch distance computation
+        Returns (stores, store_coords) where store_coords is an (S, 2) radians array
+        """
+        stores = []
+        coords = []
+        for store in self.metadata_db.stores.find({'latitude': {'$exists': True}, 'longitude': {'$exists': True}}):
+            try:
+                coords.append((float(store['latitude']), float(store['longitude'])))
+            except (TypeError, ValueError):
+                continue
+            stores.append(store)
+
+        store_coords = np.radians(np.array(coords, dtype=np.float64).reshape(-1, 2))
+        return stores, store_coords
     
     def find_nearby_stores(self, latitude, longitude, radius_km=10, limit=10):
         """
@@ -151,6 +190,146 @@ class LocationService:
             print(f"Error updating near stores for user {user_id}: {e}")
             return []
     
+    def recompute_all_near_stores(self, chunk_size=500, resume=True, radius_km=10, limit=10):
+        """
+        Recompute near_stores for every user with a location after store-catalog changes.
+        Users are paged by _id, distances are computed in one matrix per chunk and written
+        with bulk_write. Progress is checkpointed in job_checkpoints so an interrupted run
+        continues from the last written chunk when resume=True.
+        Route info is not requested from OpenRoute here; existing route_info is kept for
+        stores that are still nearby.
+        """
+        checkpoints = self.db.job_checkpoints
+        checkpoint = checkpoints.find_one({'_id': NEAR_STORES_JOB_ID})
+
+        if resume and checkpoint and checkpoint.get('status') == 'running':
+            last_user_id = checkpoint.get('last_user_id')
+            processed = checkpoint.get('processed', 0)
+            print(f"Resuming near stores recomputation after user {last_user_id} ({processed} users done)")
+        else:
+            last_user_id = None
+            processed = 0
+            checkpoints.update_one(
+                {'_id': NEAR_STORES_JOB_ID},
+                {
+                    '$set': {
+                        'status': 'running',
+                        'last_user_id': None,
+                        'processed': 0,
+                        'started_at': datetime.utcnow()
+                    },
+                    '$unset': {'finished_at': '', 'users_per_sec': ''}
+                },
+                upsert=True
+            )
+
+        stores, store_coords = self.load_store_coordinates()
+        print(f"Recomputing near stores against {len(stores)} stores (chunk size {chunk_size})")
+
+        started = time.monotonic()
+        run_processed = 0
+
+        while True:
+            query = {
+                'location.latitude': {'$exists': True},
+                'location.longitude': {'$exists': True}
+            }
+            if last_user_id is not None:
+                query['_id'] = {'$gt': last_user_id}
+
+            users = list(
+                self.db.users.find(query, {'location': 1, 'near_stores': 1})
+                .sort('_id', 1)
+                .limit(chunk_size)
+            )
+            if not users:
+                break
+
+            operations = self._build_near_stores_updates(users, stores, store_coords, radius_km, limit)
+            if operations:
+                self.db.users.bulk_write(operations, ordered=False)
+
+            last_user_id = users[-1]['_id']
+            processed += len(users)
+            run_processed += len(users)
+
+            checkpoints.update_one(
+                {'_id': NEAR_STORES_JOB_ID},
+                {'$set': {'last_user_id': last_user_id, 'processed': processed, 'updated_at': datetime.utcnow()}}
+            )
+
+            elapsed = time.monotonic() - started
+            print(f"Near stores recomputed for {processed} users ({run_processed / max(elapsed, 1e-6):.1f} users/sec)")
+
+        elapsed = time.monotonic() - started
+        users_per_sec = round(run_processed / elapsed, 2) if elapsed > 0 else 0.0
+
+        checkpoints.update_one(
+            {'_id': NEAR_STORES_JOB_ID},
+            {'$set': {'status': 'completed', 'finished_at': datetime.utcnow(), 'users_per_sec': users_per_sec}}
+        )
+
+        return {
+            'processed': processed,
+            'processed_this_run': run_processed,
+            'stores': len(stores),
+            'elapsed_seconds': round(elapsed, 2),
+            'users_per_sec': users_per_sec
+        }
+
+    def _build_near_stores_updates(self, users, stores, store_coords, radius_km, limit):
+        """Build UpdateOne operations for a chunk of users"""
+        valid_users = []
+        user_coords = []
+        for user in users:
+            location = user.get('location') or {}
+            try:
+                user_coords.append((float(location['latitude']), float(location['longitude'])))
+            except (KeyError, TypeError, ValueError):
+                continue
+            valid_users.append(user)
+
+        if not valid_users:
+            return []
+
+        now = datetime.utcnow()
+        operations = []
+
+        if len(stores) == 0:
+            distances = np.empty((len(valid_users), 0))
+        else:
+            distances = self.calculate_distance_matrix(np.array(user_coords, dtype=np.float64), store_coords)
+
+        for row, user in zip(distances, valid_users):
+            candidates = np.nonzero(row <= radius_km)[0]
+            if len(candidates) > limit:
+                nearest = np.argpartition(row[candidates], limit - 1)[:limit]
+                candidates = candidates[nearest]
+            candidates = candidates[np.argsort(row[candidates], kind='stable')]
+
+            previous_routes = {
+                str(store.get('_id')): store['route_info']
+                for store in user.get('near_stores') or []
+                if store.get('route_info')
+            }
+
+            near_stores = []
+            for index in candidates:
+                store = stores[index].copy()
+                store['distance_km'] = round(float(row[index]), 2)
+                route_info = previous_routes.get(str(store.get('_id')))
+                if route_info:
+                    store['route_info'] = route_info
+                store['updated_at'] = now
+                near_stores.append(store)
+
+            operations.append(UpdateOne(
+                {'_id': user['_id']},
+                {'$set': {'near_stores': near_stores, 'near_stores_updated_at': now}}
+            ))
+
+        return operations
+
     def geocode_address(self, address):
         """
         Convert address to coordinates using OpenRoute Service
@@ -1,6 +1,9 @@
 from database.mongodb import MongoDBConnection
 from bson import ObjectId
+from pymongo import UpdateOne
+from datetime import datetime
 import re
+from utils.store_ids import canonical_store_id
 
 metadata_db = MongoDBConnection.get_metadata_db()
 
@@ -26,17 +29,65 @@ CATEGORY_COLLECTIONS = {
     'Yogurt': 'yogurt'
 }
 
+def _store_products_query(store_id, search=None, min_price=None, max_price=None):
+    query = {'store_id': store_id}
+    if search:
+        search_regex = {'$regex': re.escape(search), '$options': 'i'}
+        query['$or'] = [
+            {'name': search_regex},
+            {'description': search_regex}
+        ]
+    if min_price is not None or max_price is not None:
+        price_query = {}
+        if min_price is not None:
+            price_query['$gte'] = min_price
+        if max_price is not None:
+            price_query['$lte'] = max_price
+        query['price'] = price_query
+    return query
+
+def count_products_by_collection(collection_names, query):
+    """Đếm sản phẩm của nhiều collection trong một aggregation ($unionWith), trả về {collection: count}"""
+    def branch(name):
+        return [{'$match': query}, {'$group': {'_id': name, 'count': {'$sum': 1}}}]
+
+    pipeline = branch(collection_names[0]) + [
+        {'$unionWith': {'coll': name, 'pipeline': branch(name)}} for name in collection_names[1:]
+    ]
+    return {doc['_id']: doc['count'] for doc in metadata_db[collection_names[0]].aggregate(pipeline)}
+
+def ensure_product_indexes():
+    """
+    Index compound theo store_id (kiểu canonical, xem database/migrate_store_ids.py) trên stores và mọi category collection:
+    (store_id, name, _id) cho phân trang theo tên, (store_id, price) cho lọc giá, (store_id, category)
+    """
+    metadata_db.stores.create_index('store_id')
+    for collection_name in CATEGORY_COLLECTIONS.values():
+        metadata_db[collection_name].create_index([('store_id', 1), ('name', 1), ('_id', 1)])
+        metadata_db[collection_name].create_index([('store_id', 1), ('price', 1)])
+        metadata_db[collection_name].create_index([('store_id', 1), ('category', 1)])
+    ensure_store_category_stats_indexes()
+
+def canonicalize_store_documents(store_id):
+    """
+    Đổi store_id dạng chuỗi số (crawler ghi sau migration) của một store về kiểu canonical
+    trong stores và mọi category collection, để các truy vấn khớp chính xác vẫn thấy sản phẩm.
+    """
+    store_id = canonical_store_id(store_id)
+    if not isinstance(store_id, int):
+        return 0
+    query = {'store_id': str(store_id)}
+    update = {'$set': {'store_id': store_id}}
+    changed = metadata_db.stores.update_many(query, update).modified_count
+    for collection_name in CATEGORY_COLLECTIONS.values():
+        changed += metadata_db[collection_name].update_many(query, update).modified_count
+    return changed
+
 def get_store_products_data(store_id, page=0, size=50, category=None, search=None, min_price=None, max_price=None):
-    """Lấy tất cả sản phẩm của store từ các collection categories"""
+    """Lấy một trang sản phẩm của store từ các collection categories (sắp xếp theo category rồi tên)"""
     try:
-        store_ids = [store_id, str(store_id)]
-        try:
-            store_ids.append(int(store_id))
-        except ValueError:
-            pass
-
+        store_id = canonical_store_id(store_id)
         skip = page * size
-        all_products = []
         
         # Determine which collections to search
         collections_to_search = CATEGORY_COLLECTIONS.copy()
@@ -49,65 +100,53 @@ def get_store_products_data(store_id, page=0, size=50, category=None, search=Non
             else:
                 return {'products': [], 'total': 0, 'message': 'Category not found'}, None
         
-        # Search in each collection
-        for category_name, collection_name in collections_to_search.items():
-            try:
-                collection = metadata_db[collection_name]
-                
-                # Build query
-                query = {'store_id': {'$in': store_ids}}
-                
-                # Add search filter
-                if search:
-                    search_regex = {'$regex': re.escape(search), '$options': 'i'}
-                    query['$or'] = [
-                        {'name': search_regex},
-                        {'description': search_regex}
-                    ]
-                
-                # Add price filter
-                if min_price is not None or max_price is not None:
-                    price_query = {}
-                    if min_price is not None:
-                        price_query['$gte'] = min_price
-                    if max_price is not None:
-                        price_query['$lte'] = max_price
-                    query['price'] = price_query
-                
-                # Get products from this collection
-                products = list(collection.find(query))
-                
-                # Add category info to each product
-                for product in products:
-                    product['category'] = category_name
-                    product['_id'] = str(product['_id'])
-                    # Ensure price is numeric
-                    if 'price' in product:
-                        try:
-                            product['price'] = float(product['price'])
-                        except (ValueError, TypeError):
-                            product['price'] = 0.0
-                
-                all_products.extend(products)
-                
-            except Exception as e:
-                print(f"Error searching in {collection_name}: {e}")
-                continue
-        
-        # Sort by category then by name
-        all_products.sort(key=lambda x: (x.get('category', ''), x.get('name', '')))
-        
-        # Apply pagination
-        total = len(all_products)
-        paginated_products = all_products[skip:skip + size]
-        
         # Get store info
-        store_info = metadata_db.stores.find_one({'store_id': {'$in': store_ids}})
+        store_info = metadata_db.stores.find_one({'store_id': store_id})
         if not store_info:
             return None, "Store not found"
         
         store_name = store_info.get('store_name', '')
         
+        query = _store_products_query(store_id, search, min_price, max_price)
+        
+        # Category is fixed per collection, so the global (category, name) order is the
+        # collections in category order, each sorted by name: per-collection counts locate
+        # the page and only the collections it overlaps are read, with skip/limit
+        ordered_collections = sorted(collections_to_search.items())
+        counts = count_products_by_collection([name for _, name in ordered_collections], query)
+        total = sum(counts.values())
+        
+        paginated_products = []
+        remaining_skip = skip
+        for category_name, collection_name in ordered_collections:
+            remaining = size - len(paginated_products)
+            if remaining <= 0:
+                break
+            count = counts.get(collection_name, 0)
+            if remaining_skip >= count:
+                remaining_skip -= count
+                continue
+            
+            products = list(
+                metadata_db[collection_name].find(query)
+                .sort([('name', 1), ('_id', 1)])
+                .skip(remaining_skip)
+                .limit(remaining)
+            )
+            remaining_skip = 0
+            
+            # Add category info to each product
+            for product in products:
+                product['category'] = category_name
+                # Ensure price is numeric
+                if 'price' in product:
+                    try:
+                        product['price'] = float(product['price'])
+                    except (ValueError, TypeError):
+                        product['price'] = 0.0
+            
+            paginated_products.extend(products)
+        
         return {
             'products': paginated_products,
             'store_name': store_name,
@@ -131,35 +170,111 @@ def get_store_products_data(store_id, page=0, size=50, category=None, search=Non
     except Exception as e:
         return None, str(e)
 
+def _category_stats_pipeline(match):
+    """count + min/max/sum giá (> 0) theo store"""
+    price = {'$convert': {'input': '$price', 'to': 'double', 'onError': None, 'onNull': None}}
+    positive_price = {'$cond': [{'$gt': ['$_price', 0]}, '$_price', None]}
+    return [
+        {'$match': match},
+        {'$project': {'store_id': 1, '_price': price}},
+        {'$group': {
+            '_id': '$store_id',
+            'product_count': {'$sum': 1},
+            'priced_count': {'$sum': {'$cond': [{'$gt': ['$_price', 0]}, 1, 0]}},
+            'price_sum': {'$sum': positive_price},
+            'min_price': {'$min': positive_price},
+            'max_price': {'$max': positive_price},
+        }},
+    ]
+
+def _category_stats_update(store_id, category_name, collection_name, stats, now):
+    priced_count = stats.get('priced_count', 0)
+    return UpdateOne(
+        {'_id': f"{store_id}:{collection_name}"},
+        {'$set': {
+            'store_id': store_id,
+            'category': category_name,
+            'collection': collection_name,
+            'product_count': stats.get('product_count', 0),
+            'priced_count': priced_count,
+            'price_sum': stats.get('price_sum') or 0,
+            'min_price': stats.get('min_price') or 0,
+            'max_price': stats.get('max_price') or 0,
+            'avg_price': round(stats['price_sum'] / priced_count, 2) if priced_count else 0,
+            'updated_at': now,
+        }},
+        upsert=True
+    )
+
+def rebuild_store_category_stats(store_id=None):
+    """
+    Tính lại store_category_stats (số sản phẩm, min/max/avg giá theo store × category).
+    Có store_id: chỉ store đó (sau mỗi lần crawl), ghi đủ mọi category kể cả 0 sản phẩm;
+    store không có sản phẩm nào thì không tạo row mới, chỉ đặt các row đã có về 0.
+    Không có store_id: toàn bộ, các cặp store × category không còn sản phẩm được đặt về 0.
+    """
+    now = datetime.utcnow()
+    if store_id is not None:
+        store_id = canonical_store_id(store_id)
+    match = {'store_id': store_id} if store_id is not None else {}
+    store_ids = set()
+    operations = []
+
+    found_by_category = {
+        collection_name: {doc['_id']: doc for doc in metadata_db[collection_name].aggregate(_category_stats_pipeline(match))}
+        for collection_name in CATEGORY_COLLECTIONS.values()
+    }
+    if store_id is not None and not any(found_by_category.values()):
+        # Không persist row 0 cho store_id lạ / store chưa có sản phẩm
+        metadata_db.store_category_stats.update_many(
+            {'store_id': store_id},
+            {'$set': {'product_count': 0, 'priced_count': 0, 'price_sum': 0, 'min_price': 0,
+                      'max_price': 0, 'avg_price': 0, 'updated_at': now}}
+        )
+        return {'stores': 0, 'rows': 0, 'rebuilt_at': now.isoformat()}
+
+    for category_name, collection_name in CATEGORY_COLLECTIONS.items():
+        found = found_by_category[collection_name]
+        if store_id is not None:
+            found.setdefault(store_id, {})
+        for found_store_id, stats in found.items():
+            store_ids.add(found_store_id)
+            operations.append(_category_stats_update(found_store_id, category_name, collection_name, stats, now))
+
+    if operations:
+        metadata_db.store_category_stats.bulk_write(operations, ordered=False)
+    if store_id is None:
+        metadata_db.store_category_stats.update_many(
+            {'updated_at': {'$lt': now}},
+            {'$set': {'product_count': 0, 'priced_count': 0, 'price_sum': 0, 'min_price': 0,
+                      'max_price': 0, 'avg_price': 0, 'updated_at': now}}
+        )
+    return {'stores': len(store_ids), 'rows': len(operations), 'rebuilt_at': now.isoformat()}
+
+def ensure_store_category_stats_indexes():
+    metadata_db.store_category_stats.create_index([('store_id', 1), ('product_count', -1)])
+
+def _get_store_category_stats(store_id):
+    """Đọc store_category_stats của store; tính lần đầu nếu store chưa được materialize"""
+    store_id = canonical_store_id(store_id)
+    query = {'store_id': store_id}
+    rows = list(metadata_db.store_category_stats.find(query).sort('product_count', -1))
+    if not rows:
+        rebuild_store_category_stats(store_id)
+        rows = list(metadata_db.store_category_stats.find(query).sort('product_count', -1))
+    return [row for row in rows if row['product_count'] > 0]
+
 def get_store_categories_data(store_id):
-    """Lấy danh sách categories có sản phẩm trong store"""
+    """Lấy danh sách categories có sản phẩm trong store (từ store_category_stats)"""
     try:
-        store_ids = [store_id, str(store_id)]
-        try:
-            store_ids.append(int(store_id))
-        except ValueError:
-            pass
-            
-        categories_with_count = []
-        
-        for category_name, collection_name in CATEGORY_COLLECTIONS.items():
-            try:
-                collection = metadata_db[collection_name]
-                count = collection.count_documents({'store_id': {'$in': store_ids}})
-                
-                if count > 0:
-                    categories_with_count.append({
-                        'category': category_name,
-                        'collection': collection_name,
-                        'product_count': count
-                    })
-                    
-            except Exception as e:
-                print(f"Error counting in {collection_name}: {e}")
-                continue
-        
-        # Sort by product count descending
-        categories_with_count.sort(key=lambda x: x['product_count'], reverse=True)
+        if not metadata_db.stores.find_one({'store_id': canonical_store_id(store_id)}, {'_id': 1}):
+            return None, "Store not found"
+
+        categories_with_count = [{
+            'category': row['category'],
+            'collection': row['collection'],
+            'product_count': row['product_count']
+        } for row in _get_store_category_stats(store_id)]
         
         total_categories = len(categories_with_count)
         total_products = sum(cat['product_count'] for cat in categories_with_count)
@@ -175,33 +290,10 @@ def get_store_categories_data(store_id):
         return None, str(e)
 
 def get_store_stats_data(store_id):
-    """Lấy thống kê chi tiết sản phẩm của store"""
+    """Lấy thống kê chi tiết sản phẩm của store (từ store_category_stats)"""
     try:
-        # Tạo danh sách các variant của store_id để tìm kiếm
-        store_ids = [str(store_id)]
-        
-        # Thêm variant số nguyên nếu có thể
-        try:
-            numeric_store_id = int(str(store_id))
-            store_ids.append(numeric_store_id)
-        except ValueError:
-            pass
-        
-        # Thêm variant float nếu chuỗi chứa số thập phân
-        try:
-            float_store_id = float(str(store_id))
-            if float_store_id.is_integer():
-                store_ids.append(int(float_store_id))
-            else:
-                store_ids.append(float_store_id)
-        except ValueError:
-            pass
-        
-        # Loại bỏ duplicate và giữ thứ tự
-        store_ids = list(dict.fromkeys(store_ids))
-                    
         # Get store info
-        store_info = metadata_db.stores.find_one({'store_id': {'$in': store_ids}})
+        store_info = metadata_db.stores.find_one({'store_id': canonical_store_id(store_id)})
         if not store_info:
             return None, "Không tìm thấy cửa hàng"
         
@@ -217,43 +309,30 @@ def get_store_stats_data(store_id):
             'total_products': 0
         }
         
-        all_prices = []
-        store_id = store_info.get('store_id')
-        for category_name, collection_name in CATEGORY_COLLECTIONS.items():
-            try:
-                collection = metadata_db[collection_name]
-                products = list(collection.find({'store_id': {'$in': store_ids}}))
-                if products:
-                    # Extract prices for this category
-                    category_prices = []
-                    for product in products:
-                        try:
-                            price = float(product.get('price', 0))
-                            if price > 0:
-                                category_prices.append(price)
-                                all_prices.append(price)
-                        except (ValueError, TypeError):
-                            continue
-                    stats['categories'].append({
-                        'category': category_name,
-                        'product_count': len(products),     
-                        'price_stats': {
-                            'min_price': min(category_prices) if category_prices else 0,
-                            'max_price': max(category_prices) if category_prices else 0,
-                            'avg_price': round(sum(category_prices) / len(category_prices), 2) if category_prices else 0
-                        }
-                    })
-                    
-            except Exception as e:
-                print(f"Error processing {collection_name}: {e}")
-                continue
+        rows = _get_store_category_stats(store_info.get('store_id'))
+        # Giữ thứ tự category như trước (theo CATEGORY_COLLECTIONS)
+        category_order = {name: index for index, name in enumerate(CATEGORY_COLLECTIONS)}
+        rows.sort(key=lambda row: category_order.get(row['category'], len(category_order)))
+        
+        for row in rows:
+            stats['categories'].append({
+                'category': row['category'],
+                'product_count': row['product_count'],
+                'price_stats': {
+                    'min_price': row['min_price'],
+                    'max_price': row['max_price'],
+                    'avg_price': row['avg_price']
+                }
+            })
         
         # Overall price statistics
-        if all_prices:
+        priced_rows = [row for row in rows if row['priced_count']]
+        if priced_rows:
+            priced_count = sum(row['priced_count'] for row in priced_rows)
             stats['price_range'] = {
-                'min_price': min(all_prices),
-                'max_price': max(all_prices),
-                'avg_price': round(sum(all_prices) / len(all_prices), 2)
+                'min_price': min(row['min_price'] for row in priced_rows),
+                'max_price': max(row['max_price'] for row in priced_rows),
+                'avg_price': round(sum(row['price_sum'] for row in priced_rows) / priced_count, 2)
             }
         
         stats['total_products'] = sum(cat['product_count'] for cat in stats['categories'])
@@ -263,5 +342,3 @@ def get_store_stats_data(store_id):
         
     except Exception as e:
         return None, str(e)
-
-    
\ No newline at end of file
@@ -1,13 +1,22 @@
 from database.mongodb import MongoDBConnection
+from services.suggestion_service import get_suggestion_service
+from services.search_index_service import SEARCH_INDEX_ENABLED, get_search_index_service
+from utils.pagination import CursorError, paginate, count_total
 
 db = MongoDBConnection.get_primary_db()
 
-def get_dishes_data(page, size, pattern, dish_name, category, vietnamese_name):
+DISH_LIST_SORT = [('_id', 1)]
+INGREDIENT_LIST_SORT = [('name', 1), ('vietnamese_name', 1), ('_id', 1)]
+RANKED_CURSOR_ERROR = 'Cursor pagination is not available for pattern searches (results are ranked by relevance)'
+
+def get_dishes_data(page, size, pattern, dish_name, category, vietnamese_name, cursor=None):
     skip = page * size
     
     query_conditions = []
+    # pattern: inverted index (không phân biệt dấu, xếp theo BM25) thay cho $regex quét cả collection
+    use_search_index = bool(pattern) and SEARCH_INDEX_ENABLED
     
-    if pattern:
+    if pattern and not use_search_index:
         pattern_regex = {'$regex': pattern, '$options': 'i'}
         query_conditions.append({
             '$or': [
@@ -39,20 +48,21 @@ def get_dishes_data(page, size, pattern, dish_name, category, vietnamese_name):
     else:
         query = {}
     
-    dishes = list(db.dishes.find(query).skip(skip).limit(size))
-    total = db.dishes.count_documents(query)
-    
-    for dish in dishes:
-        dish['_id'] = str(dish['_id'])
-        
-        if 'ingredients' in dish and isinstance(dish['ingredients'], list):
-            for ingredient in dish['ingredients']:
-                if '_id' in ingredient and hasattr(ingredient['_id'], 'inserted_id'):
-                    ingredient['_id'] = str(ingredient['_id'])
+    if use_search_index:
+        if cursor:
+            raise CursorError(RANKED_CURSOR_ERROR)
+        dishes, total = get_search_index_service().find_page('dishes', pattern, query, skip, size)
+        # Index có thể chậm hơn DB tối đa một chu kỳ refresh
+        total_exact = False
+        next_cursor = None
+        has_next = skip + size < total
+    else:
+        dishes, next_cursor = paginate(db.dishes, query, DISH_LIST_SORT, skip, size, cursor)
+        total, total_exact = count_total(db.dishes, query)
+        has_next = next_cursor is not None
     
     total_pages = (total + size - 1) // size if size > 0 else 0
-    has_next = page < total_pages - 1
-    has_prev = page > 0
+    has_prev = page > 0 or bool(cursor)
     
     return {
         'dishes': dishes,
@@ -62,8 +72,10 @@ def get_dishes_data(page, size, pattern, dish_name, category, vietnamese_name):
             'pageSize': size,
             'totalPages': total_pages,
             'totalElements': total,
+            'totalExact': total_exact,
             'hasNext': has_next,
-            'hasPrevious': has_prev
+            'hasPrevious': has_prev,
+            'nextCursor': next_cursor
         },
         'filters': {
             'pattern': pattern,
@@ -83,49 +95,19 @@ def get_dish_categories_data():
     }
 
 def get_dish_suggestions_data(query, limit):
-    regex_pattern = {'$regex': f'^{query}', '$options': 'i'}
-    
-    suggestions = []
-    
-    dish_matches = db.dishes.find(
-        {'dish': regex_pattern},
-        {'dish': 1, 'vietnamese_name': 1, '_id': 0}
-    ).limit(limit)
-    
-    for match in dish_matches:
-        suggestions.append({
-            'text': match['dish'],
-            'vietnamese_text': match.get('vietnamese_name', ''),
-            'type': 'dish_name'
-        })
-    
-    if len(suggestions) < limit:
-        vietnamese_matches = db.dishes.find(
-            {
-                'vietnamese_name': regex_pattern,
-                'dish': {'$not': regex_pattern}
-            },
-            {'dish': 1, 'vietnamese_name': 1, '_id': 0}
-        ).limit(limit - len(suggestions))
-        
-        for match in vietnamese_matches:
-            suggestions.append({
-                'text': match.get('vietnamese_name', ''),
-                'vietnamese_text': match['dish'],
-                'type': 'vietnamese_name'
-            })
-    
+    """Gợi ý món ăn theo tiền tố (không phân biệt dấu), từ prefix index trong bộ nhớ"""
     return {
-        'suggestions': suggestions[:limit],
+        'suggestions': get_suggestion_service().dish_suggestions(query, limit),
         'query': query
     }
 
-def get_ingredients_data(page, size, pattern, name, name_en, vietnamese_name, category, unit):
+def get_ingredients_data(page, size, pattern, name, name_en, vietnamese_name, category, unit, cursor=None):
     skip = page * size
     
     query_conditions = []
+    use_search_index = bool(pattern) and SEARCH_INDEX_ENABLED
     
-    if pattern:
+    if pattern and not use_search_index:
         pattern_regex = {'$regex': pattern, '$options': 'i'}
         query_conditions.append({
             '$or': [
@@ -168,23 +150,25 @@ def get_ingredients_data(page, size, pattern, name, name_en, vietnamese_name, ca
     else:
         query = {}
     
-    ingredients = list(
-        db.ingredients.find(query)
-        .sort([('name', 1), ('vietnamese_name', 1)])
-        .skip(skip)
-        .limit(size)
-    )
-    total = db.ingredients.count_documents(query)
+    if use_search_index:
+        if cursor:
+            raise CursorError(RANKED_CURSOR_ERROR)
+        # Có pattern: sắp xếp theo độ liên quan thay vì theo tên
+        ingredients, total = get_search_index_service().find_page('ingredients', pattern, query, skip, size)
+        total_exact = False
+        next_cursor = None
+        has_next = skip + size < total
+    else:
+        ingredients, next_cursor = paginate(db.ingredients, query, INGREDIENT_LIST_SORT, skip, size, cursor)
+        total, total_exact = count_total(db.ingredients, query)
+        has_next = next_cursor is not None
     
     for ingredient in ingredients:
-        ingredient['_id'] = str(ingredient['_id'])
-        
         if 'token_ngrams' in ingredient and not isinstance(ingredient['token_ngrams'], list):
             ingredient['token_ngrams'] = []
     
     total_pages = (total + size - 1) // size if size > 0 else 0
-    has_next = page < total_pages - 1
-    has_prev = page > 0
+    has_prev = page > 0 or bool(cursor)
     
     return {
         'ingredients': ingredients,
@@ -194,8 +178,10 @@ def get_ingredients_data(page, size, pattern, name, name_en, vietnamese_name, ca
             'pageSize': size,
             'totalPages': total_pages,
             'totalElements': total,
+            'totalExact': total_exact,
             'hasNext': has_next,
-            'hasPrevious': has_prev
+            'hasPrevious': has_prev,
+            'nextCursor': next_cursor
         },
         'filters': {
             'pattern': pattern,
@@ -218,70 +204,9 @@ def get_ingredient_categories_data():
     }
 
 def get_ingredient_suggestions_data(query, limit, suggestion_type):
-    regex_pattern = {'$regex': f'^{query}', '$options': 'i'}
-    contains_pattern = {'$regex': query, '$options': 'i'}
-    
-    suggestions = []
-    
-    if suggestion_type in ['all', 'name']:
-        name_matches = db.ingredients.find(
-            {'name': regex_pattern},
-            {'name': 1, 'vietnamese_name': 1, 'category': 1, '_id': 0}
-        ).limit(limit // 2)
-        
-        for match in name_matches:
-            suggestions.append({
-                'text': match['name'],
-                'vietnamese_text': match.get('vietnamese_name', ''),
-                'category': match.get('category', ''),
-                'type': 'name',
-                'priority': 1
-            })
-    
-    if suggestion_type in ['all', 'vietnamese']:
-        remaining_limit = limit - len(suggestions)
-        if remaining_limit > 0:
-            vietnamese_matches = db.ingredients.find(
-                {
-                    'vietnamese_name': regex_pattern,
-                    'name': {'$not': regex_pattern}
-                },
-                {'name': 1, 'vietnamese_name': 1, 'category': 1, '_id': 0}
-            ).limit(remaining_limit)
-            
-            for match in vietnamese_matches:
-                suggestions.append({
-                    'text': match.get('vietnamese_name', ''),
-                    'vietnamese_text': match['name'],
-                    'category': match.get('category', ''),
-                    'type': 'vietnamese_name',
-                    'priority': 2
-                })
-    
-    if suggestion_type in ['all', 'category']:
-        remaining_limit = limit - len(suggestions)
-        if remaining_limit > 0:
-            category_matches = db.ingredients.find(
-                {'category': contains_pattern},
-                {'category': 1, '_id': 0}
-            ).limit(remaining_limit)
-            
-            categories = list(set([match['category'] for match in category_matches if match.get('category')]))
-            
-            for category in categories[:remaining_limit]:
-                if category.lower().startswith(query.lower()):
-                    suggestions.append({
-                        'text': category,
-                        'vietnamese_text': '',
-                        'category': category,
-                        'type': 'category',
-                        'priority': 3
-                    })
-    
-    suggestions.sort(key=lambda x: (x['priority'], x['text'].lower()))
-    
+    """Gợi ý nguyên liệu theo tiền tố (không phân biệt dấu), từ prefix index trong bộ nhớ"""
     return {
-        'suggestions': suggestions[:limit],
+        'suggestions': get_suggestion_service().ingredient_suggestions(query, limit, suggestion_type),
         'query': query,
         'type': suggestion_type
     }
\ No newline at end of file
@@ -0,0 +1,126 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pika
+
+
+class ConfirmPublisherPool:
+    """
+    Dedicated connections with publisher-confirm channels for bulk publishing.
+    Each worker thread owns one connection/channel (pika is not thread-safe), a batch is
+    split into windows spread across the workers, and every message gets its own
+    ack/nack/return outcome. Connections open lazily on first use.
+    """
+
+    def __init__(self, rabbitmq_url: str, size: int = 4, window: int = 200) -> None:
+        self.rabbitmq_url = rabbitmq_url
+        self.size = max(1, size)
+        self.window = max(1, window)
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='RabbitMQ-Confirm-Publisher')
+        self._local = threading.local()
+        self._connections: list = []
+        self._connections_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._published = 0
+        self._failed = 0
+        self._reconnects = 0
+
+    def _channel(self):
+        """Confirm-mode channel owned by the calling worker thread, reconnecting if it was closed."""
+        channel = getattr(self._local, 'channel', None)
+        if channel is not None and channel.is_open:
+            return channel
+
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            self._close_connection(connection)
+            with self._stats_lock:
+                self._reconnects += 1
+
+        params = pika.URLParameters(self.rabbitmq_url)
+        params.heartbeat = 600
+        connection = pika.BlockingConnection(params)
+        channel = connection.channel()
+        channel.confirm_delivery()
+        self._local.connection = connection
+        self._local.channel = channel
+        with self._connections_lock:
+            self._connections.append(connection)
+        return channel
+
+    def _close_connection(self, connection) -> None:
+        with self._connections_lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        try:
+            if connection.is_open:
+                connection.close()
+        except Exception:
+            pass
+
+    def _publish_one(self, message: dict) -> str | None:
+        """Publish one message and wait for its confirm. Returns an error string, or None on ack."""
+        for attempt in range(2):
+            try:
+                self._channel().basic_publish(
+                    exchange='',
+                    routing_key=message['routing_key'],
+                    body=message['body'],
+                    properties=message['properties'],
+                    mandatory=True,
+                )
+                return None
+            except pika.exceptions.UnroutableError:
+                return 'unroutable: returned by broker'
+            except pika.exceptions.NackError:
+                return 'nacked by broker'
+            except (pika.exceptions.AMQPError, OSError) as e:
+                # Connection/channel dropped: the next attempt reconnects. The message may have
+                # reached the broker before the drop, so a retry can duplicate it (at-least-once)
+                self._local.channel = None
+                if attempt:
+                    return f"{type(e).__name__}: {e}"
+        return 'publish failed'
+
+    def _publish_window(self, messages: list[dict]) -> list[str | None]:
+        errors = [self._publish_one(message) for message in messages]
+        failed = sum(1 for error in errors if error)
+        with self._stats_lock:
+            self._published += len(errors) - failed
+            self._failed += failed
+        return errors
+
+    def publish_batch(self, messages: list[dict]) -> list[str | None]:
+        """
+        Publish messages ({'routing_key', 'body', 'properties'}) with confirms.
+        Returns one entry per message, in order: None when confirmed, else the error.
+        """
+        windows = [messages[i:i + self.window] for i in range(0, len(messages), self.window)]
+        results: list[str | None] = []
+        for errors in self._executor.map(self._publish_window, windows):
+            results.extend(errors)
+        return results
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                'channels': self.size,
+                'window': self.window,
+                'open_connections': len(self._connections),
+                'published': self._published,
+                'failed': self._failed,
+                'reconnects': self._reconnects,
+            }
+
+    def close(self) -> None:
+        """Close every pooled connection. Pooled connections belong to the worker threads,
+        so this is only safe once no batch is in flight (shutdown)."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                if connection.is_open:
+                    connection.close()
+            except Exception:
+                pass
+        self._executor.shutdown(wait=False)
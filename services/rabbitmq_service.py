@@ -1,10 +1,22 @@
 
 import pika
+import asyncio
+import copy
 import json
 import uuid
 import threading
 import time
 import os
+import re
+import unicodedata
+from cachetools import TTLCache
+from pymongo import UpdateOne
+from utils.keyed_executor import KeyedBatchExecutor
+from services.rabbitmq_publisher_pool import ConfirmPublisherPool
+from services.rpc_metrics import RPCMetrics
+from utils import rpc_codec
+from utils import catalog_events
+from utils.store_ids import canonical_store_id
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import logging
@@ -23,6 +35,8 @@ class RabbitMQService:
         'completed': set(),
         'failed': set(),
     }
+    # Transitions allowed from a status that is not listed above
+    DEFAULT_TRANSITIONS = {'processing', 'failed'}
 
     def __init__(self) -> None:
         self.connection: pika.BlockingConnection | None = None
@@ -35,9 +49,36 @@ class RabbitMQService:
         self._lock = threading.Lock()  # Thread safety
         self._response_queue_obj = deque()  # Safe deque operations
 
+        # RPC latency histograms and timeout/expiry/reconnect counters (see get_rpc_metrics)
+        self.metrics = RPCMetrics()
+        self._connect_count = 0
+
+        # Task status writes run off the I/O thread: one lane per task_id hash keeps per-task order,
+        # and each lane writes whatever has queued up with a single bulk_write
+        self.status_batch_size = int(os.getenv('RABBITMQ_STATUS_BATCH_SIZE', 100))
+        self._status_executor = KeyedBatchExecutor(
+            self._write_status_events,
+            workers=int(os.getenv('RABBITMQ_STATUS_WORKERS', 4)),
+            max_queue_size=int(os.getenv('RABBITMQ_STATUS_QUEUE_SIZE', 1000)),
+            max_batch_size=self.status_batch_size,
+            name='RabbitMQ-Status-Writer',
+        )
+
+        # I/O loop lag: delay between scheduling a threadsafe callback and the I/O thread running it
+        self._io_loop_lag = 0.0
+        self._io_loop_lag_max = 0.0
+
         # Queue for publish jobs - thread-safe communication
         self._publish_queue: queue.Queue = queue.Queue()
 
+        # Confirm-mode publisher pool for send_async_requests, created on first batch
+        self._confirm_pool: ConfirmPublisherPool | None = None
+        self._confirm_pool_lock = threading.Lock()
+
+        # I/O loop mode: 'event' wakes the I/O thread via add_callback_threadsafe on every publish,
+        # 'poll' keeps the legacy process_data_events + sleep polling (used for benchmarking)
+        self.io_mode = os.getenv('RABBITMQ_IO_MODE', 'event').lower()
+
         # Config - Unified RabbitMQ connection
         self.rabbitmq_url = os.getenv('RABBITMQ_URL')
         print(self.rabbitmq_url)
@@ -51,10 +92,40 @@ class RabbitMQService:
         self.ai_callback_queue: str | None = None
         self.ai_callback_queues: dict[str, str] = {}
 
+        # Request body format; replies are decoded from their own content_type/content_encoding
+        self.rpc_content_type = os.getenv('RABBITMQ_RPC_CONTENT_TYPE', rpc_codec.CONTENT_TYPE_JSON).lower()
+        self.rpc_compression = os.getenv('RABBITMQ_RPC_COMPRESSION', 'none').lower()
+        self.rpc_compress_threshold = int(os.getenv('RABBITMQ_RPC_COMPRESS_THRESHOLD', 4096))
+
+        # Recipe analysis result cache and single-flight map, keyed by normalized user_input
+        ai_cache_ttl = int(os.getenv('AI_RESULT_CACHE_TTL', 600))
+        self._ai_result_cache: TTLCache | None = (
+            TTLCache(maxsize=int(os.getenv('AI_RESULT_CACHE_SIZE', 512)), ttl=ai_cache_ttl)
+            if ai_cache_ttl > 0 else None
+        )
+        self._ai_cache_lock = threading.Lock()
+
+        # Every AI RPC (sync or async caller) runs as a coroutine on one process-wide event loop:
+        # the single-flight map and the concurrency semaphore live there, so they bound the whole process
+        self.ai_max_concurrency = max(1, int(os.getenv('AI_SERVICE_MAX_CONCURRENCY', 8)))
+        self._ai_loop: asyncio.AbstractEventLoop | None = None
+        self._ai_loop_lock = threading.Lock()
+        self._ai_slots: asyncio.Semaphore | None = None
+        self._ai_flights: dict[str, asyncio.Future] = {}
+        self._ai_slot_stats = {'in_flight': 0, 'waiting': 0, 'total_requests': 0,
+                               'total_queue_wait': 0.0, 'max_queue_wait': 0.0, 'last_queue_wait': 0.0}
+
         # Health check
         self._last_heartbeat = datetime.now()
+
+        # AI queue stats (consumer count, depth) refreshed in the background for the health endpoint
+        self.ai_health_refresh_interval = int(os.getenv('AI_HEALTH_REFRESH_SECONDS', 15))
+        self._ai_queue_stats: dict | None = None
+
         self._setup_connection()
         self._start_health_monitor()
+        self._start_ai_health_probe()
+        self._start_io_lag_probe()
 
     def _setup_connection(self) -> None:
         """Setup RabbitMQ connection with retry logic and queue declarations."""
@@ -69,9 +140,14 @@ class RabbitMQService:
                 params.retry_delay = 2
 
                 self.connection = pika.BlockingConnection(params)
+                self._connect_count += 1
+                if self._connect_count > 1:
+                    self.metrics.increment('reconnects')
                 self.channel = self.connection.channel()
                 self.ai_channel = self.connection.channel()
-                self.channel.basic_qos(prefetch_count=1)
+                # Prefetch several crawl responses so status bursts can be written in one bulk_write;
+                # status messages are acked after the write, so this also caps the unwritten backlog
+                self.channel.basic_qos(prefetch_count=int(os.getenv('RABBITMQ_CRAWLING_PREFETCH', 50)))
 
                 # Declare queues for Crawling Service
                 self.channel.queue_declare(queue=self.crawling_request_queue, durable=True)
@@ -130,24 +206,23 @@ class RabbitMQService:
 
     def _io_loop(self) -> None:
         """Single I/O thread that handles all RabbitMQ communication."""
+        event_driven = self.io_mode != 'poll'
         while self._is_consuming:
             try:
                 if not self.connection or self.connection.is_closed:
                     print("⚠️ Connection lost, attempting reconnect...")
                     time.sleep(5)
                     continue
-                # 1. Process incoming messages (consumers)
-                self.connection.process_data_events(time_limit=0.1)
+                # 1. Process incoming messages (consumers). In event mode publishes wake this call
+                # through add_callback_threadsafe, so it can block for longer without adding latency.
+                self.connection.process_data_events(time_limit=1 if event_driven else 0.1)
                 self._last_heartbeat = datetime.now()
-                # 2. Process outgoing publish jobs from queue
-                try:
-                    while True:
-                        job = self._publish_queue.get_nowait()
-                        self._execute_publish_job(job)
-                except queue.Empty:
-                    pass
-                # Small sleep to avoid busy loop
-                time.sleep(0.01)
+                # 2. Process outgoing publish jobs still in the queue (poll mode, or jobs queued
+                # while the connection could not accept a threadsafe callback)
+                self._drain_publish_queue()
+                if not event_driven:
+                    # Small sleep to avoid busy loop
+                    time.sleep(0.01)
             except pika.exceptions.AMQPConnectionError as e:
                 print(f"❌ AMQP Connection error: {e}")
                 time.sleep(5)
@@ -155,6 +230,29 @@ class RabbitMQService:
                 print(f"❌ I/O loop error: {e}")
                 time.sleep(1)
 
+    def _submit_publish_job(self, job: dict) -> None:
+        """Queue a publish job and wake the I/O thread so it goes out immediately."""
+        self._publish_queue.put(job)
+        if self.io_mode == 'poll':
+            return
+        connection = self.connection
+        if connection is None or connection.is_closed:
+            return
+        try:
+            connection.add_callback_threadsafe(self._drain_publish_queue)
+        except Exception as e:
+            # The job stays queued and is drained on the next I/O loop pass
+            print(f"⚠️ Could not wake I/O thread for publish: {e}")
+
+    def _drain_publish_queue(self) -> None:
+        """Publish every queued job (called only by I/O thread)."""
+        try:
+            while True:
+                job = self._publish_queue.get_nowait()
+                self._execute_publish_job(job)
+        except queue.Empty:
+            pass
+
     def _execute_publish_job(self, job: dict) -> None:
         """Execute a publish job (called only by I/O thread)."""
         try:
@@ -177,30 +275,40 @@ class RabbitMQService:
                     properties=properties,
                 )
                 print(f"🔄 AI request published: {correlation_id} → reply_to: {self.ai_callback_queue}")
+            elif job_type == 'ai_queue_stats':
+                # Passive declare on a throwaway channel: a failure closes that channel, not ai_channel
+                stats_channel = self.connection.channel()
+                try:
+                    declared = stats_channel.queue_declare(queue=self.ai_request_queue, passive=True)
+                    self._resolve_future(job['correlation_id'], {
+                        'success': True,
+                        'consumer_count': declared.method.consumer_count,
+                        'message_count': declared.method.message_count,
+                    })
+                finally:
+                    if stats_channel.is_open:
+                        stats_channel.close()
         except Exception as e:
             print(f"❌ Error executing publish job: {e}")
+            self.metrics.increment('publish_errors', job.get('type', 'unknown'))
             if 'correlation_id' in job:
-                correlation_id = job['correlation_id']
-                with self._lock:
-                    if correlation_id in self.response_futures:
-                        future = self.response_futures.pop(correlation_id)
-                        future['result'] = {'success': False, 'error': str(e)}
-                        future['event'].set()
+                self._resolve_future(job['correlation_id'], {'success': False, 'error': str(e)})
 
     def _handle_crawling_response(self, ch, method, properties, body) -> None:
         try:
-            response = json.loads(body)
-
-            if response.get("task_id") and response.get("status"):
-                self.handle_status_event(response)
+            response = rpc_codec.decode_message(properties, body)
 
             correlation_id = response.get('correlationId')
             if correlation_id:
-                with self._lock:
-                    if correlation_id in self.response_futures:
-                        future = self.response_futures.pop(correlation_id)
-                        future['result'] = response
-                        future['event'].set()
+                self._resolve_future(correlation_id, response)
+
+            # DB side effects are handed to the status writers, which ack once the update is written,
+            # so the channel prefetch bounds how many status events can wait on Mongo
+            if response.get("task_id") and response.get("status"):
+                delivery = (self.connection, ch, method.delivery_tag)
+                if not self._status_executor.submit(response['task_id'], (response, delivery)):
+                    ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+                return
 
             ch.basic_ack(delivery_tag=method.delivery_tag)
 
@@ -209,46 +317,132 @@ class RabbitMQService:
             ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
 
 
+    @staticmethod
+    def _crawling_tasks():
+        from database.mongodb import MongoDBConnection
+        return MongoDBConnection.get_primary_db().crawling_tasks
+
+    def _build_status_update(self, event: dict) -> tuple[dict, dict] | None:
+        """Build a conditional update that only matches tasks whose current status may move to the new one."""
+        task_id = event.get('task_id')
+        new_status: str | None = event.get('status')
+        if not task_id or not new_status:
+            print(f"⚠️ Missing task_id or status in event: {event}")
+            return None
+        predecessors = [status for status, allowed in self.ALLOWED_TRANSITIONS.items() if new_status in allowed]
+        status_filter: list[dict] = [{'status': {'$in': predecessors}}]
+        if new_status in self.DEFAULT_TRANSITIONS:
+            # Unknown or missing status (missing is treated as 'queued')
+            status_filter.append({'status': {'$nin': list(self.ALLOWED_TRANSITIONS)}})
+        update_data: dict = {
+            'status': new_status,
+            'updated_at': datetime.utcnow(),
+        }
+        if 'result' in event and event['result']:
+            update_data['result'] = event['result']
+        if 'error' in event and event['error']:
+            update_data['error'] = event['error']
+        return {'task_id': task_id, '$or': status_filter}, {'$set': update_data}
+
     def handle_status_event(self, event: dict) -> None:
-        """Handle task status update events with state transition guard."""
+        """Handle task status update events with a server-side state transition guard."""
         try:
-            from database.mongodb import MongoDBConnection
-            db = MongoDBConnection.get_primary_db()
-            task_id = event.get('task_id')
-            new_status: str | None = event.get('status')
-            if not task_id or not new_status:
-                print(f"⚠️ Missing task_id or status in event: {event}")
-                return
-            # Fetch current status from DB to validate transition
-            task = db.crawling_tasks.find_one({'task_id': task_id}, {'status': 1})
-            if not task:
-                print(f"⚠️ Task {task_id} not found for status update")
+            update = self._build_status_update(event)
+            if update is None:
                 return
-            current_status: str = task.get('status', 'queued')
-            # If status is unchanged, ignore to avoid redundant writes
-            if current_status == new_status:
-                return
-            allowed = self.ALLOWED_TRANSITIONS.get(current_status, {'processing', 'failed'})
-            if new_status not in allowed:
-                print(f"⚠️ Ignoring invalid transition {current_status} → {new_status} for task {task_id}")
-                return
-            # Build update payload
-            update_data: dict = {
-                'status': new_status,
-                'updated_at': datetime.utcnow(),
-            }
-            if 'result' in event and event['result']:
-                update_data['result'] = event['result']
-            if 'error' in event and event['error']:
-                update_data['error'] = event['error']
-            result = db.crawling_tasks.update_one({'task_id': task_id}, {'$set': update_data})
-            if result.matched_count > 0:
-                print(f"✅ Task {task_id} status updated to {new_status}")
+            result = self._crawling_tasks().update_one(*update)
+            if result.modified_count > 0:
+                print(f"✅ Task {event['task_id']} status updated to {event['status']}")
             else:
-                print(f"⚠️ Task {task_id} not found during update")
+                print(f"⚠️ Ignoring status {event['status']} for task {event['task_id']} (not found, unchanged or invalid transition)")
         except Exception as e:
             print(f"❌ Failed to handle status event: {e}")
 
+    def _write_status_events(self, batch: list[tuple[dict, tuple]]) -> None:
+        """
+        Write a batch of (event, delivery) in order so per-task transitions apply in sequence
+        (status writer thread), then ack the messages. Every delivery is settled whatever happens:
+        events that cannot be turned into an update are dropped (nack, no requeue), and a failed
+        write requeues the rest.
+        """
+        events: list[dict] = []
+        deliveries: list[tuple] = []
+        dropped: set[int] = set()
+        operations = []
+        try:
+            for event, delivery in batch:
+                try:
+                    update = self._build_status_update(event)
+                except Exception as e:
+                    print(f"❌ Dropping malformed status event {event!r}: {e}")
+                    self._settle_deliveries([delivery], outcome='drop')
+                    dropped.add(id(delivery))
+                    continue
+                events.append(event)
+                deliveries.append(delivery)
+                if update is not None:
+                    operations.append(UpdateOne(*update))
+            if operations:
+                result = self._crawling_tasks().bulk_write(operations, ordered=True)
+                skipped = len(operations) - result.modified_count
+                print(f"✅ Task status batch: {result.modified_count} updated, {skipped} ignored")
+        except Exception as e:
+            # Re-applying already written events is harmless: the transition guard ignores them
+            pending = [delivery for _, delivery in batch if id(delivery) not in dropped]
+            print(f"❌ Failed to write task status batch ({len(pending)} events), requeueing: {e}")
+            self._settle_deliveries(pending, outcome='requeue')
+            return
+        self._settle_deliveries(deliveries)
+        self._schedule_store_stats_rebuild(events)
+
+    @staticmethod
+    def _settle_deliveries(deliveries: list[tuple], outcome: str = 'ack') -> None:
+        """
+        Ack, nack with requeue ('requeue') or nack without requeue ('drop') consumed messages;
+        pika channels are only touched on the I/O thread.
+        """
+        by_connection: dict = {}
+        for connection, channel, delivery_tag in deliveries:
+            by_connection.setdefault(id(connection), (connection, []))[1].append((channel, delivery_tag))
+
+        for connection, pending in by_connection.values():
+            def settle(pending=pending):
+                for channel, delivery_tag in pending:
+                    # A closed channel means a reconnect happened: the broker redelivers these
+                    if not channel.is_open:
+                        continue
+                    if outcome == 'ack':
+                        channel.basic_ack(delivery_tag=delivery_tag)
+                    else:
+                        channel.basic_nack(delivery_tag=delivery_tag, requeue=outcome == 'requeue')
+            try:
+                connection.add_callback_threadsafe(settle)
+            except Exception as e:
+                print(f"⚠️ Could not settle {len(pending)} status messages (connection closed, they will be redelivered): {e}")
+
+    def _schedule_store_stats_rebuild(self, events: list[dict]) -> None:
+        """
+        For every store whose crawl just completed: canonicalize the store_id the crawler wrote
+        (queries match it exactly) and enqueue a store_category_stats rebuild.
+        """
+        completed = [event['task_id'] for event in events if event.get('status') == 'completed' and event.get('task_id')]
+        if not completed:
+            return
+        try:
+            from services.async_tasks import async_rebuild_store_category_stats
+            from services.products_service import canonicalize_store_documents
+
+            tasks = self._crawling_tasks().find({'task_id': {'$in': completed}}, {'store_id': 1})
+            for store_id in {canonical_store_id(task['store_id']) for task in tasks if task.get('store_id') is not None}:
+                changed = canonicalize_store_documents(store_id)
+                if changed:
+                    print(f"🔧 Canonicalized store_id on {changed} documents of store {store_id}")
+                async_rebuild_store_category_stats.delay(store_id)
+        except Exception as e:
+            print(f"❌ Failed to schedule store stats rebuild: {e}")
+        # Product listings/stats served from the HTTP cache are stale now
+        catalog_events.publish('products')
+
     def _cleanup_expired_futures(self) -> None:
         """Clean up expired response futures."""
         current_time = datetime.now()
@@ -259,8 +453,9 @@ class RabbitMQService:
                     expired_keys.append(correlation_id)
             for key in expired_keys:
                 future = self.response_futures.pop(key, None)
-                if future and future['event']:
-                    future['event'].set()
+                if future:
+                    self.metrics.increment('expired_futures', future['type'])
+                    self._complete_future(future, None)
 
     def _start_health_monitor(self) -> None:
         """Start a background thread to monitor connection health and clean up futures."""
@@ -279,6 +474,85 @@ class RabbitMQService:
         monitor_thread = threading.Thread(target=health_monitor, daemon=True)
         monitor_thread.start()
 
+    def refresh_ai_queue_stats(self, timeout: float = 5) -> dict:
+        """Read consumer count and depth of the AI request queue via the I/O thread and cache them."""
+        correlation_id = str(uuid.uuid4())
+        future = self._create_future(correlation_id, rpc_type='ai_queue_stats')
+        try:
+            self._submit_publish_job({'type': 'ai_queue_stats', 'correlation_id': correlation_id})
+            if future['event'].wait(timeout):
+                result = future['result'] or {'success': False, 'error': 'No queue stats returned'}
+            else:
+                self.metrics.increment('timeouts', 'ai_queue_stats')
+                result = {'success': False, 'error': f"Queue stats timed out after {timeout}s"}
+        finally:
+            self._discard_future(correlation_id)
+        self._ai_queue_stats = {**result, 'checked_at': datetime.utcnow()}
+        return self._ai_queue_stats
+
+    def get_ai_queue_stats(self) -> dict | None:
+        """Last cached AI queue stats; never waits on the AI service."""
+        return self._ai_queue_stats
+
+    def _start_ai_health_probe(self) -> None:
+        """Start a background thread that keeps the AI queue stats fresh."""
+        def ai_health_probe() -> None:
+            while True:
+                try:
+                    if self.is_connected():
+                        self.refresh_ai_queue_stats()
+                except Exception as e:
+                    print(f"❌ AI health probe error: {e}")
+                time.sleep(self.ai_health_refresh_interval)
+        probe_thread = threading.Thread(target=ai_health_probe, daemon=True, name="RabbitMQ-AI-Health-Probe")
+        probe_thread.start()
+
+    def _start_io_lag_probe(self) -> None:
+        """Start a background thread that measures how long the I/O thread takes to pick up a callback."""
+        interval = float(os.getenv('RABBITMQ_LAG_PROBE_SECONDS', 1))
+
+        def record_lag(scheduled_at: float) -> None:
+            lag = time.monotonic() - scheduled_at
+            self._io_loop_lag = lag
+            self._io_loop_lag_max = max(self._io_loop_lag_max, lag)
+
+        def io_lag_probe() -> None:
+            while True:
+                time.sleep(interval)
+                connection = self.connection
+                if connection is None or connection.is_closed:
+                    continue
+                try:
+                    connection.add_callback_threadsafe(lambda scheduled_at=time.monotonic(): record_lag(scheduled_at))
+                except Exception:
+                    pass
+        probe_thread = threading.Thread(target=io_lag_probe, daemon=True, name="RabbitMQ-IO-Lag-Probe")
+        probe_thread.start()
+
+    def get_io_stats(self) -> dict:
+        """I/O thread lag and status writer queue metrics."""
+        return {
+            'io_mode': self.io_mode,
+            'io_loop_lag_ms': round(self._io_loop_lag * 1000, 2),
+            'io_loop_lag_max_ms': round(self._io_loop_lag_max * 1000, 2),
+            'status_writers': self._status_executor.stats(),
+            'confirm_publishers': self._confirm_pool.stats() if self._confirm_pool else None,
+        }
+
+    def get_rpc_metrics(self) -> dict:
+        """In-flight RPCs by type, latency histograms, counters and I/O thread stats."""
+        in_flight = {'crawl': 0, 'ai': 0, 'ai_image': 0}
+        with self._lock:
+            for future in self.response_futures.values():
+                in_flight[future['type']] = in_flight.get(future['type'], 0) + 1
+        return {
+            'in_flight': in_flight,
+            **self.metrics.snapshot(),
+            'connected': self.is_connected(),
+            'io': self.get_io_stats(),
+            'ai_slots': self.get_ai_slot_stats(),
+        }
+
     def _cleanup_connection(self) -> None:
         """Safely clean up existing connection and channels."""
         try:
@@ -316,43 +590,79 @@ class RabbitMQService:
             self.ai_channel is not None and not self.ai_channel.is_closed
         )
 
-    def send_request(self, action: str, data: dict | None = None, timeout: int = 30) -> dict:
-        """Send request to crawling service and wait for response."""
-        correlation_id = str(uuid.uuid4())
-        message = {
-            'correlationId': correlation_id,
-            'timestamp': datetime.utcnow().isoformat(),
-            'action': action,
-            **(data or {}),
-        }
+    # ========== Response futures ==========
+
+    def _create_future(self, correlation_id: str, loop: asyncio.AbstractEventLoop | None = None,
+                       rpc_type: str = 'crawl') -> dict:
+        """Register a response future; pass an event loop to get an awaitable asyncio future."""
         future = {
+            'type': rpc_type,
+            'started_at': time.monotonic(),
             'result': None,
-            'event': threading.Event(),
+            'event': None if loop else threading.Event(),
+            'loop': loop,
+            'async_future': loop.create_future() if loop else None,
             'created_at': datetime.now(),
         }
         with self._lock:
             self.response_futures[correlation_id] = future
+        return future
+
+    def _discard_future(self, correlation_id: str) -> None:
+        with self._lock:
+            self.response_futures.pop(correlation_id, None)
+
+    def _resolve_future(self, correlation_id: str, result: dict | None) -> bool:
+        """Complete the future registered for correlation_id. Returns False if none is pending."""
+        with self._lock:
+            future = self.response_futures.pop(correlation_id, None)
+        if future is None:
+            return False
+        self.metrics.observe_latency(future['type'], time.monotonic() - future['started_at'])
+        self._complete_future(future, result)
+        return True
+
+    @staticmethod
+    def _complete_future(future: dict, result: dict | None) -> None:
+        """Set the result and wake the waiter (thread or event loop)."""
+        future['result'] = result
+        if future['async_future'] is not None:
+            future['loop'].call_soon_threadsafe(_set_async_result, future['async_future'], result)
+        else:
+            future['event'].set()
+
+    async def _await_future(self, correlation_id: str, future: dict, timeout: float) -> dict | None:
+        """Await an asyncio response future without blocking a thread."""
         try:
-            job = {
-                'type': 'crawling_request',
-                'routing_key': self.crawling_request_queue,
-                'body': json.dumps(message, ensure_ascii=False),
-                'properties': pika.BasicProperties(delivery_mode=2),
-            }
-            self._publish_queue.put(job)
-            if future['event'].wait(timeout):
-                return future['result']
-            else:
-                with self._lock:
-                    self.response_futures.pop(correlation_id, None)
-                raise TimeoutError(f"Request timed out after {timeout}s")
-        except Exception:
-            with self._lock:
-                self.response_futures.pop(correlation_id, None)
-            raise
+            return await asyncio.wait_for(asyncio.shield(future['async_future']), timeout)
+        except asyncio.TimeoutError:
+            self.metrics.increment('timeouts', future['type'])
+            raise TimeoutError(f"No response within {timeout} seconds")
+        finally:
+            self._discard_future(correlation_id)
+
+    def _encode_request(self, payload: dict, **properties) -> dict:
+        """Encode a request body and build matching properties (body + properties job fields)."""
+        body, content_type, content_encoding = rpc_codec.encode(
+            payload,
+            content_type=self.rpc_content_type,
+            compression=self.rpc_compression,
+            compress_threshold=self.rpc_compress_threshold,
+        )
+        return {
+            'body': body,
+            'properties': pika.BasicProperties(
+                content_type=content_type,
+                content_encoding=content_encoding,
+                headers=rpc_codec.accept_headers(),
+                delivery_mode=2,
+                **properties,
+            ),
+        }
 
-    def send_async_request(self, action: str, data: dict | None = None) -> str:
-        """Send an asynchronous request (fire and forget) and return the correlation ID."""
+    # ========== Crawling Service Methods ==========
+
+    def _build_crawling_job(self, action: str, data: dict | None = None) -> tuple[str, dict]:
         correlation_id = str(uuid.uuid4())
         message = {
             'correlationId': correlation_id,
@@ -360,20 +670,73 @@ class RabbitMQService:
             'action': action,
             **(data or {}),
         }
+        job = {
+            'type': 'crawling_request',
+            'correlation_id': correlation_id,
+            'routing_key': self.crawling_request_queue,
+            **self._encode_request(message),
+        }
+        return correlation_id, job
+
+    def send_request(self, action: str, data: dict | None = None, timeout: int = 30) -> dict:
+        """Send request to crawling service and wait for response."""
+        correlation_id, job = self._build_crawling_job(action, data)
+        future = self._create_future(correlation_id)
         try:
-            job = {
-                'type': 'crawling_request',
-                'routing_key': self.crawling_request_queue,
-                'body': json.dumps(message, ensure_ascii=False),
-                'properties': pika.BasicProperties(delivery_mode=2),
-            }
-            self._publish_queue.put(job)
+            self._submit_publish_job(job)
+            if future['event'].wait(timeout):
+                return future['result']
+            self.metrics.increment('timeouts', 'crawl')
+            raise TimeoutError(f"Request timed out after {timeout}s")
+        finally:
+            self._discard_future(correlation_id)
+
+    async def async_send_request(self, action: str, data: dict | None = None, timeout: int = 30) -> dict:
+        """Awaitable variant of send_request for async views."""
+        correlation_id, job = self._build_crawling_job(action, data)
+        future = self._create_future(correlation_id, asyncio.get_running_loop())
+        self._submit_publish_job(job)
+        return await self._await_future(correlation_id, future, timeout)
+
+    def send_async_request(self, action: str, data: dict | None = None) -> str:
+        """Send an asynchronous request (fire and forget) and return the correlation ID."""
+        try:
+            correlation_id, job = self._build_crawling_job(action, data)
+            self._submit_publish_job(job)
             print(f"📤 Async request queued: {action} (ID: {correlation_id})")
             return correlation_id
         except Exception as e:
             print(f"❌ Failed to queue async request: {e}")
             raise
 
+    def _get_confirm_pool(self) -> ConfirmPublisherPool:
+        if self._confirm_pool is None:
+            with self._confirm_pool_lock:
+                if self._confirm_pool is None:
+                    self._confirm_pool = ConfirmPublisherPool(
+                        self.rabbitmq_url,
+                        size=int(os.getenv('RABBITMQ_CONFIRM_CHANNELS', 4)),
+                        window=int(os.getenv('RABBITMQ_CONFIRM_WINDOW', 200)),
+                    )
+        return self._confirm_pool
+
+    def send_async_requests(self, requests: list[tuple[str, dict | None]]) -> list[dict]:
+        """
+        Publish many fire-and-forget requests with publisher confirms.
+        Bypasses the I/O thread: windows of messages go out on the confirm publisher pool.
+        Returns one {'correlation_id', 'success', 'error'} per request, in input order.
+        """
+        jobs = [self._build_crawling_job(action, data) for action, data in requests]
+        errors = self._get_confirm_pool().publish_batch([job for _, job in jobs])
+
+        results = [
+            {'correlation_id': correlation_id, 'success': error is None, 'error': error}
+            for (correlation_id, _), error in zip(jobs, errors)
+        ]
+        failed = sum(1 for result in results if not result['success'])
+        print(f"📤 Batch published: {len(results) - failed}/{len(results)} confirmed")
+        return results
+
     # ========== AI Service Methods ==========
 
     def _handle_ai_response(self, ch, method, props, body) -> None:
@@ -381,112 +744,262 @@ class RabbitMQService:
         correlation_id = props.correlation_id
         print(f"📨 AI response received: correlation_id={correlation_id}")
         try:
-            response = json.loads(body.decode('utf-8'))
-            with self._lock:
-                if correlation_id in self.response_futures:
-                    future = self.response_futures.pop(correlation_id)
-                    future['result'] = response
-                    future['event'].set()
-                    print(f"✅ AI response matched to future: {correlation_id}")
-                else:
-                    print(f"⚠️ No future found for correlation_id: {correlation_id}")
+            response = rpc_codec.decode_message(props, body)
+            if self._resolve_future(correlation_id, response):
+                print(f"✅ AI response matched to future: {correlation_id}")
+            else:
+                print(f"⚠️ No future found for correlation_id: {correlation_id}")
             ch.basic_ack(delivery_tag=method.delivery_tag)
-        except json.JSONDecodeError as e:
-            print(f"❌ Invalid JSON in AI response: {e}")
-            with self._lock:
-                if correlation_id in self.response_futures:
-                    future = self.response_futures.pop(correlation_id)
-                    future['result'] = {'success': False, 'error': f"Invalid JSON response: {str(e)}"}
-                    future['event'].set()
+        except rpc_codec.RPCDecodeError as e:
+            print(f"❌ Undecodable AI response ({props.content_type}/{props.content_encoding}): {e}")
+            self._resolve_future(correlation_id, {'success': False, 'error': f"Invalid response body: {str(e)}"})
             ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
         except Exception as e:
             print(f"❌ Error handling AI response: {e}")
             ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
 
-    def send_ai_request(self, user_input: str, timeout: int = 100) -> dict:
-        """Send request to AI service and wait for response."""
+    def _build_ai_job(self, user_input: str) -> tuple[str, dict]:
         correlation_id = str(uuid.uuid4())
         request = {'user_input': user_input}
-        future = {
-            'result': None,
-            'event': threading.Event(),
-            'created_at': datetime.now(),
+        job = {
+            'type': 'ai_request',
+            'correlation_id': correlation_id,
+            'routing_key': self.ai_request_queue,
+            **self._encode_request(request, correlation_id=correlation_id),
         }
-        with self._lock:
-            self.response_futures[correlation_id] = future
+        return correlation_id, job
+
+    @staticmethod
+    def _image_user_input(s3_url: str, description: str = '') -> str:
+        image_data = {'s3_url': s3_url, 'description': description}
+        return json.dumps(image_data, ensure_ascii=False)
+
+    async def _async_call_ai(self, user_input: str, timeout: int, rpc_type: str = 'ai') -> dict:
+        """Publish an AI RPC and await the reply; only a dict entry and a Future are held while pending."""
+        correlation_id, job = self._build_ai_job(user_input)
+        future = self._create_future(correlation_id, asyncio.get_running_loop(), rpc_type=rpc_type)
+        self._submit_publish_job(job)
         try:
-            job = {
-                'type': 'ai_request',
-                'correlation_id': correlation_id,
-                'routing_key': self.ai_request_queue,
-                'body': json.dumps(request, ensure_ascii=False).encode('utf-8'),
-                'properties': pika.BasicProperties(
-                    correlation_id=correlation_id,
-                    content_type='application/json',
-                    delivery_mode=2,
-                ),
-            }
-            self._publish_queue.put(job)
-            if not future['event'].wait(timeout=timeout):
-                with self._lock:
-                    self.response_futures.pop(correlation_id, None)
+            return await self._await_future(correlation_id, future, timeout)
+        except TimeoutError:
+            raise TimeoutError(f"No response from AI Service within {timeout} seconds")
+
+    # ----- Process-wide AI loop -----
+
+    def _get_ai_loop(self) -> asyncio.AbstractEventLoop:
+        if self._ai_loop is None:
+            with self._ai_loop_lock:
+                if self._ai_loop is None:
+                    loop = asyncio.new_event_loop()
+                    ready = threading.Event()
+
+                    def run():
+                        asyncio.set_event_loop(loop)
+                        # Created on the loop it is used from
+                        self._ai_slots = asyncio.Semaphore(self.ai_max_concurrency)
+                        ready.set()
+                        loop.run_forever()
+
+                    threading.Thread(target=run, daemon=True, name='RabbitMQ-AI-Loop').start()
+                    ready.wait()
+                    self._ai_loop = loop
+        return self._ai_loop
+
+    def _submit_ai(self, user_input: str, timeout: int, rpc_type: str = 'ai', cache_key: str | None = None):
+        """Schedule an AI RPC on the AI loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(
+            self._ai_rpc(user_input, timeout, rpc_type, cache_key), self._get_ai_loop()
+        )
+
+    def _record_slot_wait(self, waited: float, acquired: bool) -> None:
+        stats = self._ai_slot_stats
+        stats['waiting'] -= 1
+        if acquired:
+            stats['in_flight'] += 1
+            stats['total_requests'] += 1
+        stats['last_queue_wait'] = waited
+        stats['max_queue_wait'] = max(stats['max_queue_wait'], waited)
+        stats['total_queue_wait'] += waited
+
+    async def _call_ai_in_slot(self, user_input: str, timeout: int, rpc_type: str, deadline: float) -> dict:
+        """
+        Wait for one of AI_SERVICE_MAX_CONCURRENCY slots, then run the RPC. Both waits share one
+        deadline (loop time), so a call never takes longer than its timeout in total.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        self._ai_slot_stats['waiting'] += 1
+        try:
+            await asyncio.wait_for(self._ai_slots.acquire(), max(deadline - started, 0))
+        except asyncio.TimeoutError:
+            self._record_slot_wait(loop.time() - started, acquired=False)
+            raise TimeoutError(f"No free AI request slot within {timeout} seconds")
+        waited = loop.time() - started
+        self._record_slot_wait(waited, acquired=True)
+        if waited > 1:
+            print(f"⚠️ AI request waited {waited:.2f}s for a free slot ({self.ai_max_concurrency} in flight)")
+        try:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
                 raise TimeoutError(f"No response from AI Service within {timeout} seconds")
-            return future['result']
+            try:
+                return await self._async_call_ai(user_input, remaining, rpc_type)
+            except TimeoutError:
+                raise TimeoutError(f"No response from AI Service within {timeout} seconds")
+        finally:
+            self._ai_slot_stats['in_flight'] -= 1
+            self._ai_slots.release()
+
+    async def _ai_rpc(self, user_input: str, timeout: int, rpc_type: str, cache_key: str | None,
+                      deadline: float | None = None) -> dict:
+        """
+        Runs on the AI loop. With a cache_key: result cache, then single flight (identical prompts
+        share one RPC); every RPC goes through the process-wide slots. `timeout` bounds the whole
+        call, including slot and single-flight waits.
+        """
+        loop = asyncio.get_running_loop()
+        if deadline is None:
+            deadline = loop.time() + timeout
+        if cache_key is None:
+            return await self._call_ai_in_slot(user_input, timeout, rpc_type, deadline)
+
+        cached = self._get_cached_ai_result(cache_key)
+        if cached is not None:
+            print(f"♻️ AI result cache hit: {cache_key}")
+            return cached
+
+        flight = self._ai_flights.get(cache_key)
+        if flight is not None:
+            # Another request is already asking the AI service for this prompt
+            try:
+                response = await asyncio.wait_for(asyncio.shield(flight), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"No response from AI Service within {timeout} seconds")
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                # The leader's caller went away mid-flight: ask the AI service ourselves
+                return await self._ai_rpc(user_input, timeout, rpc_type, cache_key, deadline)
+            return copy.deepcopy(response)
+
+        flight = loop.create_future()
+        # Followers may all have timed out: don't log the leader's error as never retrieved
+        flight.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._ai_flights[cache_key] = flight
+        try:
+            response = await self._call_ai_in_slot(user_input, timeout, rpc_type, deadline)
+            self._store_ai_result(cache_key, response)
+            flight.set_result(response)
+            return copy.deepcopy(response)
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        finally:
+            self._ai_flights.pop(cache_key, None)
+
+    def get_ai_slot_stats(self) -> dict:
+        """Concurrency and queue-wait metrics for the process-wide AI RPC slots."""
+        stats = dict(self._ai_slot_stats)
+        total = stats['total_requests']
+        return {
+            'max_concurrency': self.ai_max_concurrency,
+            'in_flight': stats['in_flight'],
+            'waiting': stats['waiting'],
+            'total_requests': total,
+            'queue_wait_last_ms': round(stats['last_queue_wait'] * 1000, 2),
+            'queue_wait_max_ms': round(stats['max_queue_wait'] * 1000, 2),
+            'queue_wait_avg_ms': round(stats['total_queue_wait'] * 1000 / total, 2) if total else 0.0,
+        }
+
+    @staticmethod
+    def _normalize_ai_input(user_input: str) -> str:
+        """Cache key for recipe prompts: NFC, case-folded, single-spaced."""
+        text = unicodedata.normalize('NFC', user_input).casefold()
+        return re.sub(r'\s+', ' ', text).strip()
+
+    @staticmethod
+    def _is_cacheable_ai_result(response: dict | None) -> bool:
+        """Only successful analyses are cached; errors and guardrail blocks always go to the AI service."""
+        if not isinstance(response, dict):
+            return False
+        result = response['result'] if isinstance(response.get('result'), dict) else response
+        guardrail = result.get('guardrail') or {}
+        return result.get('status') == 'success' and not guardrail.get('triggered')
+
+    def _get_cached_ai_result(self, key: str) -> dict | None:
+        if self._ai_result_cache is None:
+            return None
+        with self._ai_cache_lock:
+            cached = self._ai_result_cache.get(key)
+        # Callers post-process results per user (allergies, excluded ingredients), so never share the cached dict
+        return copy.deepcopy(cached) if cached is not None else None
+
+    def _store_ai_result(self, key: str, response: dict) -> None:
+        if self._ai_result_cache is None or not self._is_cacheable_ai_result(response):
+            return
+        with self._ai_cache_lock:
+            self._ai_result_cache[key] = response
+
+    def send_ai_request(self, user_input: str, timeout: int = 100) -> dict:
+        """Send request to AI service and wait for response (blocking wrapper over the AI loop).
+
+        Identical normalized prompts share one in-flight RPC, and successful
+        analyses are served from a TTL cache (AI_RESULT_CACHE_TTL seconds).
+        """
+        try:
+            return self._submit_ai(user_input, timeout, cache_key=self._normalize_ai_input(user_input)).result()
         except TimeoutError:
             print(f"⏱️ Timeout waiting for AI Service response (>{timeout}s)")
-            with self._lock:
-                self.response_futures.pop(correlation_id, None)
             raise
         except Exception as e:
             print(f"❌ Error in send_ai_request: {e}")
-            with self._lock:
-                self.response_futures.pop(correlation_id, None)
+            raise
+
+    async def async_send_ai_request(self, user_input: str, timeout: int = 100) -> dict:
+        """Awaitable send_ai_request for async views: same loop, slots, single flight and cache."""
+        try:
+            return await asyncio.wrap_future(
+                self._submit_ai(user_input, timeout, cache_key=self._normalize_ai_input(user_input))
+            )
+        except TimeoutError:
+            print(f"⏱️ Timeout waiting for AI Service response (>{timeout}s)")
             raise
 
     def send_ai_image_request(self, s3_url: str, description: str = '', timeout: int = 100) -> dict:
         """Send image analysis request to AI service and wait for response."""
-        correlation_id = str(uuid.uuid4())
-        image_data = {'s3_url': s3_url, 'description': description}
-        request = {'user_input': json.dumps(image_data, ensure_ascii=False)}
-        future = {
-            'result': None,
-            'event': threading.Event(),
-            'created_at': datetime.now(),
-        }
-        with self._lock:
-            self.response_futures[correlation_id] = future
         try:
-            job = {
-                'type': 'ai_request',
-                'correlation_id': correlation_id,
-                'routing_key': self.ai_request_queue,
-                'body': json.dumps(request, ensure_ascii=False).encode('utf-8'),
-                'properties': pika.BasicProperties(
-                    correlation_id=correlation_id,
-                    content_type='application/json',
-                    delivery_mode=2,
-                ),
-            }
-            self._publish_queue.put(job)
-            if not future['event'].wait(timeout=timeout):
-                with self._lock:
-                    self.response_futures.pop(correlation_id, None)
-                raise TimeoutError(f"No response from AI Service within {timeout} seconds")
-            return future['result']
+            return self._submit_ai(self._image_user_input(s3_url, description), timeout, rpc_type='ai_image').result()
         except TimeoutError:
             print(f"⏱️ Timeout waiting for AI Service image response (>{timeout}s)")
-            with self._lock:
-                self.response_futures.pop(correlation_id, None)
             raise
         except Exception as e:
             print(f"❌ Error in send_ai_image_request: {e}")
-            with self._lock:
-                self.response_futures.pop(correlation_id, None)
+            raise
+
+    async def async_send_ai_image_request(self, s3_url: str, description: str = '', timeout: int = 100) -> dict:
+        """Awaitable send_ai_image_request for async views."""
+        try:
+            return await asyncio.wrap_future(
+                self._submit_ai(self._image_user_input(s3_url, description), timeout, rpc_type='ai_image')
+            )
+        except TimeoutError:
+            print(f"⏱️ Timeout waiting for AI Service image response (>{timeout}s)")
             raise
 
     def __del__(self) -> None:
         """Cleanup on destruction."""
         self._cleanup_connection()
+        if self._confirm_pool:
+            self._confirm_pool.close()
+
+
+def _set_async_result(async_future: asyncio.Future, result: dict | None) -> None:
+    """Runs on the waiter's event loop; the waiter may already have timed out."""
+    if not async_future.done():
+        async_future.set_result(result)
 
 
 # Global instance with lazy loading
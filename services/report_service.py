@@ -52,8 +52,4 @@ def recent_activity(activity_type: str, limit: int):
     else:  
         cursor = db.crawling_tasks.find().sort('_id', -1).limit(limit)
 
-    items = []
-    for doc in cursor:
-        doc['_id'] = str(doc['_id'])
-        items.append(doc)
-    return items
+    return list(cursor)
@@ -0,0 +1,110 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+# Upper bounds (ms) of the publish-to-response latency buckets; AI calls can take up to ~100s
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (Prometheus-style cumulative buckets on export)."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS_MS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-quantile (None when empty or in +Inf)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> dict:
+        cumulative = []
+        seen = 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            seen += count
+            cumulative.append({'le': bound, 'count': seen})
+        return {
+            'count': self.count,
+            'sum_ms': round(self.sum_ms, 2),
+            'mean_ms': round(self.sum_ms / self.count, 2) if self.count else None,
+            'p50_ms': self.quantile(0.5),
+            'p95_ms': self.quantile(0.95),
+            'p99_ms': self.quantile(0.99),
+            'buckets': cumulative,
+        }
+
+
+class RPCMetrics:
+    """Thread-safe latency histograms and counters for RabbitMQ RPC calls, labelled by request type."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latency: dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self._counters: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def observe_latency(self, rpc_type: str, seconds: float) -> None:
+        with self._lock:
+            self._latency[rpc_type].observe(seconds * 1000)
+
+    def increment(self, name: str, rpc_type: str = 'all', amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name][rpc_type] += amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'latency_ms': {rpc_type: histogram.snapshot() for rpc_type, histogram in self._latency.items()},
+                'counters': {name: dict(by_type) for name, by_type in self._counters.items()},
+            }
+
+
+def _labels(**labels) -> str:
+    pairs = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    return f'{{{pairs}}}' if pairs else ''
+
+
+def render_prometheus(metrics: dict) -> str:
+    """Render RabbitMQService.get_rpc_metrics() in the Prometheus text exposition format."""
+    lines = ['# TYPE rpc_in_flight gauge']
+    for rpc_type, count in metrics['in_flight'].items():
+        lines.append(f"rpc_in_flight{_labels(type=rpc_type)} {count}")
+
+    lines.append('# TYPE rpc_latency_ms histogram')
+    for rpc_type, histogram in metrics['latency_ms'].items():
+        for bucket in histogram['buckets']:
+            lines.append(f"rpc_latency_ms_bucket{_labels(type=rpc_type, le=bucket['le'])} {bucket['count']}")
+        lines.append(f"rpc_latency_ms_sum{_labels(type=rpc_type)} {histogram['sum_ms']}")
+        lines.append(f"rpc_latency_ms_count{_labels(type=rpc_type)} {histogram['count']}")
+
+    for name, by_type in metrics['counters'].items():
+        lines.append(f'# TYPE rpc_{name}_total counter')
+        for rpc_type, count in by_type.items():
+            lines.append(f"rpc_{name}_total{_labels(type=rpc_type)} {count}")
+
+    io = metrics['io']
+    lines += [
+        '# TYPE rabbitmq_connected gauge',
+        f"rabbitmq_connected {int(metrics['connected'])}",
+        '# TYPE rabbitmq_io_loop_lag_ms gauge',
+        f"rabbitmq_io_loop_lag_ms {io['io_loop_lag_ms']}",
+        '# TYPE rabbitmq_io_loop_lag_max_ms gauge',
+        f"rabbitmq_io_loop_lag_max_ms {io['io_loop_lag_max_ms']}",
+        '# TYPE rabbitmq_status_writer_queue_depth gauge',
+        f"rabbitmq_status_writer_queue_depth {io['status_writers']['queue_depth']}",
+    ]
+    return '\n'.join(lines) + '\n'
@@ -1,4 +1,5 @@
 ﻿import boto3
+from botocore.exceptions import ClientError
 import uuid
 import os
 import logging
@@ -36,11 +37,12 @@ class S3Service:
         self,
         file: BinaryIO,
         filename: str,
-        content_type: Optional[str] = None
+        content_type: Optional[str] = None,
+        key: Optional[str] = None
     ) -> str:
         try:
             file_extension = filename.rsplit(".", 1)[-1] if "." in filename else "jpg"
-            key = f"{uuid.uuid4().hex}.{file_extension}"
+            key = key or f"{uuid.uuid4().hex}.{file_extension}"
             
             extra_args = {}
             if content_type:
@@ -69,6 +71,60 @@ class S3Service:
             logger.error(f"Failed to upload image to S3: {e}")
             raise Exception(f"Failed to upload image: {str(e)}")
     
+    @staticmethod
+    def content_key(content_hash: str, filename: str) -> str:
+        """Content-addressed key: the same bytes always map to the same object."""
+        file_extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else "jpg"
+        file_extension = {"jpeg": "jpg", "tif": "tiff"}.get(file_extension, file_extension)
+        return f"images/sha256/{content_hash}.{file_extension}"
+
+    def get_object_info(self, key: str) -> Optional[dict]:
+        """Size, content type and ETag of an object, or None if it does not exist."""
+        try:
+            head = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return {
+            "size": head.get("ContentLength", 0),
+            "content_type": head.get("ContentType", ""),
+            "etag": head.get("ETag", "").strip('"'),
+        }
+
+    def object_exists(self, key: str) -> bool:
+        return self.get_object_info(key) is not None
+
+    def create_presigned_upload(
+        self,
+        key: str,
+        content_type: str,
+        max_size: int,
+        expires_in: int = 300,
+        method: str = "post"
+    ) -> dict:
+        """
+        Presigned browser/mobile upload straight to S3.
+        POST enforces content type and size in the signed policy; PUT only signs the
+        content type, so the size must be checked after upload (get_object_info).
+        """
+        if method == "put":
+            url = self.s3_client.generate_presigned_url(
+                "put_object",
+                Params={"Bucket": self.bucket_name, "Key": key, "ContentType": content_type},
+                ExpiresIn=expires_in
+            )
+            return {"method": "PUT", "url": url, "headers": {"Content-Type": content_type}}
+
+        post = self.s3_client.generate_presigned_post(
+            Bucket=self.bucket_name,
+            Key=key,
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, max_size]],
+            ExpiresIn=expires_in
+        )
+        return {"method": "POST", "url": post["url"], "fields": post["fields"]}
+
     def get_s3_url(self, key: str) -> str:
         if self.endpoint_url:
             return f"{self.endpoint_url}/{self.bucket_name}/{key}"
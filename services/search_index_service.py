@@ -0,0 +1,198 @@
+import heapq
+import logging
+import math
+import os
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from database.mongodb import MongoDBConnection
+from services.catalog_index import RefreshingIndexes
+from utils.text_utils import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Field weights per collection: a match in a name counts more than a match in the category
+SEARCH_FIELDS = {
+    'dishes': {'dish': 2.0, 'vietnamese_name': 2.0, 'category': 1.0},
+    'ingredients': {'name': 2.0, 'vietnamese_name': 2.0, 'name_en': 1.5, 'category': 1.0},
+}
+
+SEARCH_INDEX_ENABLED = os.getenv('SEARCH_INDEX_ENABLED', 'true').lower() == 'true'
+# Ranked ids checked against a Mongo filter per round trip ($in size)
+SEARCH_FILTER_CHUNK_SIZE = int(os.getenv('SEARCH_FILTER_CHUNK_SIZE', 1000))
+
+
+class InvertedIndex:
+    """
+    BM25 over diacritic-folded tokens. Every query token must match (AND), either exactly
+    or as the prefix of an indexed token ('thit b' finds 'Thịt bò'); prefix matches score
+    a little lower than exact ones.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    PREFIX_WEIGHT = 0.7
+
+    def __init__(self, documents: Iterable[Tuple[Any, Dict[str, Any]]], field_weights: Dict[str, float]):
+        self.doc_ids: List[Any] = []
+        postings = defaultdict(dict)
+        lengths = []
+        for doc_id, fields in documents:
+            doc = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+            length = 0.0
+            for field, weight in field_weights.items():
+                for token in tokenize(fields.get(field)):
+                    postings[token][doc] = postings[token].get(doc, 0.0) + weight
+                    length += weight
+            lengths.append(length)
+
+        self._postings: Dict[str, Dict[int, float]] = dict(postings)
+        self._vocabulary = sorted(self._postings)
+        average_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        # BM25 length normalization, precomputed per document
+        self._norms = [
+            self.K1 * (1 - self.B + self.B * (length / average_length if average_length else 0.0))
+            for length in lengths
+        ]
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def _idf(self, document_frequency: int) -> float:
+        return math.log(1 + (len(self.doc_ids) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """(indexed token, weight) pairs a query token matches."""
+        terms = []
+        index = bisect_left(self._vocabulary, token)
+        while index < len(self._vocabulary) and self._vocabulary[index].startswith(token):
+            term = self._vocabulary[index]
+            terms.append((term, 1.0 if term == token else self.PREFIX_WEIGHT))
+            index += 1
+        return terms
+
+    def _score(self, query: str) -> Dict[int, float]:
+        expansions = [self._expand(token) for token in dict.fromkeys(tokenize(query))]
+        if not expansions or not all(expansions):
+            return {}
+        # Rarest query token first: later tokens only score documents still in the running
+        expansions.sort(key=lambda terms: sum(len(self._postings[term]) for term, _ in terms))
+
+        scores: Optional[Dict[int, float]] = None
+        for terms in expansions:
+            token_scores: Dict[int, float] = {}
+            for term, weight in terms:
+                postings = self._postings[term]
+                idf = weight * self._idf(len(postings))
+                for doc, tf in postings.items():
+                    if scores is not None and doc not in scores:
+                        continue
+                    score = idf * tf * (self.K1 + 1) / (tf + self._norms[doc])
+                    if score > token_scores.get(doc, 0.0):
+                        token_scores[doc] = score
+            if scores is not None:
+                token_scores = {doc: scores[doc] + score for doc, score in token_scores.items()}
+            scores = token_scores
+            if not scores:
+                return {}
+        return scores
+
+    def search(self, query: str) -> List[Tuple[Any, float]]:
+        """[(doc_id, score)] best first; empty when the query has no searchable token."""
+        ranked = sorted(self._score(query).items(), key=lambda item: (-item[1], item[0]))
+        return [(self.doc_ids[doc], score) for doc, score in ranked]
+
+    def top(self, query: str, k: int) -> Tuple[List[Tuple[Any, float]], int]:
+        """The k best matches and the total number of matches (heap instead of a full sort)."""
+        scores = self._score(query)
+        best = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.doc_ids[doc], score) for doc, score in best], len(scores)
+
+
+class SearchIndexService:
+    """Serves `pattern` searches over dishes/ingredients from in-process inverted indexes."""
+
+    def __init__(self, refresh_interval: float = 300):
+        self.db = MongoDBConnection.get_primary_db()
+        self._indexes = RefreshingIndexes(
+            {collection: partial(self._build_index, collection) for collection in SEARCH_FIELDS},
+            refresh_interval=refresh_interval,
+            name='Search',
+        )
+
+    def _build_index(self, collection: str) -> InvertedIndex:
+        field_weights = SEARCH_FIELDS[collection]
+        cursor = self.db[collection].find({}, {field: 1 for field in field_weights})
+        return InvertedIndex(((doc['_id'], doc) for doc in cursor), field_weights)
+
+    def warm_up(self) -> None:
+        self._indexes.warm_up()
+
+    def search_ids(self, collection: str, pattern: str) -> List[Any]:
+        return [doc_id for doc_id, _ in self._indexes.get(collection).search(pattern)]
+
+    def find_page(self, collection: str, pattern: str, query: Dict[str, Any], skip: int, limit: int,
+                  projection: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        One page of documents matching `pattern`, by relevance, that also satisfy the Mongo `query`.
+        Returns (documents, total). With a `query`, total is exact only when every ranked match
+        had to be checked; otherwise it is extrapolated from the share of checked ids that passed.
+        """
+        index = self._indexes.get(collection)
+        if query:
+            page_ids, total = self._filter_ranked(collection, index.search(pattern), query, skip, limit)
+        else:
+            best, total = index.top(pattern, skip + limit)
+            page_ids = [doc_id for doc_id, _ in best[skip:]]
+
+        if not page_ids:
+            return [], total
+        documents = {doc['_id']: doc for doc in self.db[collection].find({'_id': {'$in': page_ids}}, projection)}
+        # Documents deleted since the last rebuild are skipped
+        return [documents[doc_id] for doc_id in page_ids if doc_id in documents], total
+
+    def _filter_ranked(self, collection: str, ranked: List[Tuple[Any, float]], query: Dict[str, Any],
+                       skip: int, limit: int) -> Tuple[List[Any], int]:
+        """
+        Intersect ranked ids with the Mongo `query` in SEARCH_FILTER_CHUNK_SIZE chunks, best first,
+        stopping once skip + limit ids passed. Returns (page ids, total).
+        """
+        ranked_ids = [doc_id for doc_id, _ in ranked]
+        matched: List[Any] = []
+        checked = 0
+        chunk_size = max(1, SEARCH_FILTER_CHUNK_SIZE)
+        while checked < len(ranked_ids) and len(matched) < skip + limit:
+            chunk = ranked_ids[checked:checked + chunk_size]
+            allowed = {doc['_id'] for doc in self.db[collection].find(
+                {'$and': [query, {'_id': {'$in': chunk}}]}, {'_id': 1}
+            )}
+            matched.extend(doc_id for doc_id in chunk if doc_id in allowed)
+            checked += len(chunk)
+
+        if checked == len(ranked_ids):
+            total = len(matched)
+        else:
+            total = max(len(matched), round(len(matched) / checked * len(ranked_ids)))
+        return matched[skip:skip + limit], total
+
+
+_search_index_service_instance: Optional[SearchIndexService] = None
+_search_index_service_lock = threading.Lock()
+
+
+def get_search_index_service() -> SearchIndexService:
+    global _search_index_service_instance
+
+    if _search_index_service_instance is None:
+        with _search_index_service_lock:
+            if _search_index_service_instance is None:
+                _search_index_service_instance = SearchIndexService(
+                    refresh_interval=float(os.getenv('SEARCH_INDEX_REFRESH_SECONDS', 300))
+                )
+                logger.info("Search index service initialized")
+
+    return _search_index_service_instance
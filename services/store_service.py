@@ -2,14 +2,18 @@ from database.mongodb import MongoDBConnection
 from bson import ObjectId
 from datetime import datetime
 from services.location_service import location_service
+from utils.store_ids import canonical_store_id
+from services.suggestion_service import get_suggestion_service
+from utils.pagination import paginate, count_total
 
 metadata_db = MongoDBConnection.get_metadata_db()
 primary_db = MongoDBConnection.get_primary_db()
 
-def get_all_stores_data(page, size, pattern, store_name, chain, store_location):
-    """Lấy danh sách stores từ metadata_db"""
-    skip = page * size
-    
+# Sort của danh sách stores; _id ở cuối để cursor là duy nhất (index: store_name, chain, _id)
+STORE_LIST_SORT = [('store_name', 1), ('chain', 1), ('_id', 1)]
+
+def get_all_stores_data(page, size, pattern, store_name, chain, store_location, cursor=None):
+    """Lấy danh sách stores từ metadata_db (theo pageNo hoặc theo cursor)"""
     query_conditions = []
 
     if pattern:
@@ -39,24 +43,14 @@ def get_all_stores_data(page, size, pattern, store_name, chain, store_location):
     else:
         query = {}
     
-    stores = list(
-        metadata_db.stores.find(query)
-        .sort([('store_name', 1), ('chain', 1)])
-        .skip(skip)
-        .limit(size)
-    )
+    stores, next_cursor = paginate(metadata_db.stores, query, STORE_LIST_SORT, page * size, size, cursor)
     
-    total = metadata_db.stores.count_documents(query)
-    
-    # Convert ObjectId to string
-    for store in stores:
-        if '_id' in store:
-            store['_id'] = str(store['_id'])
+    total, total_exact = count_total(metadata_db.stores, query)
     
     # Calculate pagination info
     total_pages = (total + size - 1) // size if size > 0 else 0
-    has_next = page < total_pages - 1
-    has_prev = page > 0
+    has_next = next_cursor is not None
+    has_prev = page > 0 or bool(cursor)
     
     return {
         'stores': stores,
@@ -66,8 +60,10 @@ def get_all_stores_data(page, size, pattern, store_name, chain, store_location):
             'page_size': size,
             'total_pages': total_pages,
             'total_elements': total,
+            'total_exact': total_exact,
             'has_next': has_next,
-            'has_previous': has_prev
+            'has_previous': has_prev,
+            'next_cursor': next_cursor
         },
         'filters': {
             'pattern': pattern,
@@ -80,28 +76,15 @@ def get_all_stores_data(page, size, pattern, store_name, chain, store_location):
 def get_store_by_id_data(store_id):
     """Lấy chi tiết store theo store_id"""
     try:
-        store = metadata_db.stores.find_one({'store_id': store_id})
+        store = metadata_db.stores.find_one({'store_id': canonical_store_id(store_id)})
 
-        if not store:
-            try:
-                store_id_int = int(store_id)
-                store = metadata_db.stores.find_one({'store_id': store_id_int})
-            except ValueError:
-                pass
-        
-        if not store:
-            try:
-                store = metadata_db.stores.find_one({'_id': ObjectId(store_id)})
-            except:
-                pass
+        # Fallback: Mongo _id của store
+        if not store and ObjectId.is_valid(store_id):
+            store = metadata_db.stores.find_one({'_id': ObjectId(store_id)})
 
         if not store:
             return None, "Store not found"
         
-        # Convert ObjectId to string
-        if '_id' in store:
-            store['_id'] = str(store['_id'])
-        
         # Add additional computed fields
         store['has_coordinates'] = 'latitude' in store and 'longitude' in store
         store['rating_info'] = {
@@ -116,72 +99,12 @@ def get_store_by_id_data(store_id):
         return None, str(e)
 
 def get_store_suggestions_data(query, limit, suggestion_type='all'):
-    """Tạo store search suggestions"""
-    regex_pattern = {'$regex': f'^{query}', '$options': 'i'}
-    contains_pattern = {'$regex': query, '$options': 'i'}
-    
-    suggestions = []
-    
-    # Store name suggestions
-    if suggestion_type in ['all', 'store_name']:
-        name_matches = metadata_db.stores.find(
-            {'store_name': regex_pattern},
-            {'store_name': 1, 'chain': 1, 'store_location': 1, 'store_id': 1}
-        ).limit(limit // 2 if suggestion_type == 'all' else limit)
-        
-        for store in name_matches:
-            suggestions.append({
-                'text': store.get('store_name', ''),
-                'type': 'store_name',
-                'store_id': store.get('store_id'),
-                'chain': store.get('chain', ''),
-                'location': store.get('store_location', ''),
-                'display_text': f"{store.get('store_name', '')} - {store.get('chain', '')}"
-            })
-    
-    # Chain suggestions
-    if suggestion_type in ['all', 'chain'] and len(suggestions) < limit:
-        remaining_limit = limit - len(suggestions)
-        chain_matches = metadata_db.stores.find(
-            {'chain': regex_pattern},
-            {'chain': 1, 'store_name': 1, 'store_location': 1, 'store_id': 1}
-        ).limit(remaining_limit)
-        
-        chains_added = set()
-        for store in chain_matches:
-            chain_name = store.get('chain', '')
-            if chain_name not in chains_added:
-                suggestions.append({
-                    'text': chain_name,
-                    'type': 'chain',
-                    'store_id': store.get('store_id'),
-                    'store_name': store.get('store_name', ''),
-                    'location': store.get('store_location', ''),
-                    'display_text': f"{chain_name} - {store.get('store_name', '')}"
-                })
-                chains_added.add(chain_name)
-    
-    # Location suggestions
-    if suggestion_type in ['all', 'location'] and len(suggestions) < limit:
-        remaining_limit = limit - len(suggestions)
-        location_matches = metadata_db.stores.find(
-            {'store_location': contains_pattern},
-            {'store_location': 1, 'store_name': 1, 'chain': 1, 'store_id': 1}
-        ).limit(remaining_limit)
-        
-        for store in location_matches:
-            suggestions.append({
-                'text': store.get('store_location', ''),
-                'type': 'location', 
-                'store_id': store.get('store_id'),
-                'store_name': store.get('store_name', ''),
-                'chain': store.get('chain', ''),
-                'display_text': f"{store.get('store_name', '')} - {store.get('store_location', '')}"
-            })
+    """Tạo store search suggestions (prefix index trong bộ nhớ, không phân biệt dấu)"""
+    suggestions = get_suggestion_service().store_suggestions(query, limit, suggestion_type)
     
     return {
-        'suggestions': suggestions[:limit],
-        'total': len(suggestions[:limit]),
+        'suggestions': suggestions,
+        'total': len(suggestions),
         'query': query,
         'suggestion_type': suggestion_type
     }
@@ -221,8 +144,6 @@ def get_near_stores_data(user_email, refresh=False, radius_km=10, limit=20):
         
         # Enhance store data with additional info
         for store in result_stores:
-            if '_id' in store:
-                store['_id'] = str(store['_id'])
             store['is_nearby'] = True
             store['search_radius_km'] = radius_km
             
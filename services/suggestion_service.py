@@ -0,0 +1,235 @@
+import logging
+import os
+import threading
+from bisect import bisect_left
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from database.mongodb import MongoDBConnection
+from services.catalog_index import RefreshingIndexes
+from utils.text_utils import fold_text, word_starts
+
+logger = logging.getLogger(__name__)
+
+
+class PrefixIndex:
+    """Sorted array of (diacritic-folded key, entry); a prefix lookup is one bisect plus a short scan."""
+
+    def __init__(self, items: Iterable[Tuple[str, Any]], word_prefixes: bool = False):
+        rows = []
+        for position, (text, entry) in enumerate(items):
+            folded = fold_text(text)
+            if not folded:
+                continue
+            for key in (word_starts(folded) if word_prefixes else [folded]):
+                rows.append((key, position, entry))
+        rows.sort(key=lambda row: (row[0], row[1]))
+        self._keys = [row[0] for row in rows]
+        self._entries = [row[2] for row in rows]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def search(self, prefix: str, limit: int, predicate: Optional[Callable[[Any], bool]] = None) -> List[Any]:
+        """Entries whose key starts with the (already folded) prefix, in key order, each entry once."""
+        results = []
+        seen = set()
+        index = bisect_left(self._keys, prefix)
+        while index < len(self._keys) and len(results) < limit and self._keys[index].startswith(prefix):
+            entry = self._entries[index]
+            index += 1
+            if id(entry) in seen or (predicate is not None and not predicate(entry)):
+                continue
+            seen.add(id(entry))
+            results.append(entry)
+        return results
+
+
+def _build_store_indexes(metadata_db, primary_db):
+    stores = list(metadata_db.stores.find({}, {'store_name': 1, 'chain': 1, 'store_location': 1, 'store_id': 1, '_id': 0}))
+    first_store_by_chain = {}
+    for store in stores:
+        first_store_by_chain.setdefault(store.get('chain') or '', store)
+    return {
+        'store_name': PrefixIndex((store.get('store_name'), store) for store in stores),
+        'chain': PrefixIndex((chain, store) for chain, store in first_store_by_chain.items()),
+        # Location suggestions matched anywhere in the address, so index every word
+        'location': PrefixIndex(((store.get('store_location'), store) for store in stores), word_prefixes=True),
+    }
+
+
+def _build_dish_indexes(metadata_db, primary_db):
+    dishes = list(primary_db.dishes.find({}, {'dish': 1, 'vietnamese_name': 1, '_id': 0}))
+    for dish in dishes:
+        dish['_folded'] = fold_text(dish.get('dish'))
+    return {
+        'dish': PrefixIndex((dish.get('dish'), dish) for dish in dishes),
+        'vietnamese_name': PrefixIndex((dish.get('vietnamese_name'), dish) for dish in dishes),
+    }
+
+
+def _build_ingredient_indexes(metadata_db, primary_db):
+    ingredients = list(primary_db.ingredients.find({}, {'name': 1, 'vietnamese_name': 1, 'category': 1, '_id': 0}))
+    for ingredient in ingredients:
+        ingredient['_folded'] = fold_text(ingredient.get('name'))
+    categories = sorted({ingredient['category'] for ingredient in ingredients if ingredient.get('category')})
+    return {
+        'name': PrefixIndex((ingredient.get('name'), ingredient) for ingredient in ingredients),
+        'vietnamese_name': PrefixIndex((ingredient.get('vietnamese_name'), ingredient) for ingredient in ingredients),
+        'category': PrefixIndex((category, category) for category in categories),
+    }
+
+
+INDEX_BUILDERS = {
+    'stores': _build_store_indexes,
+    'dishes': _build_dish_indexes,
+    'ingredients': _build_ingredient_indexes,
+}
+
+
+class SuggestionService:
+    """
+    Process-local autocomplete for stores, dishes and ingredients (see RefreshingIndexes for
+    how the indexes are loaded and refreshed), so a keystroke never waits on Mongo after warm-up.
+    """
+
+    def __init__(self, refresh_interval: float = 300):
+        metadata_db = MongoDBConnection.get_metadata_db()
+        primary_db = MongoDBConnection.get_primary_db()
+        self._indexes = RefreshingIndexes(
+            {collection: partial(builder, metadata_db, primary_db) for collection, builder in INDEX_BUILDERS.items()},
+            refresh_interval=refresh_interval,
+            name='Suggestion',
+        )
+
+    def _get(self, collection: str) -> Dict[str, PrefixIndex]:
+        return self._indexes.get(collection)
+
+    def warm_up(self) -> None:
+        self._indexes.warm_up()
+
+    def store_suggestions(self, query: str, limit: int, suggestion_type: str = 'all') -> List[Dict[str, Any]]:
+        prefix = fold_text(query)
+        if not prefix:
+            return []
+        indexes = self._get('stores')
+        suggestions = []
+
+        if suggestion_type in ['all', 'store_name']:
+            for store in indexes['store_name'].search(prefix, limit // 2 if suggestion_type == 'all' else limit):
+                suggestions.append({
+                    'text': store.get('store_name', ''),
+                    'type': 'store_name',
+                    'store_id': store.get('store_id'),
+                    'chain': store.get('chain', ''),
+                    'location': store.get('store_location', ''),
+                    'display_text': f"{store.get('store_name', '')} - {store.get('chain', '')}"
+                })
+
+        if suggestion_type in ['all', 'chain'] and len(suggestions) < limit:
+            for store in indexes['chain'].search(prefix, limit - len(suggestions)):
+                chain_name = store.get('chain', '')
+                suggestions.append({
+                    'text': chain_name,
+                    'type': 'chain',
+                    'store_id': store.get('store_id'),
+                    'store_name': store.get('store_name', ''),
+                    'location': store.get('store_location', ''),
+                    'display_text': f"{chain_name} - {store.get('store_name', '')}"
+                })
+
+        if suggestion_type in ['all', 'location'] and len(suggestions) < limit:
+            for store in indexes['location'].search(prefix, limit - len(suggestions)):
+                suggestions.append({
+                    'text': store.get('store_location', ''),
+                    'type': 'location',
+                    'store_id': store.get('store_id'),
+                    'store_name': store.get('store_name', ''),
+                    'chain': store.get('chain', ''),
+                    'display_text': f"{store.get('store_name', '')} - {store.get('store_location', '')}"
+                })
+
+        return suggestions[:limit]
+
+    def dish_suggestions(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        prefix = fold_text(query)
+        if not prefix:
+            return []
+        indexes = self._get('dishes')
+
+        suggestions = [{
+            'text': dish['dish'],
+            'vietnamese_text': dish.get('vietnamese_name', ''),
+            'type': 'dish_name'
+        } for dish in indexes['dish'].search(prefix, limit)]
+
+        if len(suggestions) < limit:
+            # Dishes already suggested by their English name are skipped
+            vietnamese_matches = indexes['vietnamese_name'].search(
+                prefix, limit - len(suggestions), lambda dish: not dish['_folded'].startswith(prefix)
+            )
+            suggestions.extend({
+                'text': dish.get('vietnamese_name', ''),
+                'vietnamese_text': dish.get('dish', ''),
+                'type': 'vietnamese_name'
+            } for dish in vietnamese_matches)
+
+        return suggestions[:limit]
+
+    def ingredient_suggestions(self, query: str, limit: int, suggestion_type: str = 'all') -> List[Dict[str, Any]]:
+        prefix = fold_text(query)
+        if not prefix:
+            return []
+        indexes = self._get('ingredients')
+        suggestions = []
+
+        if suggestion_type in ['all', 'name']:
+            suggestions.extend({
+                'text': ingredient['name'],
+                'vietnamese_text': ingredient.get('vietnamese_name', ''),
+                'category': ingredient.get('category', ''),
+                'type': 'name',
+                'priority': 1
+            } for ingredient in indexes['name'].search(prefix, limit // 2))
+
+        if suggestion_type in ['all', 'vietnamese'] and len(suggestions) < limit:
+            vietnamese_matches = indexes['vietnamese_name'].search(
+                prefix, limit - len(suggestions), lambda ingredient: not ingredient['_folded'].startswith(prefix)
+            )
+            suggestions.extend({
+                'text': ingredient.get('vietnamese_name', ''),
+                'vietnamese_text': ingredient.get('name', ''),
+                'category': ingredient.get('category', ''),
+                'type': 'vietnamese_name',
+                'priority': 2
+            } for ingredient in vietnamese_matches)
+
+        if suggestion_type in ['all', 'category'] and len(suggestions) < limit:
+            suggestions.extend({
+                'text': category,
+                'vietnamese_text': '',
+                'category': category,
+                'type': 'category',
+                'priority': 3
+            } for category in indexes['category'].search(prefix, limit - len(suggestions)))
+
+        suggestions.sort(key=lambda x: (x['priority'], x['text'].lower()))
+        return suggestions[:limit]
+
+
+_suggestion_service_instance: Optional[SuggestionService] = None
+_suggestion_service_lock = threading.Lock()
+
+
+def get_suggestion_service() -> SuggestionService:
+    global _suggestion_service_instance
+
+    if _suggestion_service_instance is None:
+        with _suggestion_service_lock:
+            if _suggestion_service_instance is None:
+                _suggestion_service_instance = SuggestionService(
+                    refresh_interval=float(os.getenv('SUGGESTION_INDEX_REFRESH_SECONDS', 300))
+                )
+                logger.info("Suggestion service initialized")
+
+    return _suggestion_service_instance
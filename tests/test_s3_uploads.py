@@ -0,0 +1,160 @@
+"""
+Presigned direct-to-S3 uploads (/upload-url, /analyze-uploaded) against moto's in-memory S3.
+
+    pip install -r requirements-dev.txt
+    python -m pytest tests
+"""
+import base64
+import hashlib
+import json
+from urllib.parse import parse_qs, urlparse
+
+import boto3
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager
+from moto import mock_aws
+
+from services.s3_service import S3Service
+
+BUCKET = 'test-recipe-images'
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+@pytest.fixture
+def s3_service(monkeypatch):
+    for name, value in (('AWS_ACCESS_KEY_ID', 'testing'), ('AWS_SECRET_ACCESS_KEY', 'testing'),
+                        ('AWS_SESSION_TOKEN', 'testing'), ('AWS_DEFAULT_REGION', 'us-east-1')):
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv('AWS_ENDPOINT_URL', raising=False)
+    with mock_aws():
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket=BUCKET)
+        yield S3Service(aws_region='us-east-1', bucket_name=BUCKET)
+
+
+@pytest.fixture
+def client(s3_service, monkeypatch):
+    from routes import ai_routes
+
+    monkeypatch.setattr(ai_routes, 'get_s3_service', lambda: s3_service)
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret'
+    JWTManager(app)
+    app.register_blueprint(ai_routes.ai_bp, url_prefix='/api/v1/ai')
+    return app.test_client()
+
+
+def put_object(s3_service, key, body, content_type):
+    s3_service.s3_client.put_object(Bucket=BUCKET, Key=key, Body=body, ContentType=content_type)
+
+
+def test_presigned_post_policy_limits_size_and_content_type(s3_service):
+    upload = s3_service.create_presigned_upload('uploads/abc.png', 'image/png', max_size=1024, expires_in=60)
+
+    assert upload['method'] == 'POST'
+    assert upload['fields']['key'] == 'uploads/abc.png'
+    assert upload['fields']['Content-Type'] == 'image/png'
+    policy = json.loads(base64.b64decode(upload['fields']['policy']))
+    assert {'Content-Type': 'image/png'} in policy['conditions']
+    assert ['content-length-range', 1, 1024] in policy['conditions']
+
+
+def test_presigned_put_signs_content_type(s3_service):
+    upload = s3_service.create_presigned_upload('uploads/abc.png', 'image/png', max_size=1024, method='put')
+
+    assert upload['method'] == 'PUT'
+    assert upload['headers'] == {'Content-Type': 'image/png'}
+    query = parse_qs(urlparse(upload['url']).query)
+    signed_headers = query.get('X-Amz-SignedHeaders', [''])[0].split(';')
+    assert 'content-type' in signed_headers or query.get('content-type') == ['image/png']
+
+
+def test_get_object_info(s3_service):
+    put_object(s3_service, 'uploads/abc.png', PNG_BYTES, 'image/png')
+
+    assert s3_service.get_object_info('uploads/abc.png') == {
+        'size': len(PNG_BYTES),
+        'content_type': 'image/png',
+        'etag': hashlib.md5(PNG_BYTES).hexdigest(),
+    }
+    assert s3_service.object_exists('uploads/abc.png')
+
+
+def test_get_object_info_missing_object(s3_service):
+    assert s3_service.get_object_info('uploads/missing.png') is None
+    assert not s3_service.object_exists('uploads/missing.png')
+
+
+def test_upload_url_rejects_non_image_content_type(client):
+    response = client.post('/api/v1/ai/upload-url', json={'filename': 'dish.png', 'content_type': 'text/html'})
+
+    assert response.status_code == 400
+
+
+def test_analyze_uploaded_rejects_key_outside_upload_prefix(client):
+    response = client.post('/api/v1/ai/analyze-uploaded', json={'s3_key': 'images/sha256/abc.png'})
+
+    assert response.status_code == 400
+
+
+def test_analyze_uploaded_missing_object(client):
+    response = client.post('/api/v1/ai/analyze-uploaded', json={'s3_key': 'uploads/missing.png'})
+
+    assert response.status_code == 404
+
+
+def test_analyze_uploaded_rejects_and_deletes_oversized_object(client, s3_service, monkeypatch):
+    from routes import ai_routes
+
+    monkeypatch.setattr(ai_routes, 'MAX_IMAGE_SIZE', 16)
+    put_object(s3_service, 'uploads/big.png', PNG_BYTES, 'image/png')
+
+    response = client.post('/api/v1/ai/analyze-uploaded', json={'s3_key': 'uploads/big.png'})
+
+    assert response.status_code == 400
+    assert not s3_service.object_exists('uploads/big.png')
+
+
+def test_analyze_uploaded_rejects_and_deletes_wrong_content_type(client, s3_service):
+    put_object(s3_service, 'uploads/page.png', b'<html></html>', 'text/html')
+
+    response = client.post('/api/v1/ai/analyze-uploaded', json={'s3_key': 'uploads/page.png'})
+
+    assert response.status_code == 400
+    assert not s3_service.object_exists('uploads/page.png')
+
+
+def test_analyze_uploaded_passes_valid_object_to_analysis(client, s3_service, monkeypatch):
+    from routes import ai_routes
+
+    calls = []
+
+    def analyze_image_cached(s3_key, description, content_hash, *args):
+        calls.append((s3_key, description, content_hash))
+        return None, 'AI Service unavailable'
+
+    monkeypatch.setattr(ai_routes, 'analyze_image_cached', analyze_image_cached)
+    put_object(s3_service, 'uploads/dish.png', PNG_BYTES, 'image/png')
+
+    response = client.post('/api/v1/ai/analyze-uploaded', json={'s3_key': 'uploads/dish.png', 'description': 'phở'})
+
+    assert response.status_code == 503
+    assert calls == [('uploads/dish.png', 'phở', f"etag:{hashlib.md5(PNG_BYTES).hexdigest()}")]
+    # Analysis failures keep the uploaded object
+    assert s3_service.object_exists('uploads/dish.png')
+
+
+@pytest.mark.parametrize('uploaded', [True, False])
+def test_guardrail_block_deletes_only_objects_this_request_uploaded(client, s3_service, monkeypatch, uploaded):
+    from routes import ai_routes
+
+    monkeypatch.setattr(ai_routes, 'IMAGE_ANALYSIS_CACHE_ENABLED', False)
+    put_object(s3_service, 'images/sha256/abc.png', PNG_BYTES, 'image/png')
+    blocked = {'status': 'guardrail_blocked', 'error': 'unsafe image'}
+
+    with client.application.app_context():
+        _, status_code = ai_routes.build_image_upload_response(blocked, 'images/sha256/abc.png', 'abc', uploaded)
+
+    assert status_code == 400
+    # Content-addressed objects that already existed back earlier cached analyses
+    assert s3_service.object_exists('images/sha256/abc.png') is not uploaded
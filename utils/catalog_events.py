@@ -0,0 +1,33 @@
+import threading
+from collections import defaultdict
+
+# In-process pub/sub for collection writes (catalog, accounts, crawling tasks).
+# Subscribers (suggestion/search indexes) refresh immediately in this process and the version
+# counter keys caches such as utils.count_cache; other workers/processes catch up on their
+# own refresh interval or TTL.
+
+_lock = threading.Lock()
+_subscribers = defaultdict(list)
+_versions = defaultdict(int)
+
+
+def subscribe(collection, callback):
+    """callback(collection) is called after every publish for that collection."""
+    with _lock:
+        _subscribers[collection].append(callback)
+
+
+def publish(collection):
+    with _lock:
+        _versions[collection] += 1
+        callbacks = list(_subscribers[collection])
+    for callback in callbacks:
+        try:
+            callback(collection)
+        except Exception as e:
+            print(f"❌ Catalog event subscriber failed for {collection}: {e}")
+
+
+def get_version(collection):
+    with _lock:
+        return _versions[collection]
@@ -0,0 +1,64 @@
+import os
+import threading
+
+from bson import json_util
+from cachetools import TTLCache
+
+from utils import catalog_events
+
+
+class CountCache:
+    """
+    count_documents results keyed by (database, collection, normalized filter).
+    Entries expire after `ttl` seconds; the key also carries the collection's write version
+    (utils.catalog_events), so a publish after a write makes every cached count of that
+    collection miss in this process. Other processes see the write once their entry expires.
+    """
+
+    def __init__(self, ttl=30, maxsize=1024):
+        self.enabled = ttl > 0
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl) if self.enabled else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(collection, query):
+        normalized = json_util.dumps(query, sort_keys=True)
+        return (
+            collection.database.name,
+            collection.name,
+            catalog_events.get_version(collection.name),
+            normalized,
+        )
+
+    def count(self, collection, query):
+        """(total, cached)"""
+        if not self.enabled:
+            return collection.count_documents(query), False
+        key = self._key(collection, query)
+        with self._lock:
+            total = self._cache.get(key)
+            if total is not None:
+                self.hits += 1
+                return total, True
+            self.misses += 1
+        total = collection.count_documents(query)
+        with self._lock:
+            self._cache[key] = total
+        return total, False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._cache) if self.enabled else 0,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+count_cache = CountCache(
+    ttl=float(os.getenv('COUNT_CACHE_TTL', 30)),
+    maxsize=int(os.getenv('COUNT_CACHE_SIZE', 1024)),
+)
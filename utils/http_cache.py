@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+
+from cachetools import TTLCache
+from flask import current_app, make_response, request
+
+from utils import catalog_events
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+# Responses larger than this are still served with an ETag but not stored
+HTTP_CACHE_MAX_BODY = int(os.getenv('HTTP_CACHE_MAX_BODY', 1024 * 1024))
+
+VERSION_KEY = 'http_cache:version:{}'
+ENTRY_KEY = 'http_cache:entry:{}'
+
+
+class ResponseCache:
+    """
+    Serialized GET responses keyed by path, query string and the write versions of the
+    collections the response reads. Process-local by default; with a Redis URL the entries
+    and the versions are shared, so a write published in one worker invalidates every worker.
+    """
+
+    def __init__(self, maxsize=512, redis_url=None):
+        self._local = TTLCache(maxsize=maxsize, ttl=3600)
+        self._lock = threading.Lock()
+        self._subscribed = set()
+        self._redis = None
+        if redis_url:
+            if redis is None:
+                logger.warning("HTTP_CACHE_REDIS_URL is set but the redis package is not installed; using the local cache")
+            else:
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def watch(self, collections):
+        """Bump the shared version of each collection whenever a write is published for it."""
+        for collection in collections:
+            with self._lock:
+                if collection in self._subscribed:
+                    continue
+                self._subscribed.add(collection)
+            catalog_events.subscribe(collection, self._bump)
+
+    def _bump(self, collection):
+        if self._redis is not None:
+            try:
+                self._redis.incr(VERSION_KEY.format(collection))
+            except redis.RedisError as e:
+                logger.warning(f"HTTP cache version bump failed for {collection}: {e}")
+
+    def _versions(self, collections):
+        if self._redis is not None and collections:
+            try:
+                return [int(version or 0) for version in self._redis.mget([VERSION_KEY.format(c) for c in collections])]
+            except redis.RedisError as e:
+                logger.warning(f"HTTP cache version lookup failed: {e}")
+                return None
+        return [catalog_events.get_version(collection) for collection in collections]
+
+    def key(self, collections):
+        versions = self._versions(collections)
+        if versions is None:
+            return None
+        args = sorted(request.args.items(multi=True))
+        raw = json.dumps([request.path, args, list(collections), versions], ensure_ascii=False)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(ENTRY_KEY.format(key))
+            except redis.RedisError as e:
+                logger.warning(f"HTTP cache read failed: {e}")
+                return None
+            return _decode_entry(raw) if raw else None
+        with self._lock:
+            entry = self._local.get(key)
+        if entry is None or entry['expires_at'] < datetime.now(timezone.utc).timestamp():
+            return None
+        return entry
+
+    def set(self, key, entry, ttl):
+        if self._redis is not None:
+            try:
+                self._redis.set(ENTRY_KEY.format(key), _encode_entry(entry), ex=max(int(ttl), 1))
+            except redis.RedisError as e:
+                logger.warning(f"HTTP cache write failed: {e}")
+            return
+        entry = dict(entry, expires_at=datetime.now(timezone.utc).timestamp() + ttl)
+        with self._lock:
+            self._local[key] = entry
+
+
+def _encode_entry(entry):
+    header = json.dumps({'etag': entry['etag'], 'mimetype': entry['mimetype'], 'last_modified': entry['last_modified']})
+    return header.encode('utf-8') + b'\n' + entry['body']
+
+
+def _decode_entry(raw):
+    header, _, body = raw.partition(b'\n')
+    entry = json.loads(header)
+    entry['body'] = body
+    return entry
+
+
+response_cache = ResponseCache(
+    maxsize=int(os.getenv('HTTP_CACHE_SIZE', 512)),
+    redis_url=os.getenv('HTTP_CACHE_REDIS_URL'),
+)
+
+
+def cached_response(collections=(), max_age=60, private=False, ttl=None):
+    """
+    Conditional GET for read-mostly endpoints (place it under @jwt_required when the route has one).
+    - The body is served from the response cache until `ttl` (default max_age) expires or a write
+      is published for one of `collections`.
+    - Strong ETag = hash of the body, so it is the same on every worker; If-None-Match and
+      If-Modified-Since are answered with 304 and no body.
+    - Cache-Control: public (CDN/browser) or private (browser only, for routes behind a token).
+    Only 200 responses are cached.
+    """
+    collections = tuple(collections)
+    response_cache.watch(collections)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not HTTP_CACHE_ENABLED or request.method != 'GET':
+                return view(*args, **kwargs)
+
+            key = response_cache.key(collections)
+            entry = response_cache.get(key) if key else None
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                body = response.get_data()
+                entry = {
+                    'etag': hashlib.sha256(body).hexdigest()[:32],
+                    'mimetype': response.mimetype,
+                    'last_modified': int(datetime.now(timezone.utc).timestamp()),
+                    'body': body,
+                }
+                if key and len(body) <= HTTP_CACHE_MAX_BODY:
+                    response_cache.set(key, entry, ttl or max_age)
+
+            response = current_app.response_class(entry['body'], mimetype=entry['mimetype'])
+            response.set_etag(entry['etag'])
+            response.last_modified = datetime.fromtimestamp(entry['last_modified'], timezone.utc)
+            if private:
+                response.cache_control.private = True
+            else:
+                response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            return response.make_conditional(request)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,83 @@
+"""
+App-wide Flask JSON provider (app.json) built on orjson.
+
+Output matches Flask's DefaultJSONProvider where clients can see it: keys sorted, datetimes as
+HTTP dates, Decimal/UUID as strings. BSON ObjectId is encoded as its hex string and NumPy
+scalars/arrays as plain numbers/lists, so services can hand Mongo documents to jsonify
+without converting them first. Non-ASCII text is emitted as UTF-8 instead of \\u escapes.
+Falls back to the stdlib encoder when orjson is missing or rejects a value (e.g. ints > 64 bit).
+"""
+import decimal
+import json
+import uuid
+from datetime import date
+
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, date):
+        return http_date(value)
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if numpy is not None:
+        if isinstance(value, numpy.generic):
+            return value.item()
+        if isinstance(value, numpy.ndarray):
+            return value.tolist()
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    return DefaultJSONProvider.default(value)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+
+    def _options(self, indent=False):
+        # Datetimes go through _default so they keep Flask's HTTP-date format
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dump_bytes(self, obj, indent=False):
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=_default, option=self._options(indent))
+            except orjson.JSONEncodeError:
+                pass
+        return json.dumps(
+            obj,
+            default=_default,
+            ensure_ascii=False,
+            sort_keys=self.sort_keys,
+            indent=2 if indent else None,
+            separators=None if indent else (',', ':'),
+        ).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            kwargs.setdefault('default', _default)
+            return super().dumps(obj, **kwargs)
+        return self.dump_bytes(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self.dump_bytes(obj, indent=indent), mimetype=self.mimetype)
@@ -0,0 +1,82 @@
+import queue
+import threading
+import zlib
+
+
+class KeyedBatchExecutor:
+    """
+    Bounded pool of single-threaded lanes.
+    Items with the same key always land in the same lane, so they are handled in
+    submission order; a lane passes everything already queued to the handler as one batch.
+    Exceptions escaping the handler are only logged and counted, so a handler holding resources
+    per item (e.g. unacked messages) must release them itself on every path.
+    """
+
+    def __init__(self, handler, workers=4, max_queue_size=1000, max_batch_size=100, name='KeyedExecutor'):
+        self.handler = handler
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max(1, max_batch_size)
+        self._lanes = [queue.Queue(maxsize=max_queue_size) for _ in range(max(1, workers))]
+        self._stats_lock = threading.Lock()
+        self._processed = 0
+        self._batches = 0
+        self._errors = 0
+        self._rejected = 0
+        self._last_batch_size = 0
+
+        for index, lane in enumerate(self._lanes):
+            thread = threading.Thread(target=self._run, args=(lane,), daemon=True, name=f"{name}-{index}")
+            thread.start()
+
+    def submit(self, key, item):
+        """
+        Queue an item without blocking. Returns False when the lane is full; the caller applies
+        backpressure itself (e.g. requeue the message) instead of stalling its thread.
+        """
+        lane = self._lanes[zlib.crc32(str(key).encode('utf-8')) % len(self._lanes)]
+        try:
+            lane.put_nowait(item)
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            return False
+        return True
+
+    def queue_depth(self):
+        return sum(lane.qsize() for lane in self._lanes)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'workers': len(self._lanes),
+                'queue_depth': self.queue_depth(),
+                'max_queue_size': self.max_queue_size * len(self._lanes),
+                'processed': self._processed,
+                'batches': self._batches,
+                'last_batch_size': self._last_batch_size,
+                'errors': self._errors,
+                'rejected': self._rejected,
+            }
+
+    def _run(self, lane):
+        while True:
+            batch = [lane.get()]
+            try:
+                while len(batch) < self.max_batch_size:
+                    batch.append(lane.get_nowait())
+            except queue.Empty:
+                pass
+
+            failed = False
+            try:
+                self.handler(batch)
+            except Exception as e:
+                failed = True
+                print(f"❌ {threading.current_thread().name} handler error: {e}")
+
+            with self._stats_lock:
+                self._processed += len(batch)
+                self._batches += 1
+                self._last_batch_size = len(batch)
+                if failed:
+                    self._errors += 1
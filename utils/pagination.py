@@ -0,0 +1,88 @@
+import base64
+import binascii
+
+from bson import json_util
+
+from utils.count_cache import count_cache
+
+ASCENDING = 1
+DESCENDING = -1
+
+
+class CursorError(ValueError):
+    """Cursor is malformed or was issued for a different sort."""
+
+
+def encode_cursor(values):
+    """Opaque cursor for the sort-key values of the last document of a page."""
+    raw = json_util.dumps(list(values)).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json_util.loads(raw.decode('utf-8'))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise CursorError('Invalid cursor') from e
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise CursorError('Invalid cursor')
+    return values
+
+
+def cursor_values(document, sort):
+    return [document.get(field) for field, _ in sort]
+
+
+def keyset_condition(sort, values):
+    """
+    Documents strictly after `values` in `sort` order:
+    (a > x) or (a == x and b > y) or ... — every branch is an index range on the sort index.
+    Nulls sort first in Mongo, so they are handled explicitly.
+    """
+    branches = []
+    for position, (field, direction) in enumerate(sort):
+        branch = {prefix_field: prefix_value for (prefix_field, _), prefix_value in zip(sort[:position], values[:position])}
+        value = values[position]
+        if value is None:
+            if direction == DESCENDING:
+                # Nothing sorts before null
+                continue
+            branch[field] = {'$ne': None}
+        elif direction == ASCENDING:
+            branch[field] = {'$gt': value}
+        else:
+            branch['$or'] = [{field: {'$lt': value}}, {field: None}]
+        branches.append(branch)
+    return {'$or': branches} if branches else {'_id': {'$exists': False}}
+
+
+def paginate(collection, query, sort, skip, size, cursor=None, projection=None):
+    """
+    One page in `sort` order (the last sort key must be unique, e.g. _id). Returns (documents, next_cursor).
+    With a cursor the page is an index range seek (cost independent of depth); without one it
+    falls back to .skip(skip). Both modes return the cursor of the following page, or None.
+    """
+    if cursor:
+        condition = keyset_condition(sort, decode_cursor(cursor, sort))
+        find_query = {'$and': [query, condition]} if query else condition
+        documents = list(collection.find(find_query, projection).sort(sort).limit(size + 1))
+    else:
+        documents = list(collection.find(query, projection).sort(sort).skip(skip).limit(size + 1))
+
+    has_next = len(documents) > size
+    documents = documents[:size]
+    next_cursor = encode_cursor(cursor_values(documents[-1], sort)) if has_next and documents else None
+    return documents, next_cursor
+
+
+def count_total(collection, query):
+    """
+    (total, exact) for pagination metadata. Unfiltered lists read the collection metadata
+    (estimated_document_count); filtered lists go through the count cache. exact is False for
+    estimates and cached counts, which can lag recent writes by up to the cache TTL.
+    """
+    if not query:
+        return collection.estimated_document_count(), False
+    total, cached = count_cache.count(collection, query)
+    return total, not cached
@@ -0,0 +1,134 @@
+"""
+Message body encoding for RabbitMQ RPC payloads.
+
+Bodies are JSON (orjson when installed) or msgpack, optionally zstd-compressed above a
+size threshold. The format travels in the AMQP content_type / content_encoding
+properties; messages without them are treated as plain UTF-8 JSON, so peers that only
+speak JSON keep working. Accepted formats are advertised in the ACCEPT_* headers so
+peers can answer in a compact form.
+"""
+import json
+import threading
+from datetime import datetime
+
+from bson import ObjectId
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CONTENT_TYPE_JSON = 'application/json'
+CONTENT_TYPE_MSGPACK = 'application/msgpack'
+ENCODING_ZSTD = 'zstd'
+ENCODING_IDENTITY = 'identity'
+
+ACCEPT_CONTENT_TYPE_HEADER = 'x-accept-content-type'
+ACCEPT_CONTENT_ENCODING_HEADER = 'x-accept-content-encoding'
+
+_local = threading.local()
+
+
+class RPCDecodeError(ValueError):
+    """Raised when a message body cannot be decoded with its declared format."""
+
+
+def supported_content_types() -> list[str]:
+    return ([CONTENT_TYPE_MSGPACK] if msgpack else []) + [CONTENT_TYPE_JSON]
+
+
+def supported_encodings() -> list[str]:
+    return ([ENCODING_ZSTD] if zstandard else []) + [ENCODING_IDENTITY]
+
+
+def accept_headers() -> dict:
+    """Headers telling the peer which reply formats this process can decode."""
+    return {
+        ACCEPT_CONTENT_TYPE_HEADER: ', '.join(supported_content_types()),
+        ACCEPT_CONTENT_ENCODING_HEADER: ', '.join(supported_encodings()),
+    }
+
+
+def negotiate(accept: str | None, supported: list[str], default: str) -> str:
+    """Pick the first format from a peer's accept list that we can produce."""
+    for candidate in (accept or '').split(','):
+        candidate = candidate.strip().lower()
+        if candidate in supported:
+            return candidate
+    return default
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Type is not serializable: {type(value).__name__}")
+
+
+def _zstd_compressor():
+    if not hasattr(_local, 'compressor'):
+        _local.compressor = zstandard.ZstdCompressor(level=3)
+        _local.decompressor = zstandard.ZstdDecompressor()
+    return _local.compressor, _local.decompressor
+
+
+def encode(payload, content_type: str = CONTENT_TYPE_JSON, compression: str | None = None,
+           compress_threshold: int = 4096) -> tuple[bytes, str, str | None]:
+    """Serialize a payload. Returns (body, content_type, content_encoding)."""
+    if content_type == CONTENT_TYPE_MSGPACK and msgpack:
+        body = msgpack.packb(payload, use_bin_type=True, default=_default)
+    else:
+        content_type = CONTENT_TYPE_JSON
+        if orjson:
+            body = orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+    if compression == ENCODING_ZSTD and zstandard and len(body) >= compress_threshold:
+        compressor, _ = _zstd_compressor()
+        return compressor.compress(body), content_type, ENCODING_ZSTD
+    return body, content_type, None
+
+
+def decode(body: bytes | str, content_type: str | None = None, content_encoding: str | None = None):
+    """Deserialize a message body according to its AMQP content_type / content_encoding."""
+    try:
+        if content_encoding == ENCODING_ZSTD:
+            if not zstandard:
+                raise RPCDecodeError('zstd-encoded message but zstandard is not installed')
+            _, decompressor = _zstd_compressor()
+            body = decompressor.decompress(body)
+        elif content_encoding not in (None, '', ENCODING_IDENTITY, 'utf-8'):
+            raise RPCDecodeError(f"Unsupported content encoding: {content_encoding}")
+
+        if content_type == CONTENT_TYPE_MSGPACK:
+            if not msgpack:
+                raise RPCDecodeError('msgpack message but msgpack is not installed')
+            return msgpack.unpackb(body, raw=False)
+        if orjson:
+            return orjson.loads(body)
+        return json.loads(body)
+    except RPCDecodeError:
+        raise
+    except Exception as e:
+        raise RPCDecodeError(str(e)) from e
+
+
+def decode_message(properties, body: bytes | str):
+    """Decode a consumed message using its pika BasicProperties (None means plain JSON)."""
+    return decode(
+        body,
+        getattr(properties, 'content_type', None),
+        getattr(properties, 'content_encoding', None),
+    )
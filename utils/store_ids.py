@@ -0,0 +1,20 @@
+import re
+
+_NUMERIC_STORE_ID = re.compile(r'^\s*-?\d+\s*$')
+
+
+def canonical_store_id(store_id):
+    """
+    store_id as it is stored in Mongo: an integer for numeric ids (the crawler's storeId),
+    otherwise the string unchanged. Path params and JSON bodies must go through this
+    before querying, instead of matching against several type variants.
+    """
+    if isinstance(store_id, bool):
+        return store_id
+    if isinstance(store_id, int):
+        return store_id
+    if isinstance(store_id, float) and store_id.is_integer():
+        return int(store_id)
+    if isinstance(store_id, str) and _NUMERIC_STORE_ID.match(store_id):
+        return int(store_id)
+    return store_id
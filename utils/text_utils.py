@@ -0,0 +1,28 @@
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r'\s+')
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def fold_text(text):
+    """
+    Search key for Vietnamese text: lowercase, no diacritics, đ → d, single spaces.
+    'Thịt Bò Đà Lạt' → 'thit bo da lat'
+    """
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFD', str(text).lower())
+    text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+    return _WHITESPACE.sub(' ', text.replace('đ', 'd')).strip()
+
+
+def word_starts(folded):
+    """Every suffix of folded text that starts at a word: 'quan 1 tphcm' → ['quan 1 tphcm', '1 tphcm', 'tphcm']"""
+    words = folded.split(' ')
+    return [' '.join(words[index:]) for index in range(len(words))]
+
+
+def tokenize(text):
+    """Folded word tokens: 'Thịt bò (Úc)' → ['thit', 'bo', 'uc']"""
+    return _TOKEN.findall(fold_text(text))